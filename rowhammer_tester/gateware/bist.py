@@ -1,3 +1,6 @@
+from functools import reduce
+from operator import xor
+
 from migen import *
 
 from migen.genlib.coding import Decoder as OneHotDecoder
@@ -56,6 +59,10 @@ class RowDataInverter(Module, AutoCSR):
     AddressSelector has to construct one-hot encoded signal
     with width of 2**rowbits with 1 bit per row, so it quickly
     becomes huge.
+
+    `row_shift` is the position of the row bits in `addr`, or, for
+    address mappings with XORed bits, a tuple with the `addr` bits
+    to XOR for each row bit (see `AddressMapping.row_address`).
     """
     def __init__(self, addr, data_in, data_out, rowbits, row_shift):
         nrows = 2**rowbits
@@ -65,8 +72,14 @@ class RowDataInverter(Module, AutoCSR):
 
         self.submodules.selector = selector = AddressSelector(nbits=rowbits)
 
+        if isinstance(row_shift, int):
+            row_address = addr[row_shift:row_shift + rowbits]
+        else:
+            assert len(row_shift) == rowbits
+            row_address = Cat(*[reduce(xor, [addr[b] for b in bits]) for bits in row_shift])
+
         self.comb += [
-            selector.address.eq(addr[row_shift:row_shift + rowbits]),
+            selector.address.eq(row_address),
             If(selector.selected,
                 data_out.eq(~data_in)
             ).Else(
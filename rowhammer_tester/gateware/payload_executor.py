@@ -201,6 +201,22 @@ class Encoder:
             address |= rank
         return address
 
+def payload_checksum(payload, depth=None):
+    """Calculate payload memory checksum as done by PayloadExecutor
+
+    If `depth` is given, the payload is padded with zeros to the memory depth.
+    """
+    mask = 2**Decoder.INSTRUCTION - 1
+    checksum = 0
+    for word in payload:
+        checksum = ((checksum << 1) | (checksum >> (Decoder.INSTRUCTION - 1))) & mask
+        checksum ^= word
+    if depth is not None:
+        assert len(payload) <= depth, (len(payload), depth)
+        for _ in range(depth - len(payload)):
+            checksum = ((checksum << 1) | (checksum >> (Decoder.INSTRUCTION - 1))) & mask
+    return checksum
+
 @ResetInserter()
 class Scratchpad(Module):
     """
@@ -370,6 +386,9 @@ class PayloadExecutor(Module, AutoCSR, AutoDoc):
         self.program_counter     = Signal(max=mem_payload.depth - 1)
         self.loop_counter        = Signal(Decoder.LOOP_COUNT)
         self.idle_counter        = Signal(Decoder.TIMESLICE_NOOP)
+        self.checksum_start      = Signal()
+        self.checksum            = Signal(Decoder.INSTRUCTION)
+        self.checksum_counter    = Signal(max=mem_payload.depth + 1)
 
         # Scratchpad
         self.submodules.scratchpad = Scratchpad(mem_scratchpad, dfi_switch.dfi)
@@ -402,6 +421,23 @@ class PayloadExecutor(Module, AutoCSR, AutoDoc):
             self.ready.eq(1),
             If(self.start,
                 NextState("WAIT-DFI"),
+            ).Elif(self.checksum_start,
+                NextValue(self.checksum, 0),
+                NextValue(self.checksum_counter, 0),
+                NextState("CHECKSUM"),
+            )
+        )
+        # Fold the whole payload memory into a checksum (rotate left by 1, then xor with the
+        # instruction), so that the host can validate its copy of the memory contents.
+        # Data is available 1 cycle after fetch, so the first cycle only issues the fetch.
+        self.fsm.act("CHECKSUM",
+            fetch_address.eq(self.checksum_counter),
+            NextValue(self.checksum_counter, self.checksum_counter + 1),
+            If(self.checksum_counter != 0,
+                NextValue(self.checksum, Cat(self.checksum[-1], self.checksum[:-1]) ^ instruction),
+            ),
+            If(self.checksum_counter == mem_payload.depth,
+                NextState("READY"),
             )
         )
         self.fsm.act("WAIT-DFI",
@@ -478,9 +514,16 @@ class PayloadExecutor(Module, AutoCSR, AutoDoc):
         ], description="Payload executor status register")
         self._read_count = CSRStatus(len(self.scratchpad.counter), description="Number of data"
                                      " from READ commands that is stored in the scratchpad memory")
+        self._checksum_start = CSR()
+        self._checksum_start.description = "Writing to this register starts calculation of the" \
+            " payload memory checksum, `ready` is cleared until it is finished"
+        self._checksum = CSRStatus(len(self.checksum), description="Checksum of the payload"
+                                   " memory contents (for each word: rotate left by 1, xor word)")
 
         self.comb += [
             self.start.eq(self._start.re),
+            self.checksum_start.eq(self._checksum_start.re),
+            self._checksum.status.eq(self.checksum),
             self._status.fields.ready.eq(self.ready),
             self._status.fields.overflow.eq(self.scratchpad.overflow),
             self._read_count.status.eq(self.scratchpad.counter),
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Text assembly format for the PayloadExecutor instruction set.
+
+Example::
+
+    # wait for tRFC after mode transition
+            NOOP  50
+    hammer: ACT   20  bank=1 row=100
+            PRE   20  bank=1
+            LOOP  999 hammer      # jump to `hammer` 999 times
+            REF   60
+            STOP
+
+Each line holds an optional label, an instruction and a comment (``#`` or ``;``).
+DFI instructions (ACT, PRE, REF, ZQC, READ) take a TIMESLICE followed by address fields:
+``rank=``, ``bank=``, ``row=`` or ``col=`` (or raw ``address=``). NOOP takes a TIMESLICE,
+LOOP takes a COUNT and a jump target (a label or a relative ``-N``). STOP is NOOP 0.
+
+Assembled payloads are ``uint32`` arrays. :class:`PayloadCache` stores them in files named
+after the hash of the source, so loading an already assembled payload does not require parsing.
+"""
+
+import os
+import re
+import sys
+import hashlib
+import argparse
+
+import numpy as np
+
+from rowhammer_tester.gateware.payload_executor import Encoder, OpCode, Decoder
+
+_line_re = re.compile(r'^\s*(?:(?P<label>[A-Za-z_][\w.]*)\s*:)?\s*(?P<instr>[^#;]*?)\s*(?:[#;].*)?$')
+
+
+class AssemblerError(Exception):
+
+    def __init__(self, lineno, msg):
+        super().__init__('line {}: {}'.format(lineno, msg))
+        self.lineno = lineno
+
+
+def _int(value):
+    return int(value, 0)
+
+
+def _parse(source):
+    # Yields (lineno, label, mnemonic, args)
+    for lineno, line in enumerate(source.splitlines(), start=1):
+        m = _line_re.match(line)
+        if m is None:
+            raise AssemblerError(lineno, 'Syntax error: {}'.format(line.strip()))
+        label, instr = m.group('label'), m.group('instr')
+        if not instr:
+            if label is not None:
+                yield lineno, label, None, []
+            continue
+        mnemonic, *args = instr.replace(',', ' ').split()
+        yield lineno, label, mnemonic.upper(), args
+
+
+def assemble(source, *, bankbits, nranks=1):
+    """Assembles payload source text to an array of uint32 instruction words"""
+    encoder = Encoder(bankbits=bankbits, nranks=nranks)
+
+    # First pass: find label addresses
+    labels = {}
+    lines = []
+    for lineno, label, mnemonic, args in _parse(source):
+        if label is not None:
+            if label in labels:
+                raise AssemblerError(lineno, 'Duplicate label: {}'.format(label))
+            labels[label] = len(lines)
+        if mnemonic is not None:
+            lines.append((lineno, mnemonic, args))
+
+    # Second pass: encode
+    words = np.zeros(len(lines), dtype=np.uint32)
+    for pc, (lineno, mnemonic, args) in enumerate(lines):
+        try:
+            words[pc] = _encode_line(encoder, pc, mnemonic, args, labels)
+        except (ValueError, KeyError, AssertionError) as e:
+            raise AssemblerError(lineno, '{}: {}'.format(mnemonic, str(e) or type(e).__name__)) from e
+    return words
+
+
+def _encode_line(encoder, pc, mnemonic, args, labels):
+    if mnemonic == 'STOP':
+        if args:
+            raise ValueError('STOP takes no arguments')
+        return encoder(OpCode.NOOP, timeslice=0)
+
+    if mnemonic not in OpCode.__members__:
+        raise ValueError('Unknown instruction')
+    op_code = OpCode[mnemonic]
+    if op_code == OpCode.LOOP:
+        if len(args) != 2:
+            raise ValueError('expected: LOOP <count> <label>')
+        count, target = args
+        if target.startswith('-'):
+            jump = -_int(target)
+        else:
+            if target not in labels:
+                raise ValueError('Unknown label: {}'.format(target))
+            jump = pc - labels[target]
+        if not 0 < jump < 2**Decoder.LOOP_JUMP:
+            raise ValueError('Invalid jump: {}'.format(jump))
+        count = _int(count)
+        if not 0 <= count < 2**Decoder.LOOP_COUNT:
+            raise ValueError('Invalid count: {}'.format(count))
+        return encoder(OpCode.LOOP, count=count, jump=jump)
+
+    if len(args) < 1:
+        raise ValueError('missing timeslice')
+    timeslice = _int(args[0])
+    if op_code == OpCode.NOOP:
+        if len(args) != 1:
+            raise ValueError('NOOP takes only timeslice')
+        if not 0 < timeslice < 2**Decoder.TIMESLICE_NOOP:
+            raise ValueError('Invalid timeslice: {}'.format(timeslice))
+        return encoder(OpCode.NOOP, timeslice=timeslice)
+
+    if not 0 < timeslice < 2**Decoder.TIMESLICE:
+        raise ValueError('Invalid timeslice: {}'.format(timeslice))
+    fields = {}
+    for arg in args[1:]:
+        name, sep, value = arg.partition('=')
+        if not sep or name not in ['rank', 'bank', 'row', 'col', 'address']:
+            raise ValueError('Invalid address field: {}'.format(arg))
+        fields[name] = _int(value)
+    if 'address' in fields:
+        if len(fields) != 1:
+            raise ValueError('`address` cannot be combined with other fields')
+        address = fields['address']
+    else:
+        fields.setdefault('rank', 0)
+        address = encoder.address(**fields)
+    if not 0 <= address < 2**Decoder.ADDRESS:
+        raise ValueError('Address out of range: 0x{:x}'.format(address))
+    return encoder(op_code, timeslice=timeslice, address=address)
+
+
+def decode_word(word, *, bankbits, nranks=1):
+    """Decodes a single instruction word to (op_code, dict of fields)"""
+    word = int(word)
+    op_code = OpCode(word & (2**Decoder.OP_CODE - 1))
+    tail = word >> Decoder.OP_CODE
+    if op_code == OpCode.LOOP:
+        return op_code, dict(
+            count=tail & (2**Decoder.LOOP_COUNT - 1), jump=tail >> Decoder.LOOP_COUNT)
+    if op_code == OpCode.NOOP:
+        return op_code, dict(timeslice=tail)
+    address = tail >> Decoder.TIMESLICE
+    fields = dict(timeslice=tail & (2**Decoder.TIMESLICE - 1))
+    rankbits = (nranks - 1).bit_length()
+    if rankbits:
+        fields['rank'] = address & (2**rankbits - 1)
+        address >>= rankbits
+    fields['bank'] = address & (2**bankbits - 1)
+    fields['row' if op_code == OpCode.ACT else 'col'] = address >> bankbits
+    return op_code, fields
+
+
+def disassemble(words, *, bankbits, nranks=1, strip=True):
+    """
+    Converts instruction words to assembly text accepted by :func:`assemble`.
+
+    With ``strip=True`` trailing STOP instructions (e.g. memory padding) are reduced to one.
+    """
+    decoded = [decode_word(w, bankbits=bankbits, nranks=nranks) for w in words]
+    if strip:
+        while len(decoded) > 1 and all(d == (OpCode.NOOP, dict(timeslice=0)) for d in decoded[-2:]):
+            decoded.pop()
+
+    targets = {}
+    for pc, (op_code, fields) in enumerate(decoded):
+        if op_code == OpCode.LOOP and 0 < fields['jump'] <= pc:
+            targets.setdefault(pc - fields['jump'], 'L{}'.format(pc - fields['jump']))
+
+    label_w = max([len(label) + 1 for label in targets.values()], default=0)
+    lines = []
+    for pc, (op_code, fields) in enumerate(decoded):
+        label = targets[pc] + ':' if pc in targets else ''
+        if op_code == OpCode.NOOP and fields['timeslice'] == 0:
+            instr = 'STOP'
+        elif op_code == OpCode.NOOP:
+            instr = '{:4}  {}'.format('NOOP', fields['timeslice'])
+        elif op_code == OpCode.LOOP:
+            jump = fields['jump']
+            target = targets.get(pc - jump, '-{}'.format(jump))
+            instr = '{:4}  {} {}'.format('LOOP', fields['count'], target)
+        else:
+            args = [str(fields.pop('timeslice'))]
+            # always show the row/column that is being accessed, other fields only if set
+            accessed = {OpCode.ACT: 'row', OpCode.READ: 'col'}.get(op_code)
+            for name, value in fields.items():
+                if value != 0 or name == accessed:
+                    args.append('{}={}'.format(name, value if value < 1024 else hex(value)))
+            instr = '{:4}  {}'.format(op_code.name, ' '.join(args))
+        lines.append('{:{w}} {}'.format(label, instr, w=label_w).rstrip() if label_w else instr)
+    return '\n'.join(lines) + '\n'
+
+
+# Cache --------------------------------------------------------------------------------------------
+
+
+def default_cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'rowhammer_tester', 'payloads')
+
+
+class PayloadCache:
+    """
+    Cache of assembled payloads.
+
+    Binaries are stored as raw little-endian uint32 words in files named after a hash of
+    the source text and the instruction format parameters.
+    """
+    VERSION = 1
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_cache_dir()
+
+    def key(self, source, *, bankbits, nranks=1):
+        h = hashlib.sha256()
+        h.update('v{} bankbits={} nranks={}\n'.format(self.VERSION, bankbits, nranks).encode())
+        h.update(source.encode())
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.bin')
+
+    def assemble(self, source, *, bankbits, nranks=1):
+        """Returns assembled payload, from cache if possible"""
+        path = self.path(self.key(source, bankbits=bankbits, nranks=nranks))
+        if os.path.isfile(path):
+            return load_binary(path)
+        words = assemble(source, bankbits=bankbits, nranks=nranks)
+        os.makedirs(self.directory, exist_ok=True)
+        # write to a temporary file first, so that concurrent users never see partial files
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        save_binary(tmp, words)
+        os.replace(tmp, path)
+        return words
+
+
+def save_binary(path, words):
+    np.asarray(words, dtype='<u4').tofile(path)
+
+
+def load_binary(path):
+    return np.fromfile(path, dtype='<u4').astype(np.uint32)
+
+
+def load_payload(path, *, bankbits, nranks=1, cache=None):
+    """
+    Loads payload from a binary (``.bin``) or an assembly source file.
+
+    Sources are assembled through ``cache`` (a :class:`PayloadCache`) if given.
+    """
+    if path.endswith('.bin'):
+        return load_binary(path)
+    with open(path) as f:
+        source = f.read()
+    if cache is not None:
+        return cache.assemble(source, bankbits=bankbits, nranks=nranks)
+    return assemble(source, bankbits=bankbits, nranks=nranks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PayloadExecutor assembler/disassembler')
+    parser.add_argument('--bankbits', type=int, default=3, help='Number of bank address bits')
+    parser.add_argument('--nranks', type=int, default=1, help='Number of ranks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    asm_parser = subparsers.add_parser('assemble', help='Assemble source to a binary file')
+    asm_parser.add_argument('source', help='Assembly source file')
+    asm_parser.add_argument('-o', '--output', help='Output binary file (default: <source>.bin)')
+    dis_parser = subparsers.add_parser('disassemble', help='Disassemble a binary file')
+    dis_parser.add_argument('binary', help='Binary file with little-endian 32-bit words')
+    args = parser.parse_args(argv)
+
+    isa = dict(bankbits=args.bankbits, nranks=args.nranks)
+    if args.command == 'assemble':
+        try:
+            words = load_payload(args.source, **isa)
+        except AssemblerError as e:
+            print('{}: {}'.format(args.source, e), file=sys.stderr)
+            return 1
+        output = args.output or os.path.splitext(args.source)[0] + '.bin'
+        save_binary(output, words)
+        print('{}: {} instructions'.format(output, len(words)))
+    else:
+        print(disassemble(load_binary(args.binary), **isa), end='')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
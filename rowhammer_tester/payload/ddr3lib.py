@@ -1,8 +1,10 @@
 import math
-import collections
 
 import payload_ddr3_pb2
 
+from rowhammer_tester.payload import timinglib
+from rowhammer_tester.payload.timinglib import Scope
+
 Timing = payload_ddr3_pb2.Timing
 Opcode = payload_ddr3_pb2.Opcode
 Instr = payload_ddr3_pb2.Instr
@@ -47,92 +49,64 @@ def VerifyInstr(ip: int, instr: Instr) -> bool:
     return False
 
 
-class Rank:
+class Rank(timinglib.Rank):
 
     def __init__(self, timing: Timing):
-        self.parameters = {
-            Opcode.RD: {
-                Opcode.RD: timing.ccd,
-            },
-            Opcode.ACT: {
-                Opcode.ACT: timing.rrd,
-                Opcode.REF: math.inf,
-            },
-            Opcode.PRE: {
-                Opcode.REF: timing.rp,
+        parameters = {
+            Scope.RANK: {
+                Opcode.RD: {
+                    Opcode.RD: timing.ccd,
+                },
+                Opcode.ACT: {
+                    Opcode.ACT: timing.rrd,
+                    Opcode.REF: math.inf,
+                },
+                Opcode.PRE: {
+                    Opcode.REF: timing.rp,
+                },
+                Opcode.REF: {
+                    Opcode.ACT: timing.rfc,
+                    Opcode.PRE: timing.rfc,
+                    Opcode.REF: timing.rfc,
+                },
             },
-            Opcode.REF: {
-                Opcode.ACT: timing.rfc,
-                Opcode.PRE: timing.rfc,
-                Opcode.REF: timing.rfc,
+            Scope.BANK: {
+                Opcode.RD: {
+                    Opcode.PRE: timing.rtp,
+                },
+                Opcode.ACT: {
+                    Opcode.RD: timing.rcd,
+                    Opcode.ACT: math.inf,
+                    Opcode.PRE: timing.ras,
+                },
+                Opcode.PRE: {
+                    Opcode.RD: math.inf,
+                    Opcode.ACT: timing.rp
+                },
             },
         }
-        self.next_tick = {Opcode.RD: 0, Opcode.ACT: 0, Opcode.PRE: 0, Opcode.REF: 0}
-
-        # Special-case handling for tFAW.
-        self.prev_acts = collections.deque(maxlen=4)
-        self.faw = timing.faw
-
-        # Banks.
-        self.banks = [Bank(timing) for _ in range(1 << Instr.MemInstr.Bits.BANK)]
+        super().__init__(
+            bank_groups=1,
+            banks=1 << Instr.MemInstr.Bits.BANK,
+            opcodes=Opcode.MAX,
+            parameters=parameters,
+            faw=timing.faw,
+            act=Opcode.ACT,
+            blocked=[Opcode.RD],  # Banks are closed
+            name=Opcode.Name)
 
     def Execute(self, tick: int, instr: Instr.MemInstr) -> bool:
-        if tick < self.next_tick.get(instr.opcode, 0):
-            print(
-                'Rank timing violation for {}: {} < {}'.format(
-                    Opcode.Name(instr.opcode), tick, self.next_tick[instr.opcode]))
-            return False
-
-        # Special-case handling for tFAW.
-        if instr.opcode == Opcode.ACT:
-            if len(self.prev_acts) == self.prev_acts.maxlen:
-                if tick - self.prev_acts[0] < self.faw:
-                    print(
-                        'tFAW timing violation for {}: {} < {}'.format(
-                            Opcode.Name(instr.opcode), tick - self.prev_acts[0], self.faw))
-                    return False
-            self.prev_acts.append(tick)
-
-        if not self.banks[instr.bank].Execute(tick, instr):
-            return False
-
-        for opcode, parameter in self.parameters.get(instr.opcode, {}).items():
-            if self.next_tick[opcode] == math.inf:
-                self.next_tick[opcode] = tick + parameter
-            elif self.next_tick[opcode] < tick + parameter:
-                self.next_tick[opcode] = tick + parameter
-        return True
-
-
-class Bank:
+        return self.ExecuteCommand(tick, instr.opcode, 0, instr.bank)
 
-    def __init__(self, timing: Timing):
-        self.parameters = {
-            Opcode.RD: {
-                Opcode.PRE: timing.rtp,
-            },
-            Opcode.ACT: {
-                Opcode.RD: timing.rcd,
-                Opcode.ACT: math.inf,
-                Opcode.PRE: timing.ras,
-            },
-            Opcode.PRE: {
-                Opcode.RD: math.inf,
-                Opcode.ACT: timing.rp
-            }
-        }
-        self.next_tick = {Opcode.RD: math.inf, Opcode.ACT: 0, Opcode.PRE: 0, Opcode.REF: 0}
+    def execute_many(self, ticks, instrs) -> int:
+        """Executes instructions at given ticks, returns the number of executed instructions."""
+        return self.ExecuteArrays(ticks, *DecodeMany(instrs))
 
-    def Execute(self, tick: int, instr: Instr.MemInstr) -> bool:
-        if tick < self.next_tick.get(instr.opcode, 0):
-            print(
-                'Bank timing violation for {}: {} < {}'.format(
-                    Opcode.Name(instr.opcode), tick, self.next_tick[instr.opcode]))
-            return False
 
-        for opcode, parameter in self.parameters.get(instr.opcode, {}).items():
-            if self.next_tick[opcode] == math.inf:
-                self.next_tick[opcode] = tick + parameter
-            elif self.next_tick[opcode] < tick + parameter:
-                self.next_tick[opcode] = tick + parameter
-        return True
+def DecodeMany(instrs) -> tuple:
+    """Returns (opcodes, bank_groups, banks) of memory instructions."""
+    return (
+        [instr.opcode for instr in instrs],
+        [0 for instr in instrs],
+        [instr.bank for instr in instrs],
+    )
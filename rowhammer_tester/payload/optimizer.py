@@ -0,0 +1,202 @@
+"""
+Peephole optimizer for PayloadExecutor payloads.
+
+Works on lists of :class:`Encoder.I` instructions, before they get encoded. The following
+rewrites are performed inside basic blocks (a LOOP jump target starts a new block, a LOOP
+instruction ends it):
+
+* adjacent NOOPs are merged (STOP is never touched),
+* a NOOP following a DFI instruction is folded into its TIMESLICE if it fits,
+* LOOPs with count 0 are replaced with NOOP(1),
+* loops with a body consisting of a single NOOP are replaced with a single NOOP.
+
+The result is checked against the original using :func:`payload_schedule`, so the optimized
+payload sends exactly the same DFI commands at exactly the same cycles.
+
+Refresh filler (the REF, or NOOP without refresh, of tRFC starting each loop body) is kept.
+A REF is a command, and a NOOP at a jump target can only be moved out of the loop by
+rotating it, which adds its wait after the last iteration and breaks the equivalence.
+"""
+
+from collections import namedtuple
+
+from rowhammer_tester.gateware.payload_executor import Encoder, OpCode, Decoder
+
+MAX_TIMESLICE = 2**Decoder.TIMESLICE - 1
+MAX_TIMESLICE_NOOP = 2**Decoder.TIMESLICE_NOOP - 1
+
+OptimizationStats = namedtuple('OptimizationStats', ['instructions_before', 'instructions_after'])
+
+
+class PayloadEquivalenceError(Exception):
+    pass
+
+
+def is_stop(instr):
+    return instr.op_code == OpCode.NOOP and instr.timeslice == 0
+
+# Payload model ------------------------------------------------------------------------------------
+
+
+def _normalize(tokens):
+    out = []
+
+    def append(token):
+        if token[0] == 'wait':
+            if token[1] == 0:
+                return
+            if out and out[-1][0] == 'wait':
+                out[-1] = ('wait', out[-1][1] + token[1])
+                return
+        out.append(token)
+
+    for token in tokens:
+        if token[0] == 'repeat':
+            _, body, count = token
+            body = _normalize(body)
+            if count == 1 or len(body) == 0:
+                for t in body:
+                    append(t)
+            elif all(t[0] == 'wait' for t in body):
+                append(('wait', body[0][1] * count))
+            else:
+                append(('repeat', body, count))
+        else:
+            append(token)
+    return tuple(out)
+
+
+def payload_schedule(payload):
+    """
+    Returns a normalized description of what happens during payload execution.
+
+    The result is a tuple of tokens: ``('cmd', op_code, address)`` for a DFI command,
+    ``('wait', cycles)`` for the cycles until the next command and ``('repeat', body, count)``
+    for loops. Two payloads with equal schedules are cycle-equivalent.
+    """
+    tokens = []
+    starts = []  # index of the first token generated by each instruction
+    for i, instr in enumerate(payload):
+        starts.append(len(tokens))
+        if is_stop(instr):
+            break
+        if instr.op_code == OpCode.LOOP:
+            assert 0 < instr.jump <= i, 'Jump outside of the payload at {}'.format(i)
+            start = starts[i - instr.jump]
+            # each evaluation of the LOOP instruction takes a single cycle
+            body = tuple(tokens[start:]) + (('wait', 1), )
+            tokens[start:] = [('repeat', body, instr.count + 1)]
+        elif instr.op_code == OpCode.NOOP:
+            tokens.append(('wait', instr.timeslice))
+        else:
+            tokens.append(('cmd', instr.op_code, getattr(instr, 'address', 0)))
+            tokens.append(('wait', max(instr.timeslice, 1)))
+    return _normalize(tokens)
+
+# Optimizer ----------------------------------------------------------------------------------------
+
+
+class _Entry:
+    # Instruction with LOOP jump stored as a reference to the target entry
+    def __init__(self, instr, target=None):
+        self.instr = instr
+        self.target = target
+
+
+def _to_entries(payload):
+    entries = [_Entry(instr) for instr in payload]
+    for i, entry in enumerate(entries):
+        if entry.instr.op_code == OpCode.LOOP:
+            assert 0 < entry.instr.jump <= i, 'Jump outside of the payload at {}'.format(i)
+            entry.target = entries[i - entry.instr.jump]
+    return entries
+
+
+def _from_entries(entries):
+    index = {id(entry): i for i, entry in enumerate(entries)}
+    payload = []
+    for i, entry in enumerate(entries):
+        instr = entry.instr
+        if instr.op_code == OpCode.LOOP:
+            instr = Encoder.I(OpCode.LOOP, count=instr.count, jump=i - index[id(entry.target)])
+        payload.append(instr)
+    return payload
+
+
+def _is_dfi(instr):
+    return instr.op_code not in [OpCode.NOOP, OpCode.LOOP]
+
+
+def _with_timeslice(instr, timeslice):
+    kwargs = dict(timeslice=timeslice)
+    if hasattr(instr, 'address'):
+        kwargs['address'] = instr.address
+    return Encoder.I(instr.op_code, **kwargs)
+
+
+def _peephole(entries):
+    # Single pass over the payload, returns True if anything has been changed
+    targets = {id(e.target) for e in entries if e.target is not None}
+    out = []
+    changed = False
+    stopped = False
+    for entry in entries:
+        instr = entry.instr
+        prev = out[-1] if out else None
+        if stopped:
+            out.append(entry)
+            continue
+        if is_stop(instr):
+            stopped = True
+            out.append(entry)
+            continue
+
+        if instr.op_code == OpCode.LOOP:
+            if instr.count == 0:
+                # no jump, only a single cycle for the evaluation
+                entry = _Entry(Encoder.I(OpCode.NOOP, timeslice=1))
+                changed = True
+            elif prev is entry.target and prev.instr.op_code == OpCode.NOOP:
+                # loop body is a single NOOP
+                cycles = (prev.instr.timeslice + 1) * (instr.count + 1)
+                if cycles <= MAX_TIMESLICE_NOOP:
+                    prev.instr = Encoder.I(OpCode.NOOP, timeslice=cycles)
+                    changed = True
+                    continue
+            out.append(entry)
+            continue
+
+        mergeable = prev is not None and id(entry) not in targets \
+            and instr.op_code == OpCode.NOOP and prev.instr.op_code != OpCode.LOOP
+        if mergeable:
+            timeslice = prev.instr.timeslice + instr.timeslice
+            if prev.instr.op_code == OpCode.NOOP and timeslice <= MAX_TIMESLICE_NOOP:
+                prev.instr = Encoder.I(OpCode.NOOP, timeslice=timeslice)
+                changed = True
+                continue
+            if _is_dfi(prev.instr) and timeslice <= MAX_TIMESLICE:
+                prev.instr = _with_timeslice(prev.instr, timeslice)
+                changed = True
+                continue
+        out.append(entry)
+
+    entries[:] = out
+    return changed
+
+
+def optimize_payload(payload, verify=True):
+    """
+    Optimizes the payload (list of :class:`Encoder.I`), returns (payload, stats).
+
+    With ``verify=True`` the optimized payload is checked to be cycle-equivalent to the
+    original one and :class:`PayloadEquivalenceError` is raised if it is not.
+    """
+    entries = _to_entries(payload)
+    while _peephole(entries):
+        pass
+    optimized = _from_entries(entries)
+
+    if verify and payload_schedule(optimized) != payload_schedule(payload):
+        raise PayloadEquivalenceError('Optimized payload is not cycle-equivalent to the original')
+
+    return optimized, OptimizationStats(len(payload), len(optimized))
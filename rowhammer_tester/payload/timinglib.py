@@ -0,0 +1,225 @@
+"""
+Array-based DRAM timing state shared by ddr3lib and ddr4lib.
+
+Timing constraints of all scopes (rank, bank group, bank) are merged into a single
+``next_tick`` matrix indexed [bank_group, bank, opcode]: a command can be issued when
+the tick is not lower than its entry. Constraints with an infinite parameter (e.g. RD
+after PRE until the bank gets activated) are tracked in the ``blocked`` matrix instead.
+
+The effect of executing each command on each bank is precomputed into constraint tables,
+so executing a command is a few array operations and :meth:`Rank.ExecuteArrays` can
+verify a whole sequence of commands at once.
+"""
+
+import math
+import collections
+from enum import Enum
+
+import numpy as np
+
+# Entry of the constraint tables meaning that there is no constraint.
+# Far enough from int64 limits to allow adding ticks to it.
+NO_CONSTRAINT = -2**62
+
+
+class Scope(Enum):
+    RANK = 1  # All banks
+    BANK_GROUP = 2  # All banks in the bank group of the command
+    OTHER_BANK_GROUPS = 3  # All banks in other bank groups
+    BANK = 4  # The bank of the command
+
+
+class Rank:
+    """
+    Timing state of a rank.
+
+    `parameters` maps a scope to a dict {executed opcode: {constrained opcode: ticks}}.
+    A parameter of `math.inf` blocks the constrained opcode until a finite parameter from
+    the same scope gets applied to it. Opcodes listed in `blocked` start as blocked.
+    """
+
+    def __init__(self, *, bank_groups, banks, opcodes, parameters, faw, act, blocked=(), name=str):
+        self.shape = (bank_groups, banks, opcodes)
+        self.name = name
+        self.faw = faw
+        self.act = act
+
+        # Precomputed constraint tables indexed [executed command, bank_group, bank, opcode],
+        # where executed command is (opcode, bank_group, bank) flattened.
+        table_shape = (opcodes, bank_groups, banks) + self.shape
+        delta = np.full(table_shape, NO_CONSTRAINT, dtype=np.int64)
+        block = np.zeros(table_shape, dtype=bool)
+        unblock = np.zeros(table_shape, dtype=bool)
+
+        # Scope which can block (and so unblock) a given opcode
+        owners = {}
+        for scope, scope_parameters in parameters.items():
+            for constrained in scope_parameters.values():
+                for opcode, parameter in constrained.items():
+                    if parameter == math.inf:
+                        assert owners.setdefault(opcode, scope) == scope, \
+                            'Opcode {} blocked in multiple scopes'.format(name(opcode))
+
+        for (opcode, group, bank) in np.ndindex(opcodes, bank_groups, banks):
+            for scope, scope_parameters in parameters.items():
+                cells = np.zeros((bank_groups, banks), dtype=bool)
+                if scope == Scope.RANK:
+                    cells[...] = True
+                elif scope == Scope.BANK_GROUP:
+                    cells[group] = True
+                elif scope == Scope.OTHER_BANK_GROUPS:
+                    cells[...] = True
+                    cells[group] = False
+                elif scope == Scope.BANK:
+                    cells[group, bank] = True
+                for target, parameter in scope_parameters.get(opcode, {}).items():
+                    if parameter == math.inf:
+                        block[opcode, group, bank, :, :, target] |= cells
+                        continue
+                    d = delta[opcode, group, bank, :, :, target]
+                    d[cells] = np.maximum(d[cells], parameter)
+                    if owners.get(target) == scope:
+                        unblock[opcode, group, bank, :, :, target] |= cells
+
+        self.max_parameter = max(0, int(delta.max()))
+        ncommands = opcodes * bank_groups * banks
+        self.delta = delta.reshape(ncommands, -1)
+        self.block = block.reshape(ncommands, -1)
+        self.keep = ~unblock.reshape(ncommands, -1)
+
+        self.next_tick = np.zeros(self.shape, dtype=np.int64)
+        self.blocked = np.zeros(self.shape, dtype=bool)
+        for opcode in blocked:
+            self.blocked[..., opcode] = True
+
+        # Special-case handling for tFAW.
+        self.prev_acts = collections.deque(maxlen=4)
+
+    def _Command(self, opcode, bank_group, bank):
+        bank_groups, banks, _ = self.shape
+        return (opcode * bank_groups + bank_group) * banks + bank
+
+    def ExecuteCommand(self, tick: int, opcode: int, bank_group: int, bank: int) -> bool:
+        if self.blocked[bank_group, bank, opcode]:
+            print('Timing violation for {}: {} < {}'.format(self.name(opcode), tick, math.inf))
+            return False
+        next_tick = self.next_tick[bank_group, bank, opcode]
+        if tick < next_tick:
+            print('Timing violation for {}: {} < {}'.format(self.name(opcode), tick, next_tick))
+            return False
+
+        # Special-case handling for tFAW.
+        if opcode == self.act:
+            if len(self.prev_acts) == self.prev_acts.maxlen:
+                if tick - self.prev_acts[0] < self.faw:
+                    print(
+                        'tFAW timing violation for {}: {} < {}'.format(
+                            self.name(opcode), tick - self.prev_acts[0], self.faw))
+                    return False
+            self.prev_acts.append(tick)
+
+        command = self._Command(opcode, bank_group, bank)
+        next_tick = self.next_tick.reshape(-1)
+        blocked = self.blocked.reshape(-1)
+        np.maximum(next_tick, tick + self.delta[command], out=next_tick)
+        np.logical_and(blocked, self.keep[command], out=blocked)
+        np.logical_or(blocked, self.block[command], out=blocked)
+        return True
+
+    def ExecuteArrays(self, ticks, opcodes, bank_groups, banks) -> int:
+        """
+        Executes a sequence of commands given as arrays. Returns the number of commands
+        executed successfully, the state is left as after the last one of them.
+        """
+        ticks = np.asarray(ticks, dtype=np.int64)
+        n = len(ticks)
+        if n == 0:
+            return 0
+        _, nbanks, nopcodes = self.shape
+        opcodes = np.asarray(opcodes, dtype=np.int64)
+        bank_groups = np.asarray(bank_groups, dtype=np.int64)
+        banks = np.asarray(banks, dtype=np.int64)
+        commands = (opcodes * self.shape[0] + bank_groups) * nbanks + banks
+        cells = (bank_groups * nbanks + banks) * nopcodes + opcodes
+
+        # Constraints from the state before the first command.
+        limit = self.next_tick.reshape(-1)[cells]
+        # Constraints between the commands. Only commands closer than the largest parameter
+        # can constrain each other, ticks are increasing.
+        first = np.searchsorted(ticks, ticks - self.max_parameter, side='right')
+        window = int((np.arange(n) - first).max())
+        for k in range(1, window + 1):
+            j = slice(k, n)
+            i = slice(0, n - k)
+            np.maximum(
+                limit[j], ticks[i] + self.delta[commands[i], cells[j]], out=limit[j])
+        ok = ticks >= limit
+
+        # Blocked state is determined by the last command blocking/unblocking the cell.
+        blocked = self.blocked.reshape(-1)[cells]
+        indices = np.arange(n)
+        for cell in np.unique(cells):
+            sets = self.block[commands, cell]
+            clears = ~self.keep[commands, cell]
+            last = np.maximum.accumulate(np.where(sets | clears, indices, -1))
+            queried = cells[1:] == cell
+            previous = last[:-1][queried]
+            known = previous >= 0
+            state = blocked[1:][queried]
+            state[known] = sets[previous[known]]
+            blocked[1:][queried] = state
+        ok &= ~blocked
+
+        # Special-case handling for tFAW.
+        acts = opcodes == self.act
+        if np.any(acts):
+            act_ticks = np.concatenate(
+                [np.array(self.prev_acts, dtype=np.int64), ticks[acts]])
+            faw_ok = np.ones(len(act_ticks), dtype=bool)
+            faw_ok[4:] = act_ticks[4:] - act_ticks[:-4] >= self.faw
+            ok[acts] &= faw_ok[len(self.prev_acts):]
+
+        executed = n if ok.all() else int(np.argmin(ok))
+        self._Update(ticks[:executed], commands[:executed], acts[:executed])
+        if executed < n:
+            # Report the violation
+            assert not self.ExecuteCommand(
+                int(ticks[executed]), int(opcodes[executed]), int(bank_groups[executed]),
+                int(banks[executed]))
+        return executed
+
+    def _Update(self, ticks, commands, acts):
+        # Apply the effect of successfully executed commands to the state.
+        if len(ticks) == 0:
+            return
+        unique, inverse = np.unique(commands, return_inverse=True)
+        last_tick = np.full(len(unique), NO_CONSTRAINT, dtype=np.int64)
+        np.maximum.at(last_tick, inverse, ticks)
+        last_index = np.full(len(unique), -1, dtype=np.int64)
+        np.maximum.at(last_index, inverse, np.arange(len(ticks)))
+
+        next_tick = self.next_tick.reshape(-1)
+        np.maximum(next_tick, (last_tick[:, None] + self.delta[unique]).max(axis=0), out=next_tick)
+
+        sets = self.block[unique]
+        changes = sets | ~self.keep[unique]
+        order = np.where(changes, last_index[:, None], -1)
+        latest = order.argmax(axis=0)
+        changed = order.max(axis=0) >= 0
+        blocked = self.blocked.reshape(-1)
+        blocked[changed] = sets[latest, np.arange(len(blocked))][changed]
+
+        self.prev_acts.extend(int(t) for t in ticks[acts][-self.prev_acts.maxlen:])
+
+    def Snapshot(self, tick: int) -> tuple:
+        """Timing state relative to `tick`, equal snapshots imply identical future behaviour."""
+        # Constraints that are already satisfied are all equivalent, so clamp them at 0.
+        relative = np.maximum(self.next_tick - tick, 0)
+        prev_acts = tuple(min(tick - t, self.faw) for t in self.prev_acts)
+        return relative.tobytes(), self.blocked.tobytes(), prev_acts
+
+    def Advance(self, delta: int):
+        """Shifts the timing state by `delta` ticks."""
+        self.next_tick += delta
+        self.prev_acts = collections.deque(
+            (t + delta for t in self.prev_acts), maxlen=self.prev_acts.maxlen)
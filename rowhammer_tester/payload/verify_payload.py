@@ -4,6 +4,7 @@ import argparse
 from enum import Enum
 import sys
 import google.protobuf.text_format
+import numpy as np
 
 from rowhammer_tester.payload import ddr3lib
 from rowhammer_tester.payload import ddr4lib
@@ -32,11 +33,158 @@ class State:
         return string
 
 
+class Program:
+    """
+    Payload instructions decoded into arrays.
+
+    Runs of memory and no-op instructions between jumps are executed in batches.
+    """
+
+    # Shorter runs are executed instruction by instruction
+    MIN_BATCH = 16
+    # Maximum number of memory instructions in a batch of unrolled loop iterations
+    MAX_BATCH = 4096
+
+    def __init__(self, dramlib, payload):
+        instrs = payload.instr
+        n = len(instrs)
+        self.instrs = instrs
+        self.mem = np.array([instr.HasField('mem') for instr in instrs], dtype=bool)
+        self.opcodes, self.bank_groups, self.banks = (
+            np.array(a, dtype=np.int64) for a in dramlib.DecodeMany([i.mem for i in instrs]))
+        for ip, instr in enumerate(instrs):
+            if instr.HasField('nop'):
+                self.opcodes[ip] = instr.nop.opcode
+            elif instr.HasField('jmp'):
+                self.opcodes[ip] = instr.jmp.opcode
+        timeslices = [
+            instr.mem.timeslice if instr.HasField('mem') else
+            instr.nop.timeslice if instr.HasField('nop') else 1 for instr in instrs
+        ]
+        self.ticks = np.concatenate([[0], np.cumsum(timeslices, dtype=np.int64)])
+        self.counts = np.zeros((dramlib.Opcode.MAX, n + 1), dtype=np.int64)
+        for opcode in range(dramlib.Opcode.MAX):
+            self.counts[opcode, 1:] = np.cumsum(self.opcodes == opcode)
+        # End of the run of instructions starting at given ip (next jump or end of payload)
+        self.run_end = [n] * n
+        end = n
+        for ip in reversed(range(n)):
+            if instrs[ip].HasField('jmp'):
+                end = ip
+            self.run_end[ip] = end
+
+    def _Execute(self, rank, ips, ticks) -> bool:
+        # Executes memory instructions at given ips on given ticks
+        if len(ips) >= self.MIN_BATCH:
+            executed = rank.ExecuteArrays(
+                ticks, self.opcodes[ips], self.bank_groups[ips], self.banks[ips])
+        else:
+            executed = 0
+            for ip, tick in zip(ips.tolist(), ticks.tolist()):
+                if not rank.ExecuteCommand(
+                        tick, int(self.opcodes[ip]), int(self.bank_groups[ip]), int(self.banks[ip])):
+                    break
+                executed += 1
+        if executed < len(ips):
+            failed = int(ips[executed])
+            print(
+                'Failed to execute ({}) at ip ({}) on tick ({})'.format(
+                    ' '.join(str(self.instrs[failed]).split()), failed, ticks[executed]))
+            return False
+        return True
+
+    def _Count(self, state, start, end, times=1):
+        for opcode in range(len(state.executed)):
+            state.executed[opcode] += times * int(self.counts[opcode, end] - self.counts[opcode, start])
+
+    def ExecuteRun(self, state, rank) -> bool:
+        """Executes instructions from `state.ip` up to the next jump."""
+        ip, end = state.ip, self.run_end[state.ip]
+        mem = ip + np.flatnonzero(self.mem[ip:end])
+        if not self._Execute(rank, mem, state.tick + self.ticks[mem] - self.ticks[ip]):
+            return False
+        state.tick += int(self.ticks[end] - self.ticks[ip])
+        self._Count(state, ip, end)
+        state.ip = end
+        return True
+
+    def ExecuteIterations(self, state, rank, jmp_ip: int, iterations: int) -> bool:
+        """
+        Executes up to `iterations` iterations of the loop which starts at `state.ip` and
+        ends with the taken jump at `jmp_ip`, as a single batch. Loops with other jumps in
+        the body or not enough memory instructions are left for :meth:`ExecuteRun`.
+        """
+        start, jmp = state.ip, self.instrs[jmp_ip].jmp
+        mem = start + np.flatnonzero(self.mem[start:jmp_ip])
+        if self.run_end[start] != jmp_ip or len(mem) == 0:
+            return True
+        iterations = min(iterations, self.MAX_BATCH // len(mem))
+        if iterations * len(mem) < self.MIN_BATCH:
+            return True
+
+        # Each iteration takes the body and a single cycle for the jump
+        period = int(self.ticks[jmp_ip] - self.ticks[start]) + 1
+        offsets = period * np.arange(iterations, dtype=np.int64)
+        ticks = state.tick + offsets[:, None] + (self.ticks[mem] - self.ticks[start])[None, :]
+        if not self._Execute(rank, np.tile(mem, iterations), ticks.reshape(-1)):
+            return False
+        state.tick += iterations * period
+        self._Count(state, start, jmp_ip, iterations)
+        state.executed[jmp.opcode] += iterations
+        state.loop += iterations
+        return True
+
+
+class LoopFastForward:
+    """
+    Skips loop iterations once the loop has reached a steady state.
+
+    The timing state relative to the current tick is compared at the jump instruction on
+    two consecutive evaluations. If it is the same, all the remaining iterations behave
+    exactly like the ones in between, so their ticks and executed instructions can be
+    computed arithmetically.
+    """
+
+    def __init__(self):
+        self.prev = None  # (ip, loop, tick, executed, snapshot)
+        self.skipped = 0  # Total number of skipped iterations
+
+    def Reset(self):
+        self.prev = None
+
+    def Skip(self, state: State, rank, count: int) -> int:
+        """Called on a jump that will be taken, returns the number of skipped iterations."""
+        snapshot = rank.Snapshot(state.tick)
+        prev = self.prev
+        self.prev = (state.ip, state.loop, state.tick, list(state.executed), snapshot)
+        if prev is None or prev[0] != state.ip or prev[1] >= state.loop or prev[4] != snapshot:
+            return 0
+
+        # Iterations since the previous evaluation (more than one if executed in a batch)
+        # repeat until the jump instruction that exits the loop, move as close to it as possible.
+        stride = state.loop - prev[1]
+        repeats = (count - state.loop) // stride
+        iterations = repeats * stride
+        ticks = state.tick - prev[2]
+        state.tick += repeats * ticks
+        for opcode, before in enumerate(prev[3]):
+            state.executed[opcode] += repeats * (state.executed[opcode] - before)
+        state.loop += iterations
+        rank.Advance(repeats * ticks)
+        self.prev = None
+        self.skipped += iterations
+        return iterations
+
+
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('payload', type=argparse.FileType('r'))
     parser.add_argument(
         '--dram', type=str, choices=[d.name.lower() for d in DRAM], default=DRAM.DDR3.name.lower())
+    parser.add_argument(
+        '--no-fast-forward',
+        action='store_true',
+        help='Interpret every loop iteration instead of skipping them once in steady state')
     args = parser.parse_args()
     if args.dram == DRAM.DDR3.name.lower():
         dramlib = ddr3lib
@@ -66,31 +214,29 @@ def main() -> int:
     # Run through the payload.
     state = State(dramlib)
     rank = dramlib.Rank(payload.timing)
+    fast_forward = LoopFastForward()
+    program = Program(dramlib, payload)
     while state.ip < len(payload.instr):
         instr = payload.instr[state.ip]
-        if instr.HasField('mem'):
-            if not rank.Execute(state.tick, instr.mem):
-                print(
-                    'Failed to execute ({}) at ip ({}) on tick ({})'.format(
-                        ' '.join(str(instr).split()), state.ip, state.tick))
+        if instr.HasField('mem') or instr.HasField('nop'):
+            if not program.ExecuteRun(state, rank):
                 return -1
-            state.tick += instr.mem.timeslice
-            state.ip += 1
-            state.executed[instr.mem.opcode] += 1
-        elif instr.HasField('nop'):
-            state.tick += instr.nop.timeslice
-            state.ip += 1
-            state.executed[instr.nop.opcode] += 1
         elif instr.HasField('jmp'):
             state.tick += 1
+            if state.loop < instr.jmp.count and not args.no_fast_forward:
+                fast_forward.Skip(state, rank, instr.jmp.count)
             if state.loop < instr.jmp.count:
+                jmp_ip = state.ip
                 state.ip -= instr.jmp.offset
                 state.loop += 1
                 state.executed[instr.jmp.opcode] += 1
+                if not program.ExecuteIterations(state, rank, jmp_ip, instr.jmp.count - state.loop):
+                    return -1
                 continue
             state.ip += 1
             state.loop = 0
             state.executed[instr.jmp.opcode] += 1
+            fast_forward.Reset()
         else:
             print(
                 'Illegal instruction ({}) at ip ({}) on tick ({})'.format(
@@ -98,6 +244,8 @@ def main() -> int:
             return -1
 
     print(state)
+    if fast_forward.skipped:
+        print('Fast-forwarded loop iterations: {}'.format(fast_forward.skipped))
     print('OK')
     return 0
 
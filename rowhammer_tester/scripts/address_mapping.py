@@ -0,0 +1,163 @@
+"""
+Mappings between linear DRAM addresses and (bank, row, col).
+
+A mapping assigns to every bank, row and column bit either a single bit of the linear
+address, or the XOR of several address bits (as used e.g. for bank address hashing). Such
+a mapping is a linear transformation over GF(2), so it can be inverted. Both directions are
+compiled once into a short list of ``(shift, mask)`` terms, so that a conversion is just a
+few shifts, ANDs and XORs, which work the same on Python integers and on NumPy arrays.
+
+A mapping is given either by name, listing the fields from the most significant one (e.g.
+``'ROW_BANK_COL'``, ``'BANK_ROW_COL'``), or as a dictionary with the address bits of each
+field, least significant bit first, where an entry can be a list of bits to XOR::
+
+    {
+        "col":  [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
+        "bank": [[10, 13], [11, 14], [12, 15]],
+        "row":  [13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26],
+    }
+"""
+
+FIELDS = ('bank', 'row', 'col')
+
+
+def _compile(matrix):
+    # Turns a GF(2) matrix given as bit masks ({output bit: mask of input bits}) into
+    # (shift, mask) terms, so that output = XOR of ((input >> shift) & mask) over the terms
+    terms = {}
+    for out_bit, inputs in matrix.items():
+        in_bit = 0
+        while inputs:
+            if inputs & 1:
+                shift = in_bit - out_bit
+                terms[shift] = terms.get(shift, 0) | (1 << out_bit)
+            inputs >>= 1
+            in_bit += 1
+    return sorted(terms.items())
+
+
+def _apply(terms, value):
+    result = 0
+    for shift, mask in terms:
+        if shift >= 0:
+            result = result ^ ((value >> shift) & mask)
+        else:
+            result = result ^ ((value << -shift) & mask)
+    return result
+
+
+def _invert(matrix, nbits):
+    # Gauss-Jordan elimination over GF(2), rows are bit masks of the input bits
+    rows = [matrix[i] | (1 << (nbits + i)) for i in range(nbits)]
+    for col in range(nbits):
+        pivot = next((r for r in range(col, nbits) if rows[r] >> col & 1), None)
+        if pivot is None:
+            raise ValueError('Address mapping is not bijective')
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(nbits):
+            if r != col and rows[r] >> col & 1:
+                rows[r] ^= rows[col]
+    # Row i now holds the identity in its low bits and the inverse row in its high bits,
+    # inverse[i] tells which output bits build input bit i
+    return {i: rows[i] >> nbits for i in range(nbits)}
+
+
+class AddressMapping:
+    """
+    Bijective mapping between linear addresses and (bank, row, col).
+
+    ``bits`` maps each field name to the list of its address bits (see module description).
+    Values are converted to and from the ROW_BANK_COL packing
+    (``row << (bankbits + colbits) | bank << colbits | col``), the conversion to the
+    actual mapping is skipped if it is the identity.
+    """
+
+    def __init__(self, *, colbits, rowbits, bankbits, bits):
+        self.colbits = colbits
+        self.rowbits = rowbits
+        self.bankbits = bankbits
+        self.nbits = colbits + rowbits + bankbits
+        self.bits = {
+            field: [tuple(b) if isinstance(b, (list, tuple)) else (b, ) for b in bits[field]]
+            for field in FIELDS
+        }
+
+        # Bit offsets of the fields in the ROW_BANK_COL packing
+        offsets = dict(col=0, bank=colbits, row=colbits + bankbits)
+        widths = dict(col=colbits, bank=bankbits, row=rowbits)
+        decode = {}
+        for field in FIELDS:
+            if len(self.bits[field]) != widths[field]:
+                raise ValueError(
+                    'Address mapping has {} {} bits, expected {}'.format(
+                        len(self.bits[field]), field, widths[field]))
+            for i, address_bits in enumerate(self.bits[field]):
+                mask = 0
+                for b in address_bits:
+                    if not 0 <= b < self.nbits:
+                        raise ValueError('Address bit {} out of range'.format(b))
+                    mask ^= 1 << b
+                decode[offsets[field] + i] = mask
+
+        self.identity = all(decode[i] == 1 << i for i in range(self.nbits))
+        self._decode_terms = _compile(decode)
+        self._encode_terms = _compile(_invert(decode, self.nbits))
+
+    @classmethod
+    def from_name(cls, name, *, colbits, rowbits, bankbits):
+        """Mapping with contiguous fields ordered from the most significant one, e.g. 'ROW_BANK_COL'."""
+        fields = [field.lower() for field in name.split('_')]
+        if sorted(fields) != sorted(FIELDS):
+            raise ValueError('Unknown address mapping: {}'.format(name))
+        widths = dict(col=colbits, bank=bankbits, row=rowbits)
+        bits = {}
+        offset = 0
+        for field in reversed(fields):
+            bits[field] = list(range(offset, offset + widths[field]))
+            offset += widths[field]
+        return cls(colbits=colbits, rowbits=rowbits, bankbits=bankbits, bits=bits)
+
+    @classmethod
+    def from_settings(cls, address_mapping, *, colbits, rowbits, bankbits):
+        """Mapping from the ``address_mapping`` value of LiteDRAM settings: a name or a dict."""
+        geom = dict(colbits=colbits, rowbits=rowbits, bankbits=bankbits)
+        if isinstance(address_mapping, str):
+            return cls.from_name(address_mapping, **geom)
+        return cls(bits=address_mapping, **geom)
+
+    def encode(self, bank, row, col):
+        """Linear address of (bank, row, col), values must fit in their fields."""
+        packed = (row << (self.bankbits + self.colbits)) | (bank << self.colbits) | col
+        if self.identity:
+            return packed
+        return _apply(self._encode_terms, packed)
+
+    def decode(self, address):
+        """Returns (bank, row, col), address bits above the mapped ones are ignored."""
+        if self.identity:
+            packed = address
+        else:
+            packed = _apply(self._decode_terms, address)
+        row = (packed >> (self.bankbits + self.colbits)) & (2**self.rowbits - 1)
+        bank = (packed >> self.colbits) & (2**self.bankbits - 1)
+        col = packed & (2**self.colbits - 1)
+        return bank, row, col
+
+    @property
+    def contiguous_rows(self):
+        """Whether the columns of a row take a contiguous range of addresses."""
+        return all(bits == (i, ) for i, bits in enumerate(self.bits['col']))
+
+    def row_address(self, rowbits, offset=0):
+        """
+        Address bits of the ``rowbits`` least significant row bits, as seen in addresses
+        shifted right by ``offset`` (e.g. the DRAM port address_align). Returns the shift of
+        the row bits if they are contiguous, else a tuple of bits to XOR for each row bit.
+        """
+        row = [tuple(b - offset for b in bits) for bits in self.bits['row'][:rowbits]]
+        if any(b < 0 for bits in row for b in bits):
+            raise ValueError('Row bits are not visible in addresses shifted by {}'.format(offset))
+        shift = row[0][0]
+        if all(bits == (shift + i, ) for i, bits in enumerate(row)):
+            return shift
+        return tuple(row)
@@ -6,7 +6,12 @@ import cProfile
 
 import argparse
 
-from rowhammer_tester.scripts.utils import memread, memwrite, hw_memset, hw_memtest, RemoteClient, read_ident
+import numpy as np
+
+from rowhammer_tester.scripts.utils import (
+    memread, memwrite, hw_memset, hw_memtest, RemoteClient, read_ident, DRAMAddressConverter)
+from rowhammer_tester.scripts.flip_stats import (
+    flips_per_beat, flips_per_chip, histogram, masks_to_bits)
 
 
 def human_size(num):
@@ -75,6 +80,104 @@ def run_bist(wb, is_write, pattern):
     measure(runner, n)
 
 
+def run_converter(n, seed=42):
+    # Does not need the board, only the generated settings
+    converter = DRAMAddressConverter.load()
+    rng = np.random.default_rng(seed)
+    bank = rng.integers(2**converter.bankbits, size=n)
+    row = rng.integers(2**converter.rowbits, size=n)
+    col = rng.integers(2**converter.colbits, size=n)
+    fields = list(zip(bank.tolist(), row.tolist(), col.tolist()))
+
+    def timed(fun):
+        start = time.time()
+        result = fun()
+        return result, time.time() - start
+
+    print('Converting {} addresses'.format(n))
+    for name, scalar, batch in [
+        ('encode_bus',
+         lambda: [converter.encode_bus(bank=b, row=r, col=c) for b, r, c in fields],
+         lambda: converter.encode_bus_many(bank=bank, row=row, col=col)),
+        ('encode_dma',
+         lambda: [converter.encode_dma(bank=b, row=r, col=c) for b, r, c in fields],
+         lambda: converter.encode_dma_many(bank=bank, row=row, col=col)),
+    ]:
+        expected, t_scalar = timed(scalar)
+        result, t_batch = timed(batch)
+        assert result.tolist() == expected, name
+        print('{:12} scalar = {:.3f} sec, batch = {:.4f} sec ({:.0f}x)'.format(
+            name, t_scalar, t_batch, t_scalar / t_batch))
+
+    for name, addresses, scalar, batch in [
+        ('decode_bus', converter.encode_bus_many(bank=bank, row=row, col=col),
+         converter.decode_bus, converter.decode_bus_many),
+        ('decode_dma', converter.encode_dma_many(bank=bank, row=row, col=col),
+         converter.decode_dma, converter.decode_dma_many),
+    ]:
+        address_list = addresses.tolist()
+        expected, t_scalar = timed(lambda: [scalar(a) for a in address_list])
+        result, t_batch = timed(lambda: batch(addresses))
+        assert list(zip(*(r.tolist() for r in result))) == expected, name
+        print('{:12} scalar = {:.3f} sec, batch = {:.4f} sec ({:.0f}x)'.format(
+            name, t_scalar, t_batch, t_scalar / t_batch))
+
+
+def string_flip_stats(masks, nr_chips):
+    # Per-beat and per-chip histograms computed on strings, as they used to be
+    dq_bits = 64 // nr_chips
+    beat_errors, chip_errors_per_read = {}, {}
+    for mask in masks:
+        flips_bin = format(mask, "512b")[::-1]
+        for beat in range(8):
+            count = flips_bin[beat * 64:(beat + 1) * 64].count('1')
+            if count:
+                beat_errors[count] = beat_errors.get(count, 0) + 1
+        for chip in range(nr_chips):
+            count = sum(
+                flips_bin[beat * 64 + chip * dq_bits:beat * 64 + (chip + 1) * dq_bits].count('1')
+                for beat in range(8))
+            if count:
+                chip_hist = chip_errors_per_read.setdefault(chip, {})
+                chip_hist[count] = chip_hist.get(count, 0) + 1
+    return beat_errors, chip_errors_per_read
+
+
+def run_flip_stats(n, nr_chips=8, seed=42):
+    # Error words with a few bitflips each, as read from a hammered row
+    rng = np.random.default_rng(seed)
+    nflips = rng.integers(1, 8, size=n)
+    positions = rng.integers(512, size=nflips.sum()).tolist()
+    masks = []
+    start = 0
+    for count in nflips.tolist():
+        mask = 0
+        for bit in positions[start:start + count]:
+            mask |= 1 << bit
+        masks.append(mask)
+        start += count
+
+    def vectorized():
+        bits = masks_to_bits(masks)
+        chips = flips_per_chip(bits, nr_chips)
+        return histogram(flips_per_beat(bits)), {
+            chip: histogram(chips[:, chip])
+            for chip in range(nr_chips)
+            if chips[:, chip].any()
+        }
+
+    print('Computing beat/chip histograms of {} error words'.format(n))
+    start = time.time()
+    expected = string_flip_stats(masks, nr_chips)
+    t_strings = time.time() - start
+    start = time.time()
+    result = vectorized()
+    t_vectorized = time.time() - start
+    assert result == expected
+    print('strings = {:.3f} sec, vectorized = {:.3f} sec ({:.0f}x)'.format(
+        t_strings, t_vectorized, t_strings / t_vectorized))
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Benchmark EtherBone/BIST DRAM access performance')
     subparsers = parser.add_subparsers(help='Benchmark type subcommands', dest='subcommand')
@@ -86,8 +189,24 @@ if __name__ == "__main__":
     bist = subparsers.add_parser('bist', help='Measure BIST transfer performance')
     bist.add_argument('rw', choices=['read', 'write'], help='Transfer type')
     bist.add_argument('--pattern', default='0x55555555', help='Data pattern used in BIST transfers')
+    converter = subparsers.add_parser(
+        'converter', help='Compare scalar and batch DRAMAddressConverter methods (offline)')
+    converter.add_argument(
+        '-n', type=int, default=10**6, help='Number of addresses (default: 10^6)')
+    flip_stats = subparsers.add_parser(
+        'flip-stats', help='Compare string and vectorized bitflip statistics (offline)')
+    flip_stats.add_argument(
+        '-n', type=int, default=10**6, help='Number of error words (default: 10^6)')
+    flip_stats.add_argument('--nr-chips', type=int, default=8, help='Chips per 64-bit beat')
     args = parser.parse_args()
 
+    if args.subcommand == 'converter':
+        run_converter(args.n)
+        parser.exit()
+    if args.subcommand == 'flip-stats':
+        run_flip_stats(args.n, args.nr_chips)
+        parser.exit()
+
     wb = RemoteClient()
     wb.open()
     print("Board info:", read_ident(wb))
@@ -0,0 +1,225 @@
+"""
+In-process API for tools running long series of Rowhammer/retention tests.
+
+Launching ``hw_rowhammer.py`` for every test pays for interpreter startup, generated files
+discovery, connecting to the server and board identification each time. :class:`Campaign`
+keeps a single connection and a single :class:`HwRowHammer` instance (so also the payload
+memory mirror) for all the tests and returns structured results instead of console output.
+
+Example::
+
+    with Campaign.connect(bank=0) as campaign:
+        result = campaign.hammer((180, 180), read_count=20000)
+        if result.has_bitflips:
+            print(result.rows, result.bitflips)
+
+With a :class:`Checkpoint` every test is recorded as soon as it finishes. A campaign started
+again with the same checkpoint file gets the recorded results for the tests completed before
+the interruption instead of running them again.
+"""
+
+import io
+import os
+import json
+import time
+import contextlib
+from collections import namedtuple, Counter
+
+from rowhammer_tester.scripts.utils import (
+    RemoteClient, litex_server, read_ident, get_litedram_settings, progress_reporter)
+from rowhammer_tester.scripts.rowhammer import PATTERNS, ensure_dram_initialized
+from rowhammer_tester.scripts.hw_rowhammer import HwRowHammer
+from rowhammer_tester.scripts.results import Checkpoint
+
+
+class CampaignError(Exception):
+    pass
+
+
+class TestResult(namedtuple('TestResult', ['errors_in_rows', 'duration'])):
+    """
+    Result of a single test.
+
+    ``errors_in_rows`` has the format of :meth:`RowHammer.display_errors` summary:
+    ``{row: {'bank': ..., 'row': ..., 'col': {col: [bits]}, 'bitflips': ...}}``, with rows
+    as strings and columns as integers.
+    ``duration`` is the wall time of the test in seconds.
+    """
+
+    @property
+    def bitflips(self):
+        return sum(e['bitflips'] for e in self.errors_in_rows.values())
+
+    @property
+    def has_bitflips(self):
+        return self.bitflips > 0
+
+    @property
+    def rows(self):
+        return sorted(int(errors['row']) for errors in self.errors_in_rows.values())
+
+
+class Campaign:
+    """
+    Series of tests executed over a single connection.
+
+    Keyword arguments are forwarded to the :class:`HwRowHammer` constructor. Output of the
+    tests is hidden unless ``verbose=True``. With ``checkpoint`` (:class:`Checkpoint`) the
+    results of the tests are recorded and the tests recorded before are not repeated.
+    """
+
+    def __init__(
+            self,
+            wb,
+            *,
+            settings=None,
+            bank=0,
+            column=512,
+            nrows=0,
+            rows_start=0,
+            no_refresh=True,
+            payload_executor=True,
+            data_inversion=False,
+            verify_initial=True,
+            verbose=False,
+            checkpoint=None,
+            row_hammer_cls=HwRowHammer):
+        self.wb = wb
+        self.verify_initial = verify_initial
+        self.verbose = verbose
+        self.checkpoint = checkpoint
+        # Output of the tests is hidden anyway, do not even format progress lines; the
+        # reporter is shared by the whole process, so the setting is restored on close()
+        self._progress_enabled = progress_reporter.enabled
+        progress_reporter.enabled = verbose
+        # Identical tests are told apart by their number of occurrence, so that tests
+        # repeated on purpose are not all replaced by a single recorded result
+        self.occurrences = Counter()
+        self.row_hammer = row_hammer_cls(
+            wb,
+            settings=settings or get_litedram_settings(),
+            nrows=nrows,
+            column=column,
+            bank=bank,
+            rows_start=rows_start,
+            no_refresh=no_refresh,
+            payload_executor=payload_executor,
+            data_inversion=data_inversion)
+
+    @classmethod
+    def connect(cls, srv=False, checkpoint_path=None, **kwargs):
+        """
+        Opens the connection to the board and makes sure that DRAM is initialized (only if it
+        has not been initialized yet, e.g. by the interrupted run being resumed). With
+        ``checkpoint_path`` tests are recorded in and resumed from that JSONL file.
+        """
+        if checkpoint_path is not None:
+            kwargs['checkpoint'] = Checkpoint(checkpoint_path)
+        if srv:
+            litex_server()
+        wb = RemoteClient()
+        wb.open()
+        print("Board info:", read_ident(wb))
+        ensure_dram_initialized(wb)
+        return cls(wb, **kwargs)
+
+    def close(self):
+        progress_reporter.enabled = self._progress_enabled
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        self.wb.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _test_key(self, row_pairs, pattern, kwargs):
+        test = json.dumps(
+            [row_pairs, pattern, self.row_hammer.no_attack_time, kwargs], separators=(',', ':'))
+        self.occurrences[test] += 1
+        return '{}#{}'.format(test, self.occurrences[test])
+
+    def _run(self, row_pairs, pattern, read_count, **kwargs):
+        key = None
+        if self.checkpoint is not None:
+            key = self._test_key(row_pairs, pattern, kwargs)
+            entry = self.checkpoint.get(read_count, key)
+            if entry is not None:
+                return TestResult(
+                    errors_in_rows=_normalize_errors(entry['errors_in_rows']),
+                    duration=entry['duration'])
+
+        out = contextlib.nullcontext() if self.verbose else \
+            contextlib.redirect_stdout(io.StringIO())
+        start = time.time()
+        with out:
+            errors_in_rows = self.row_hammer.run(
+                row_pairs=row_pairs,
+                pattern_generator=PATTERNS[pattern],
+                read_count=read_count,
+                verify_initial=self.verify_initial,
+                **kwargs)
+        if errors_in_rows is None:
+            raise CampaignError('Errors found in memory before the test')
+        result = TestResult(
+            errors_in_rows=_normalize_errors(errors_in_rows), duration=time.time() - start)
+        if key is not None:
+            self.checkpoint.add(read_count, key, result._asdict())
+        return result
+
+    def hammer(self, row_tuple, read_count, pattern='all_1'):
+        """
+        Fills memory with ``pattern``, hammers rows from ``row_tuple`` and checks for
+        bitflips.
+        """
+        if not self.row_hammer.payload_executor and len(row_tuple) & (len(row_tuple) - 1):
+            # HwRowHammer.run would also return None, as if memory was corrupted
+            raise CampaignError('BIST only supports power of 2 rows')
+        self.row_hammer.no_attack_time = None
+        return self._run([tuple(row_tuple)], pattern, read_count)
+
+    def hammer_many(self, hammers, pattern='all_1'):
+        """
+        Hammers each row tuple of ``hammers`` (list of ``(row_tuple, read_count)``) using
+        a single payload, between a single fill and verification. Requires ``no_refresh``.
+        """
+        self.row_hammer.no_attack_time = None
+        row_pairs = [tuple(row_tuple) for row_tuple, _ in hammers]
+        read_counts = [int(read_count) for _, read_count in hammers]
+        return self._run(row_pairs, pattern, max(read_counts), read_counts=read_counts)
+
+    def retention(self, wait_time, pattern='all_1'):
+        """Fills memory with ``pattern``, waits ``wait_time`` seconds and checks for bitflips."""
+        self.row_hammer.no_attack_time = wait_time * 1e9
+        try:
+            return self._run([], pattern, read_count=0)
+        finally:
+            self.row_hammer.no_attack_time = None
+
+
+def add_checkpoint_arguments(parser):
+    parser.add_argument('--checkpoint', help='Record results of the tests in this JSONL file')
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue an interrupted campaign from its --checkpoint file')
+
+
+def checkpoint_path(parser, args):
+    """Validates arguments from :func:`add_checkpoint_arguments`, returns the path or None."""
+    if args.resume and not args.checkpoint:
+        parser.error('--resume requires --checkpoint')
+    if args.checkpoint and os.path.exists(args.checkpoint) and not args.resume:
+        parser.error('{} already exists, use --resume to continue it'.format(args.checkpoint))
+    return args.checkpoint
+
+
+def _normalize_errors(errors_in_rows):
+    # Row keys as strings and column keys as integers, as in display_errors summaries, both
+    # for results of tests and results restored from JSON, which turns all keys into strings
+    return {
+        str(row): dict(errors, col={int(col): bits for col, bits in errors['col'].items()})
+        for row, errors in errors_in_rows.items()
+    }
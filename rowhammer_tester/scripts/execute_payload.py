@@ -3,38 +3,39 @@
 import os
 import sys
 import time
+import argparse
 import itertools
 
-from rowhammer_tester.gateware.payload_executor import Encoder, OpCode, Decoder
-from rowhammer_tester.scripts.utils import memdump, memread, memwrite, DRAMAddressConverter, RemoteClient, read_ident
+from rowhammer_tester.payload.asm import assemble, disassemble, load_payload, PayloadCache
+from rowhammer_tester.scripts.utils import (
+    memdump, memread, memwrite, DRAMAddressConverter, RemoteClient, read_ident,
+    get_litedram_settings)
 
 # Sample program
-encoder = Encoder(bankbits=3)
-PAYLOAD = [
-    encoder(OpCode.NOOP, timeslice=50),
-    encoder(OpCode.ACT, timeslice=20, address=encoder.address(bank=1, row=100)),
-    encoder(OpCode.READ, timeslice=20, address=encoder.address(bank=1, col=13)),
-    encoder(OpCode.READ, timeslice=30, address=encoder.address(bank=1, col=20)),
-    encoder(OpCode.PRE, timeslice=20, address=encoder.address(bank=1)),
-    encoder(OpCode.ACT, timeslice=20, address=encoder.address(bank=0, row=100)),
-    encoder(OpCode.READ, timeslice=30, address=encoder.address(bank=0, col=200)),
-    encoder(OpCode.LOOP, count=8 - 1, jump=1),  # to READ col=200
-    encoder(OpCode.READ, timeslice=30, address=encoder.address(bank=0, col=208)),
-    encoder(OpCode.READ, timeslice=30, address=encoder.address(bank=0, col=216)),
-    encoder(OpCode.READ, timeslice=30, address=encoder.address(bank=0, col=224)),
-    encoder(OpCode.READ, timeslice=30, address=encoder.address(bank=0, col=232)),
-    encoder(OpCode.READ, timeslice=30, address=encoder.address(bank=0, col=240)),
-    encoder(OpCode.READ, timeslice=30, address=encoder.address(bank=0, col=248)),
-    encoder(OpCode.READ, timeslice=30, address=encoder.address(bank=0, col=256)),
-    encoder(OpCode.READ, timeslice=30, address=encoder.address(bank=0, col=264)),
-    encoder(OpCode.READ, timeslice=30,
-            address=encoder.address(bank=0, col=300 | (1 << 10))),  # auto precharge
-    encoder(OpCode.ACT, timeslice=60, address=encoder.address(bank=2, row=150)),
-    encoder(OpCode.PRE, timeslice=20, address=encoder.address(col=1 << 10)),  # all
-    encoder(OpCode.REF, timeslice=200),
-    encoder(OpCode.REF, timeslice=200),
-    encoder(OpCode.NOOP, timeslice=50),
-]
+PAYLOAD = """
+        NOOP  50
+        ACT   20  bank=1 row=100
+        READ  20  bank=1 col=13
+        READ  30  bank=1 col=20
+        PRE   20  bank=1
+        ACT   20  bank=0 row=100
+read:   READ  30  bank=0 col=200
+        LOOP  7   read                      # 8 reads of col=200
+        READ  30  bank=0 col=208
+        READ  30  bank=0 col=216
+        READ  30  bank=0 col=224
+        READ  30  bank=0 col=232
+        READ  30  bank=0 col=240
+        READ  30  bank=0 col=248
+        READ  30  bank=0 col=256
+        READ  30  bank=0 col=264
+        READ  30  bank=0 col=0x52c          # col=300 with auto precharge
+        ACT   60  bank=2 row=150
+        PRE   20  col=0x400                 # all
+        REF   60
+        REF   60
+        NOOP  50
+"""
 
 
 def byte_gen():
@@ -57,10 +58,10 @@ def word_gen(offset):
             next(gen)
 
 
-def execute(wb):
+def execute(wb, payload):
     depth = wb.mems.payload.size // 4  # bytes to 32-bit instructions
 
-    program = [w for w in PAYLOAD]
+    program = [int(w) for w in payload]
     program += [0] * (wb.mems.payload.size // 4 - len(program))  # fill with NOOPs
 
     # Write some data to the column we are reading to check that scratchpad gets filled
@@ -89,10 +90,26 @@ def execute(wb):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'payload', nargs='?', help='Payload assembly source or binary (.bin), defaults to a sample')
+    parser.add_argument('--no-cache', action='store_true', help='Do not use assembled payload cache')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print payload disassembly')
+    args = parser.parse_args()
+
+    bankbits = get_litedram_settings().geom.bankbits
+    if args.payload is None:
+        payload = assemble(PAYLOAD, bankbits=bankbits)
+    else:
+        cache = None if args.no_cache else PayloadCache()
+        payload = load_payload(args.payload, bankbits=bankbits, cache=cache)
+    if args.verbose:
+        print(disassemble(payload, bankbits=bankbits))
+
     wb = RemoteClient()
     wb.open()
     print("Board info:", read_ident(wb))
 
-    execute(wb)
+    execute(wb, payload)
 
     wb.close()
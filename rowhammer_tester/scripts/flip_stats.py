@@ -0,0 +1,76 @@
+"""
+Bitflip statistics per DQ, beat, chip and burst.
+
+Error words (XOR masks of the read and the expected data) are unpacked with
+``np.unpackbits`` into a ``(words, bits)`` array, bit ``i`` of a word in column ``i``.
+A word is a burst of beats of ``beat_bits`` bits (8 beats of 64 bits for a 512-bit word),
+bit ``i`` of a beat comes from DQ pad ``i``, and with ``nr_chips`` chips each one drives
+``beat_bits // nr_chips`` consecutive DQs. Counts are then just reshapes and sums of the
+bit array. Bitflips given as bit indices, as in the result files, are counted per DQ with
+:func:`dq_histogram` and :func:`dqs_with_flips`.
+"""
+
+import numpy as np
+
+
+def masks_to_bits(masks, width=512):
+    """Unpacks XOR masks (Python integers) of ``width`` bits, returns a uint8 bit array."""
+    nbytes = width // 8
+    data = b''.join(mask.to_bytes(nbytes, 'little') for mask in masks)
+    words = np.frombuffer(data, dtype=np.uint8).reshape(-1, nbytes)
+    return np.unpackbits(words, axis=1, bitorder='little')
+
+
+def _sum_last(array):
+    # Sums the last, short axis with one vectorized addition per element, which is much
+    # faster than a reduction along a short axis. Counts of bits fit in 16 bits.
+    total = array[..., 0].astype(np.uint16)
+    for i in range(1, array.shape[-1]):
+        total += array[..., i]
+    return total
+
+
+def flips_per_burst(bits):
+    """Number of bitflips of each word, shape ``(words, )``."""
+    return bits.sum(axis=1, dtype=np.int64)
+
+
+def flips_per_beat(bits, beat_bits=64):
+    """Number of bitflips of each beat, shape ``(words, beats)``."""
+    # Bytes first, then beats
+    nbeats = bits.shape[1] // beat_bits
+    return _sum_last(_sum_last(bits.reshape(len(bits), nbeats, beat_bits // 8, 8)))
+
+
+def flips_per_chip(bits, nr_chips, beat_bits=64, per_beat=False):
+    """
+    Number of bitflips of each chip, shape ``(words, chips)``, or ``(words, beats, chips)``
+    with ``per_beat=True``.
+    """
+    nbeats = bits.shape[1] // beat_bits
+    counts = _sum_last(bits.reshape(len(bits), nbeats, nr_chips, beat_bits // nr_chips))
+    return counts if per_beat else _sum_last(np.moveaxis(counts, 1, 2))
+
+
+def flips_per_dq(bits, dq_pads=64):
+    """Total number of bitflips on each DQ pad, shape ``(dq_pads, )``."""
+    return bits.reshape(bits.size // dq_pads, dq_pads).sum(axis=0, dtype=np.int64)
+
+
+def dq_histogram(bit_indices, dq_pads=64):
+    """Number of bitflips on each DQ pad, from indices of flipped bits in words."""
+    bit_indices = np.asarray(bit_indices, dtype=np.int64)
+    return np.bincount(bit_indices % dq_pads, minlength=dq_pads)
+
+
+def dqs_with_flips(bit_indices, dq_pads=64):
+    """DQ pads with bitflips in order of their first bitflip, from indices of flipped bits."""
+    dqs = np.asarray(bit_indices, dtype=np.int64) % dq_pads
+    return list(dict.fromkeys(dqs.tolist()))
+
+
+def histogram(counts):
+    """``{count: occurrences}`` of the non-zero counts."""
+    counts = np.asarray(counts)
+    values, occurrences = np.unique(counts[counts > 0], return_counts=True)
+    return dict(zip(values.tolist(), occurrences.tolist()))
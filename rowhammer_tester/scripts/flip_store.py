@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Columnar storage of bitflips.
+
+Result files keep bitflips nested under string keys (``pair_10_12`` -> ``errors_in_rows`` ->
+row -> col -> bits), so every analysis has to parse and walk the whole structure again.
+A :class:`FlipStore` keeps one flat array per field instead, with one element per bitflip:
+
+    campaign_id, attack_id, read_count, bank, row, col, bit
+
+and an attack table, indexed by ``attack_id``, with the key of the attack, its campaign,
+read count, hammered rows, HCfirst (of ``hcfirst.py`` results), the attack time and repeat
+index of retention tests, and the range of its bitflips. Fields that do not apply to an
+attack are -1 (NaN for the attack time). Bitflips are ordered by attack, so the bitflips of
+an attack are a slice of the columns (:meth:`FlipStore.attack_flips`), which is a view also
+of a memory-mapped store.
+
+A store is saved either as a compressed ``.npz`` file or, for any other path, as a directory
+of ``.npy`` files that :meth:`FlipStore.load` memory-maps, so that only the accessed parts
+are read from the disk.
+
+:func:`import_file` imports ``error_summary_*.json``/``a-hammer_*`` files, JSONL results
+(:mod:`results`), ``hcfirst.py`` results and retention test files, streaming JSON documents with
+:func:`~rowhammer_tester.scripts.transform_results.iter_items`. This script converts result
+files to a store, or prints the contents of a store.
+"""
+
+import os
+import re
+import argparse
+from array import array
+
+import numpy as np
+
+from rowhammer_tester.scripts.results import read_records
+from rowhammer_tester.scripts.transform_results import iter_items
+
+FLIP_COLUMNS = {
+    'campaign_id': np.uint16,
+    'attack_id': np.uint32,
+    'read_count': np.int64,
+    'bank': np.uint8,
+    'row': np.uint32,
+    'col': np.uint32,
+    'bit': np.uint16,
+}
+ATTACK_COLUMNS = {
+    'campaign_id': np.uint16,
+    'read_count': np.int64,
+    'hammer_row_1': np.int64,
+    'hammer_row_2': np.int64,
+    'hcfirst': np.int64,
+    'attack_time': np.float64,
+    'repeat': np.int32,
+}
+
+# Typecodes of the arrays collecting the columns, matching the dtypes above
+_TYPECODES = {
+    np.uint8: 'B',
+    np.uint16: 'H',
+    np.int32: 'i',
+    np.uint32: 'I',
+    np.int64: 'q',
+    np.float64: 'd',
+}
+
+
+def _columns(dtypes):
+    return {name: array(_TYPECODES[dtype]) for name, dtype in dtypes.items()}
+
+
+def _to_numpy(columns, dtypes):
+    return {name: np.frombuffer(columns[name], dtype=dtype) for name, dtype in dtypes.items()}
+
+
+class FlipStore:
+    """
+    Bitflips as flat NumPy arrays.
+
+    ``flips`` and ``attacks`` map column names (:data:`FLIP_COLUMNS`,
+    :data:`ATTACK_COLUMNS`) to arrays. ``attacks`` additionally holds ``key`` (attack keys)
+    and ``offsets``, of one more element than there are attacks: the bitflips of attack
+    ``i`` are ``offsets[i]:offsets[i + 1]``. ``campaigns`` holds the names of the campaigns,
+    indexed by ``campaign_id``.
+    """
+
+    def __init__(self, flips, attacks, campaigns):
+        self.flips = flips
+        self.attacks = attacks
+        self.campaigns = campaigns
+
+    def __len__(self):
+        return len(self.flips['bit'])
+
+    def __getitem__(self, column):
+        return self.flips[column]
+
+    @property
+    def nattacks(self):
+        return len(self.attacks['key'])
+
+    def attack_flips(self, attack_id):
+        """Bitflips of a single attack, as views of the columns."""
+        start, end = self.attacks['offsets'][attack_id:attack_id + 2]
+        return {name: column[start:end] for name, column in self.flips.items()}
+
+    def errors_in_rows(self, attack_id):
+        """Bitflips of an attack in the ``errors_in_rows`` layout of result files."""
+        flips = self.attack_flips(attack_id)
+        errors = {}
+        for bank, row, col, bit in zip(*(flips[name].tolist()
+                                         for name in ['bank', 'row', 'col', 'bit'])):
+            key = str(row)
+            if key in errors and errors[key]['bank'] != bank:
+                key = '{}_bank{}'.format(row, bank)
+            if key not in errors:
+                errors[key] = {'bank': bank, 'row': row, 'col': {}, 'bitflips': 0}
+            errors[key]['col'].setdefault(str(col), []).append(bit)
+            errors[key]['bitflips'] += 1
+        return errors
+
+    def flips_per_attack(self):
+        return np.diff(self.attacks['offsets'])
+
+    def select(self, **values):
+        """
+        Bitflips with the given column values, e.g. ``select(bank=0, row=[10, 11])``
+        (a list selects any of its values). Returns a dict of column arrays.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in values.items():
+            if np.ndim(value):
+                mask &= np.isin(self.flips[name], value)
+            else:
+                mask &= self.flips[name] == value
+        return {name: column[mask] for name, column in self.flips.items()}
+
+    def save(self, path):
+        """Saves to a compressed ``.npz`` file, or to a directory of ``.npy`` files."""
+        arrays = dict(self.flips)
+        arrays.update({'attack_' + name: column for name, column in self.attacks.items()})
+        arrays['campaigns'] = self.campaigns
+        if path.endswith('.npz'):
+            np.savez_compressed(path, **arrays)
+            return
+        os.makedirs(path, exist_ok=True)
+        for name, column in arrays.items():
+            np.save(os.path.join(path, name + '.npy'), column)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Loads a store saved by :meth:`save`, ``.npy`` directories are memory-mapped."""
+        if os.path.isdir(path):
+            names = [name[:-4] for name in os.listdir(path) if name.endswith('.npy')]
+            mmap_mode = 'r' if mmap else None
+            arrays = {
+                name: np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+                for name in names
+            }
+        else:
+            with np.load(path) as npz:
+                arrays = dict(npz)
+        flips = {name: arrays[name] for name in FLIP_COLUMNS}
+        attacks = {
+            name: arrays['attack_' + name]
+            for name in list(ATTACK_COLUMNS) + ['key', 'offsets']
+        }
+        return cls(flips, attacks, arrays['campaigns'])
+
+
+class FlipStoreBuilder:
+    """Collects campaigns, attacks and their bitflips, then builds a :class:`FlipStore`."""
+
+    def __init__(self):
+        self.flips = _columns(FLIP_COLUMNS)
+        self.attacks = _columns(ATTACK_COLUMNS)
+        self.offsets = array('q', [0])
+        self.keys = []
+        self.campaigns = []
+
+    def add_campaign(self, name):
+        """Returns the id of a new campaign."""
+        self.campaigns.append(name)
+        return len(self.campaigns) - 1
+
+    def add_attack(
+            self,
+            campaign_id,
+            key,
+            errors,
+            *,
+            read_count=-1,
+            hammer_rows=(-1, -1),
+            hcfirst=-1,
+            attack_time=float('nan'),
+            repeat=-1,
+            default_bank=0):
+        """
+        Adds an attack with its ``errors_in_rows`` dict (``{row_key: {'bank': ...,
+        'row': ..., 'col': {col: bits}}}``), returns its id. Bits of a column are stored
+        either as a list or under ``bitflip_positions``.
+        """
+        rows, cols, bits = array('I'), array('I'), array('H')
+        banks = array('B')
+        for row_key, row_data in (errors or {}).items():
+            if not isinstance(row_data, dict) or 'col' not in row_data:
+                continue  # e.g. just a count of bitflips
+            row, bank = row_data.get('row'), row_data.get('bank')
+            if row is None or bank is None:
+                # Keys of rows split by bank are "{row}_bank{bank}"
+                match = re.fullmatch(r'(\d+)(?:_bank(\d+))?', row_key)
+                if row is None:
+                    if match is None:
+                        raise ValueError('Row of errors under {!r} is unknown'.format(row_key))
+                    row = int(match.group(1))
+                if bank is None:
+                    bank = int(match.group(2)) if match and match.group(2) else default_bank
+            for col, col_data in row_data['col'].items():
+                if isinstance(col_data, dict):
+                    col_data = col_data.get('bitflip_positions', [])
+                bits.extend(col_data)
+                cols.extend([int(col)] * len(col_data))
+            count = len(bits) - len(rows)
+            rows.extend([row] * count)
+            banks.extend([bank] * count)
+
+        # Errors are parsed first, so that an invalid entry leaves the store unchanged
+        attack_id = len(self.keys)
+        self.keys.append(key)
+        for name, value in [('campaign_id', campaign_id), ('read_count', read_count),
+                            ('hammer_row_1', hammer_rows[0]), ('hammer_row_2', hammer_rows[1]),
+                            ('hcfirst', hcfirst), ('attack_time', attack_time),
+                            ('repeat', repeat)]:
+            self.attacks[name].append(value)
+
+        count = len(bits)
+        self.flips['campaign_id'].extend([campaign_id] * count)
+        self.flips['attack_id'].extend([attack_id] * count)
+        self.flips['read_count'].extend([read_count] * count)
+        self.flips['bank'].extend(banks)
+        self.flips['row'].extend(rows)
+        self.flips['col'].extend(cols)
+        self.flips['bit'].extend(bits)
+        self.offsets.append(self.offsets[-1] + count)
+        return attack_id
+
+    def build(self):
+        attacks = _to_numpy(self.attacks, ATTACK_COLUMNS)
+        attacks['key'] = np.array(self.keys, dtype=str)
+        attacks['offsets'] = np.frombuffer(self.offsets, dtype=np.int64)
+        return FlipStore(
+            _to_numpy(self.flips, FLIP_COLUMNS), attacks, np.array(self.campaigns, dtype=str))
+
+
+# ######################### Importers #############################
+
+
+def _add_entry(builder, campaign_id, read_count, key, entry, default_bank):
+    # Attacks of batched runs have the bank in their key
+    match = re.search(r'_bank_(\d+)$', key)
+    hammer_rows = [entry.get(name) for name in ['hammer_row_1', 'hammer_row_2']]
+    if entry.get('row_pairs'):
+        # Sequential attacks, keep the first and the last hammered row
+        hammer_rows = [entry['row_pairs'][0][1], entry['row_pairs'][-1][1]]
+    builder.add_attack(
+        campaign_id,
+        key,
+        entry['errors_in_rows'],
+        read_count=read_count,
+        hammer_rows=[row if isinstance(row, int) else -1 for row in hammer_rows],
+        hcfirst=entry['hcfirst'] if isinstance(entry.get('hcfirst'), int) else -1,
+        default_bank=int(match.group(1)) if match else default_bank)
+
+
+def _add_time_point(builder, campaign_id, key, data, default_bank):
+    for repeat, details in enumerate(data.get('repeat_details', [])):
+        builder.add_attack(
+            campaign_id,
+            key,
+            details if isinstance(details, dict) else {},
+            attack_time=data.get('attack_time', float('nan')),
+            repeat=repeat,
+            default_bank=default_bank)
+
+
+def import_file(builder, path, name=None, default_bank=0):
+    """
+    Imports a JSON or JSONL (``.jsonl``, ``.jsonl.gz``) results file as a new campaign
+    named ``name`` (the file name by default). Each Rowhammer attack, or each repeat of a
+    retention test time point, becomes an attack of the store. Returns the campaign id.
+    """
+    campaign_id = builder.add_campaign(name or os.path.basename(path))
+    if '.jsonl' in os.path.basename(path):
+        for record in read_records(path):
+            _add_entry(
+                builder, campaign_id, record['read_count'], record['key'], record['entry'],
+                default_bank)
+        return campaign_id
+
+    read_counts = {}
+    # Fields of the current entry of hcfirst.py results, {row: entry}, which are streamed
+    # field by field, errors_in_rows being the last one
+    fields = {}
+    with open(path) as f:
+        for keys, value in iter_items(f):
+            if len(keys) != 2:
+                continue
+            group, key = keys
+            if fields.get('group') != group:
+                fields = {'group': group}
+            if group == 'raw_data' and isinstance(value, dict):
+                _add_time_point(builder, campaign_id, key, value, default_bank)
+            elif key == 'read_count':
+                read_counts[group] = value
+            elif key == 'errors_in_rows':
+                fields[key] = value
+                _add_entry(builder, campaign_id, -1, group, fields, default_bank)
+            elif isinstance(value, dict) and 'errors_in_rows' in value:
+                read_count = read_counts.get(group, int(group) if group.isdigit() else -1)
+                _add_entry(builder, campaign_id, read_count, key, value, default_bank)
+            else:
+                fields[key] = value
+    return campaign_id
+
+
+def load_results(path, default_bank=0):
+    """
+    Store of a saved store (``.npz`` or a directory, memory-mapped), or of a single result
+    file, imported with :func:`import_file`.
+    """
+    if path.endswith('.npz') or os.path.isdir(path):
+        return FlipStore.load(path)
+    builder = FlipStoreBuilder()
+    import_file(builder, path, default_bank=default_bank)
+    return builder.build()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert result files to a columnar bitflip store, or show their contents')
+    parser.add_argument('inputs', nargs='+', help='JSON or JSONL result files, or a store')
+    parser.add_argument(
+        '-o',
+        '--output',
+        help='Output store: a .npz file (compressed) or a directory of .npy files (mmap-able)')
+    parser.add_argument(
+        '--default-bank', type=int, default=0, help='Bank of attacks without bank information')
+    args = parser.parse_args()
+
+    if args.output:
+        builder = FlipStoreBuilder()
+        for path in args.inputs:
+            import_file(builder, path, default_bank=args.default_bank)
+        store = builder.build()
+        store.save(args.output)
+    else:
+        if len(args.inputs) > 1:
+            parser.error('Only a single input can be shown, use --output to convert files')
+        store = load_results(args.inputs[0], default_bank=args.default_bank)
+
+    print('{} bitflips in {} attacks'.format(len(store), store.nattacks))
+    per_attack = store.flips_per_attack()
+    for campaign_id, name in enumerate(store.campaigns):
+        attacks = store.attacks['campaign_id'] == campaign_id
+        print(
+            '  {}: {} attacks, {} bitflips'.format(
+                name, np.count_nonzero(attacks), per_attack[attacks].sum()))
+
+
+if __name__ == "__main__":
+    main()
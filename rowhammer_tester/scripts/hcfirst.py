@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Parallel HCfirst search.
+
+HCfirst of a row is the lowest hammer count that causes a bitflip. Searching it one row at
+a time takes ~15 fill/hammer/verify rounds per row. Here the rows are split into batches of
+rows that are far enough apart not to disturb each other. In each round every unresolved row
+of a batch is hammered at its own hammer count, all in a single payload, followed by a single
+verification, so the search intervals of all the rows of a batch narrow in parallel.
+"""
+
+import json
+import time
+import argparse
+
+from rowhammer_tester.scripts.hcfirst_search import RowSearch, BracketSearch, HCfirstPrior
+from rowhammer_tester.scripts.campaign import Campaign, add_checkpoint_arguments, checkpoint_path
+from rowhammer_tester.scripts.rowhammer import PATTERNS, group_row_pairs, attribute_errors
+
+
+class ParallelHCfirst:
+    """
+    Runs HCfirst searches of many rows in parallel using :meth:`Campaign.hammer_many`.
+
+    Rows of one batch are at least ``distance`` rows apart and a batch has at most
+    ``batch_size`` rows. Bitflips are attributed to the nearest hammered row, if it is not
+    further than ``distance // 2``. With ``prior`` (:class:`HCfirstPrior`) rows start from
+    brackets proposed from the rows measured in previous batches.
+    """
+
+    def __init__(
+            self,
+            campaign,
+            *,
+            min_hc,
+            max_hc,
+            precision=1,
+            distance=8,
+            batch_size=32,
+            pattern='all_1',
+            prior=None):
+        self.campaign = campaign
+        self.search_args = dict(min_hc=min_hc, max_hc=max_hc, precision=precision)
+        self.distance = distance
+        self.batch_size = batch_size
+        self.pattern = pattern
+        self.prior = prior
+        self.rounds = 0
+
+    def new_search(self, row_tuple):
+        bracket = self.prior.bracket(row_tuple[0]) if self.prior is not None else None
+        if bracket is None:
+            return RowSearch(row_tuple, **self.search_args)
+        return BracketSearch(row_tuple, bracket, **self.search_args)
+
+    @staticmethod
+    def row_tuple(row):
+        # Single sided attack, the same as --const-rows-pair row row
+        return (row, row)
+
+    def run_batch(self, searches):
+        while True:
+            active = [s for s in searches if not s.resolved]
+            if not active:
+                return
+            hammers = [(s.row_tuple, s.next_probe()) for s in active]
+            result = self.campaign.hammer_many(hammers, pattern=self.pattern)
+            self.rounds += 1
+            round_pairs = [(None, s.row_tuple) for s in active]
+            pair_errors = attribute_errors(
+                result.errors_in_rows, round_pairs, max_distance=self.distance // 2)
+            for s, (_, count), errors in zip(active, hammers, pair_errors):
+                s.observe(count, errors)
+            print(
+                '  round {}: {} rows hammered, {} resolved, {:.1f}s'.format(
+                    self.rounds, len(active), sum(s.resolved for s in searches), result.duration))
+
+    def run(self, rows):
+        """Returns {row: RowSearch} for given rows."""
+        batches = group_row_pairs(
+            [self.row_tuple(row) for row in rows], self.distance, max_round_size=self.batch_size)
+        results = {}
+        for i, batch in enumerate(batches, start=1):
+            searches = [self.new_search(row_tuple) for _, row_tuple in batch]
+            print('Batch {} / {}: {} rows'.format(i, len(batches), len(searches)))
+            self.run_batch(searches)
+            for s in searches:
+                results[s.row_tuple[0]] = s
+                if self.prior is not None and s.hcfirst is not None:
+                    self.prior.add(s.row_tuple[0], s.hcfirst)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel HCfirst search')
+    parser.add_argument('--start', type=int, default=0, help='First row')
+    parser.add_argument('--count', type=int, default=128, help='Number of rows')
+    parser.add_argument('--bank', type=int, default=0, help='Bank number')
+    parser.add_argument('--min-hc', type=int, default=1000, help='Minimal hammer count')
+    parser.add_argument('--max-hc', type=int, default=30000, help='Maximal hammer count')
+    parser.add_argument('--precision', type=int, default=1, help='Width of the final interval')
+    parser.add_argument(
+        '--distance', type=int, default=8, help='Minimal distance between rows in a batch')
+    parser.add_argument('--batch-size', type=int, default=32, help='Maximal rows in a batch')
+    parser.add_argument(
+        '--pattern', default='all_1', choices=list(PATTERNS), help='Pattern written to DRAM')
+    parser.add_argument(
+        '--strategy',
+        default='prior',
+        choices=['bisect', 'prior'],
+        help='Start each row from scratch or from a bracket guessed from measured neighbours')
+    parser.add_argument('--output', help='Output JSON file')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Show output of the tests')
+    parser.add_argument("--srv", action="store_true", help='Start LiteX server')
+    add_checkpoint_arguments(parser)
+    args = parser.parse_args()
+    checkpoint = checkpoint_path(parser, args)
+
+    start_time = time.time()
+    rows = range(args.start, args.start + args.count)
+    with Campaign.connect(srv=args.srv, bank=args.bank, no_refresh=True, payload_executor=True,
+                          verbose=args.verbose, checkpoint_path=checkpoint) as campaign:
+        engine = ParallelHCfirst(
+            campaign,
+            min_hc=args.min_hc,
+            max_hc=args.max_hc,
+            precision=args.precision,
+            distance=args.distance,
+            batch_size=args.batch_size,
+            pattern=args.pattern,
+            prior=HCfirstPrior() if args.strategy == 'prior' else None)
+        results = engine.run(rows)
+    duration = time.time() - start_time
+
+    found = {row: s.hcfirst for row, s in results.items() if s.hcfirst is not None}
+    print('HCfirst found for {} / {} rows in {} rounds, {:.1f}s'.format(
+        len(found), len(results), engine.rounds, duration))
+    print('Probes per row: {:.1f}'.format(
+        sum(s.probes for s in results.values()) / max(1, len(results))))
+    if found:
+        print('HCfirst range: {} - {}'.format(min(found.values()), max(found.values())))
+
+    if args.output:
+        output = {
+            'metadata': {
+                'type': 'HCfirst_parallel',
+                'range': '{}-{}'.format(args.start, args.start + args.count - 1),
+                'bank': args.bank,
+                'rounds': engine.rounds,
+                'duration_seconds': round(duration, 1),
+                'parameters': {
+                    'min_hc': args.min_hc,
+                    'max_hc': args.max_hc,
+                    'precision': args.precision,
+                    'distance': args.distance,
+                    'batch_size': args.batch_size,
+                    'pattern': args.pattern,
+                    'strategy': args.strategy,
+                },
+            },
+            'results': {
+                str(row): {
+                    'row': row,
+                    'hcfirst': s.hcfirst,
+                    'probes': s.probes,
+                    'errors_in_rows': s.errors_in_rows,
+                }
+                for row, s in results.items()
+            },
+        }
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print('Results saved to: {}'.format(args.output))
+
+
+if __name__ == "__main__":
+    main()
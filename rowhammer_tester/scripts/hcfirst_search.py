@@ -0,0 +1,189 @@
+"""
+Searches of HCfirst, the lowest hammer count causing a bitflip, of a single row.
+
+The searches only propose hammer counts to probe and collect the results, so they can be
+driven by any way of running the tests (see ``hcfirst.py`` and ``rowhammer.py
+--read-count-search``).
+"""
+
+import numpy as np
+
+
+class RowSearch:
+    """
+    HCfirst search of a single row: exponential search starting at ``min_hc``
+    followed by bisection.
+
+    Hammer counts are probed on a grid ``min_hc + k * precision`` (up to ``max_hc``), the
+    result is the lowest grid point causing a bitflip, so it does not depend on the order
+    of probes. The search state is a pair of grid indices: no bitflips at ``low`` (-1 is
+    below the grid), bitflips at ``high`` (None until a bitflip is seen).
+    """
+
+    def __init__(self, row_tuple, *, min_hc, max_hc, precision=1):
+        self.row_tuple = row_tuple
+        self.min_hc = min_hc
+        self.max_hc = max_hc
+        self.precision = precision
+        self.last = -(-(max_hc - min_hc) // precision)  # index of max_hc
+        self.low = -1
+        self.high = None
+        self.probes = 0
+        self.errors_in_rows = {}
+
+    def value(self, index):
+        return min(self.min_hc + index * self.precision, self.max_hc)
+
+    def index(self, value):
+        # Lowest grid index with value not lower than the given one
+        return max(0, min(-(-(value - self.min_hc) // self.precision), self.last))
+
+    @property
+    def resolved(self):
+        if self.high is None:
+            return self.low >= self.last
+        return self.high - self.low <= 1
+
+    @property
+    def hcfirst(self):
+        return self.value(self.high) if self.resolved and self.high is not None else None
+
+    def next_index(self):
+        if self.high is None:
+            if self.low < 0:
+                return 0
+            return max(self.low + 1, self.index(2 * self.value(self.low)))
+        return (self.low + self.high) // 2
+
+    def next_probe(self):
+        return self.value(self.next_index())
+
+    def observe(self, hammer_count, errors_in_rows, flipped=None):
+        """
+        Records the result of a probe. Bitflips are detected from ``errors_in_rows``, unless
+        given explicitly by ``flipped``.
+        """
+        self.probes += 1
+        if flipped is None:
+            flipped = bool(errors_in_rows)
+        if flipped:
+            self.high = self.index(hammer_count)
+            self.errors_in_rows = errors_in_rows
+        else:
+            self.low = self.index(hammer_count)
+
+
+class BisectSearch(RowSearch):
+    """
+    HCfirst search by bisection of the whole range: ``max_hc`` is probed first and, if it
+    causes bitflips, the range below it is bisected. Takes about log2 of the number of grid
+    points probes regardless of HCfirst, while :class:`RowSearch` needs fewer probes when
+    HCfirst is close to ``min_hc``.
+    """
+
+    def next_index(self):
+        if self.high is None:
+            return self.last
+        return super().next_index()
+
+
+class BracketSearch(RowSearch):
+    """
+    HCfirst search starting from a guessed bracket ``(lo, hi)`` (e.g. from neighbour rows).
+
+    Both ends of the bracket are probed first. If HCfirst turns out to be outside of it,
+    the search gallops away from the bracket doubling the step, as the exponential search
+    does. The final interval is then bisected, so the result is the same as of
+    :class:`RowSearch`, only reached with fewer probes when the guess is good.
+    """
+
+    def __init__(self, row_tuple, bracket, **kwargs):
+        super().__init__(row_tuple, **kwargs)
+        lo, hi = sorted(self.index(v) for v in bracket)
+        self.lo_guess, self.hi_guess = lo, hi
+        self.step = max(1, hi - lo)
+        self.phase = 'upper'
+
+    @property
+    def bracket_hit(self):
+        """Whether HCfirst has been found inside of the guessed bracket."""
+        return self.resolved and self.high is not None \
+            and self.lo_guess <= self.high <= self.hi_guess
+
+    def next_index(self):
+        if self.phase == 'upper':
+            return self.hi_guess
+        if self.phase == 'up':
+            return min(self.low + self.step, self.last)
+        if self.phase == 'lower':
+            return self.lo_guess
+        if self.phase == 'down':
+            return max(self.high - self.step, self.low + 1)
+        return super().next_index()
+
+    def observe(self, hammer_count, errors_in_rows, flipped=None):
+        if flipped is None:
+            flipped = bool(errors_in_rows)
+        super().observe(hammer_count, errors_in_rows, flipped)
+        if self.phase == 'upper':
+            if not flipped:
+                self.phase = 'up'
+            elif self.low < self.lo_guess < self.high:
+                self.phase = 'lower'
+            else:
+                self.phase = 'down'
+        elif self.phase == 'lower':
+            self.phase = 'down' if flipped else 'bisect'
+        elif self.phase in ['up', 'down']:
+            if flipped == (self.phase == 'up'):
+                self.phase = 'bisect'
+            else:
+                self.step *= 2
+
+
+class HCfirstPrior:
+    """
+    Proposes HCfirst brackets for rows from already measured rows.
+
+    The estimate for a row is the median of measured rows within ``radius``. Errors of such
+    estimates are collected on the fly and their ``coverage`` quantile range gives the width
+    of the bracket. Without measured neighbours the quantile range of all measured values
+    is used.
+    """
+
+    def __init__(self, radius=4, coverage=0.8, min_samples=8):
+        self.radius = radius
+        self.coverage = coverage
+        self.min_samples = min_samples
+        self.measured = {}
+        self.residuals = []
+
+    def estimate(self, row):
+        values = [
+            self.measured[r] for r in range(row - self.radius, row + self.radius + 1)
+            if r in self.measured and r != row
+        ]
+        return float(np.median(values)) if values else None
+
+    def add(self, row, hcfirst):
+        estimate = self.estimate(row)
+        if estimate is not None:
+            self.residuals.append(hcfirst - estimate)
+        self.measured[row] = hcfirst
+
+    def _quantiles(self, values):
+        tail = (1 - self.coverage) / 2
+        return np.quantile(values, [tail, 1 - tail])
+
+    def bracket(self, row):
+        """Returns (lo, hi) or None if there is not enough data yet."""
+        estimate = self.estimate(row)
+        if estimate is not None and len(self.residuals) >= self.min_samples:
+            lo, hi = estimate + self._quantiles(self.residuals)
+        elif estimate is not None:
+            lo, hi = 0.8 * estimate, 1.2 * estimate
+        elif len(self.measured) >= self.min_samples:
+            lo, hi = self._quantiles(list(self.measured.values()))
+        else:
+            return None
+        return int(lo), int(np.ceil(hi))
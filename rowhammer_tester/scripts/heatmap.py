@@ -0,0 +1,129 @@
+"""
+Data of the bitflip heat maps of ``logs2plot.py``.
+
+:class:`HeatmapData` holds the non-empty cells of a heat map as NumPy arrays sorted by row,
+so that the cells of the visible rows are a slice of the arrays (a view, also of arrays
+memory-mapped from a :class:`~rowhammer_tester.scripts.flip_store.FlipStore`) and only the
+visible window is materialized when a plot is drawn. :class:`HeatmapPyramid` adds coarser
+levels of the same cells, so that the bins of a zoomed-out view are summed from a few
+coarse cells instead of all the bitflips. Views are split into power of 2 bins aligned to
+their size (:func:`aligned_bins`), which always match the cells of one level.
+"""
+
+from math import ceil, floor
+
+import numpy as np
+
+
+class HeatmapData:
+    """
+    Cells of a heat map: ``xdata`` (e.g. column or attempt), ``rows`` and the number of
+    ``bitflips`` in the cell. Cells are sorted by row, then by x.
+    """
+
+    def __init__(self, xdata, rows, bitflips):
+        self.xdata = xdata
+        self.rows = rows
+        self.bitflips = bitflips
+
+    @classmethod
+    def from_points(cls, xdata, rows, weights=None):
+        """Counts points (e.g. bitflips), each one or of the given weight, into cells."""
+        xdata = np.asarray(xdata, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(xdata) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return cls(empty, empty, empty)
+        # Cells keyed by row, then x, x may be negative e.g. after an offset
+        xmin = xdata.min()
+        width = xdata.max() - xmin + 1
+        cells, inverse = np.unique(rows * width + (xdata - xmin), return_inverse=True)
+        counts = np.bincount(inverse, weights=weights, minlength=len(cells))
+        return cls(cells % width + xmin, cells // width, counts.astype(np.int64))
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def row_range(self):
+        """``(min, max)`` of the rows with bitflips, ``(0, 0)`` if there are none."""
+        if len(self) == 0:
+            return 0, 0
+        return int(self.rows[0]), int(self.rows[-1])
+
+    def window(self, xlim, ylim):
+        """Cells with ``xlim[0] <= x < xlim[1]`` and ``ylim[0] <= row < ylim[1]``."""
+        start, end = np.searchsorted(self.rows, ylim)
+        xdata = self.xdata[start:end]
+        mask = (xdata >= xlim[0]) & (xdata < xlim[1])
+        return xdata[mask], self.rows[start:end][mask], self.bitflips[start:end][mask]
+
+
+def aligned_bins(low, high, nbins):
+    """
+    Bins covering ``[low, high)`` with at most ``nbins`` bins, returns ``(start, stop, step)``.
+    The step is rounded up to a power of 2 and the start down to a multiple of the step, so
+    that :meth:`HeatmapPyramid.histogram` sums the bins from level ``log2(step)``.
+    """
+    start = floor(low)
+    span = max(1, ceil(high - start))
+    step = 1 << (max(1, -(-span // nbins)) - 1).bit_length()
+    start = start // step * step
+    stop = start + ceil((high - start) / step) * step
+    return start, max(stop, start + step), step
+
+
+def _alignment(start, step):
+    # Largest power of 2 exponent dividing both the step and the start of the bins
+    k = 0
+    while step % (2 << k) == 0 and start % (2 << k) == 0:
+        k += 1
+    return k
+
+
+class HeatmapPyramid:
+    """
+    Multi-resolution levels of a :class:`HeatmapData`: level ``(kx, ky)`` holds cells of
+    ``2**kx`` x values by ``2**ky`` rows. Levels are built from the next finer level when
+    first used and then kept, so each level is computed only once.
+    """
+
+    def __init__(self, data):
+        self.levels = {(0, 0): data}
+
+    def level(self, kx, ky):
+        if (kx, ky) not in self.levels:
+            if kx > 0:
+                finer = self.level(kx - 1, ky)
+                coarse = HeatmapData.from_points(finer.xdata >> 1, finer.rows, finer.bitflips)
+            else:
+                finer = self.level(kx, ky - 1)
+                coarse = HeatmapData.from_points(finer.xdata, finer.rows >> 1, finer.bitflips)
+            self.levels[kx, ky] = coarse
+        return self.levels[kx, ky]
+
+    @staticmethod
+    def level_for(xlim, ylim, xstep, ystep):
+        """
+        Level ``(kx, ky)`` used for bins of ``xstep`` by ``ystep`` starting at ``xlim[0]``,
+        ``ylim[0]``, see :func:`aligned_bins` for bins using the coarsest possible level.
+        """
+        return _alignment(xlim[0], xstep), _alignment(ylim[0], ystep)
+
+    def histogram(self, xlim, ylim, xstep, ystep):
+        """
+        Bitflips in bins of ``xstep`` x values by ``ystep`` rows starting at ``xlim[0]``,
+        ``ylim[0]``, array of shape ``(nx, ny)``. Limits must be whole numbers of bins.
+        Uses the coarsest level whose cells fit in the bins, so the cost depends on the
+        number of visible bins rather than on the number of bitflips.
+        """
+        nx = (xlim[1] - xlim[0]) // xstep
+        ny = (ylim[1] - ylim[0]) // ystep
+        kx, ky = self.level_for(xlim, ylim, xstep, ystep)
+        x0, y0 = xlim[0] >> kx, ylim[0] >> ky
+        xstep, ystep = xstep >> kx, ystep >> ky
+        qx, qrows, qbitflips = self.level(kx, ky).window(
+            [x0, x0 + nx * xstep], [y0, y0 + ny * ystep])
+        bins = (qx - x0) // xstep * ny + (qrows - y0) // ystep
+        counts = np.bincount(bins, weights=qbitflips, minlength=nx * ny)
+        return counts.astype(np.int64).reshape(nx, ny)
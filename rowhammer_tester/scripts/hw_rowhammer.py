@@ -4,12 +4,11 @@ import time
 import random
 import argparse
 from math import ceil
-from collections import defaultdict
 
 from rowhammer_tester.gateware.payload_executor import Encoder, OpCode, Decoder
 from rowhammer_tester.scripts.utils import (
     hw_memset, hw_memtest, DRAMAddressConverter, litex_server, memwrite, RemoteClient,
-    setup_inverters, _progress)
+    setup_inverters, _progress, decode_errors_per_row, progress_reporter)
 from rowhammer_tester.scripts.rowhammer import RowHammer, main
 
 ################################################################################
@@ -17,9 +16,11 @@ from rowhammer_tester.scripts.rowhammer import RowHammer, main
 
 class HwRowHammer(RowHammer):
 
-    def attack(self, row_tuple, read_count, progress_header=''):
+    def attack(self, row_tuple, read_count, progress_header='', bank=None):
+        if bank is None:
+            bank = self.bank
         addresses = [
-            self.converter.encode_dma(bank=self.bank, col=self.column, row=r) for r in row_tuple
+            self.converter.encode_dma(bank=bank, col=self.column, row=r) for r in row_tuple
         ]
         row_strw = len(str(2**self.settings.geom.rowbits - 1))
 
@@ -51,39 +52,53 @@ class HwRowHammer(RowHammer):
 
         # FIXME: --------------------------- move to utils ------------------
 
-        def progress(count):
-            s = '  {}'.format(progress_header + ' ' if progress_header else '')
-            s += 'Rows = {}, Count = {:5.2f}M / {:5.2f}M'.format(
-                row_tuple, count / 1e6, read_count / 1e6, n=row_strw)
-            print(s, end='  \r')
+        def progress(count, last=False):
+
+            def render():
+                s = '  {}'.format(progress_header + ' ' if progress_header else '')
+                s += 'Rows = {}, Count = {:5.2f}M / {:5.2f}M'.format(
+                    row_tuple, count / 1e6, read_count / 1e6, n=row_strw)
+                return s + '  '
+
+            progress_reporter.report('Attack', count, read_count, render, last=last)
 
         while True:
-            r_count = self.wb.regs.reader_done.read()
-            progress(r_count)
+            if progress_reporter.due('Attack'):
+                progress(self.wb.regs.reader_done.read())
             if self.wb.regs.reader_ready.read():
                 break
             else:
                 time.sleep(10 / 1e3)
 
-        progress(self.wb.regs.reader_done.read())  # also clears the value
-        print()
+        progress(self.wb.regs.reader_done.read(), last=True)  # also clears the value
 
     def check_errors(self, row_pattern):
-        dma_data_width = self.settings.phy.dfi_databits * self.settings.phy.nphases
-        dma_data_bytes = dma_data_width // 8
-
         errors = hw_memtest(self.wb, 0x0, self.wb.mems.main_ram.size, [row_pattern])
+        return decode_errors_per_row(
+            errors,
+            converter=self.converter,
+            settings=self.settings,
+            base=self.wb.mems.main_ram.base,
+            bank=self.bank)
+
+    def run(
+            self,
+            row_pairs,
+            pattern_generator,
+            read_count,
+            row_progress=16,
+            verify_initial=True,
+            banks=None,
+            read_counts=None,
+            fill=True):
+        """
+        See :meth:`RowHammer.run`. With ``read_counts`` (one per row pair) all the pairs are
+        hammered by a single payload (requires payload executor and disabled refresh).
+        """
+        if read_counts is not None:
+            assert self.payload_executor and self.no_refresh, \
+                'Per-pair read counts require --payload-executor and --no-refresh'
 
-        row_errors = defaultdict(list)
-        for e in errors:
-            addr = self.wb.mems.main_ram.base + e.offset * dma_data_bytes
-            bank, row, col = self.converter.decode_bus(addr)
-            base_addr = min(self.addresses_per_row(row))
-            row_errors[row].append(((addr - base_addr) // 4, e.data, e.expected))
-
-        return dict(row_errors)
-
-    def run(self, row_pairs, pattern_generator, read_count, row_progress=16, verify_initial=True):
         divisor, mask = 0, 0
         if self.data_inversion:
             divisor, mask = self.data_inversion
@@ -105,10 +120,13 @@ class HwRowHammer(RowHammer):
             row_pattern = list(pattern_generator([0]).values())[0]
             
         print('WARNING: only single word patterns supported, using: 0x{:08x}'.format(row_pattern))
-        print('\nFilling memory with data ...')
-        hw_memset(self.wb, 0x0, self.wb.mems.main_ram.size, [row_pattern])
+        if fill:
+            print('\nFilling memory with data ...')
+            hw_memset(self.wb, 0x0, self.wb.mems.main_ram.size, [row_pattern])
+        else:
+            print('\nReusing memory contents verified by the previous run')
 
-        if verify_initial:
+        if fill and verify_initial:
             print('\nVerifying written memory ...')
             errors = self.check_errors(row_pattern)
             if self.errors_count(errors) == 0:
@@ -124,19 +142,24 @@ class HwRowHammer(RowHammer):
 
         if self.no_attack_time is not None:
             self.no_attack_sleep()
+        elif read_counts is not None:
+            print('\nRunning Rowhammer attacks on {} row tuples ...'.format(len(row_pairs)))
+            self.payload_executor_attack_many(list(zip(row_pairs, read_counts)))
         else:
             print('\nRunning Rowhammer attacks ...')
-            for i, row_tuple in enumerate(row_pairs, start=1):
+            for i, (row_tuple, bank) in enumerate(zip(row_pairs, banks or [None] * len(row_pairs)),
+                                                  start=1):
                 s = 'Iter {:{n}} / {:{n}}'.format(i, len(row_pairs), n=len(str(len(row_pairs))))
                 print(f'Attacking rows: {row_tuple}')
                 if self.payload_executor:
-                    self.payload_executor_attack(read_count=read_count, row_tuple=row_tuple)
+                    self.payload_executor_attack(
+                        read_count=read_count, row_tuple=row_tuple, bank=bank)
                 else:
                     if len(row_tuple) & (len(row_tuple) - 1) != 0:
                         print("ERROR: BIST only supports power of 2 rows\n")
                         return
 
-                    self.attack(row_tuple, read_count=read_count, progress_header=s)
+                    self.attack(row_tuple, read_count=read_count, progress_header=s, bank=bank)
 
         if self.no_refresh:
             print('\nReenabling refresh ...')
@@ -12,6 +12,8 @@ from pathlib import Path
 import numpy as np
 from matplotlib import pyplot as plt
 
+from rowhammer_tester.scripts.flip_stats import dq_histogram
+
 DQ_PADS = 64
 DQ_RATIO = 4
 
@@ -54,14 +56,11 @@ def plot(
 
 def count_bitflips_per_dq(data: dict):
     """Count bitflips per DQ pad in data from a single attack"""
-    counts = np.zeros(DQ_PADS)
-
-    for _, row_errors in data["errors_in_rows"].items():
-        for _, single_read in row_errors["col"].items():
-            for bitflip in single_read:
-                counts[bitflip % DQ_PADS] += 1
-
-    return counts
+    bitflips = [
+        bitflip for row_errors in data["errors_in_rows"].values()
+        for single_read in row_errors["col"].values() for bitflip in single_read
+    ]
+    return dq_histogram(bitflips, DQ_PADS)
 
 
 if __name__ == "__main__":
@@ -2,16 +2,18 @@
 """
 This script generates plots from rowhammer attack logs using matplotlib.
 Depending on chosen mode, it will generate one or many separate plots.
+
+Logs are read into a columnar flip store (see flip_store.py): JSON logs are parsed
+incrementally, and stores saved by flip_store.py are memory-mapped, so they can be plotted
+without loading the whole log first.
 """
 
 import argparse
 import json
 import os
-from copy import deepcopy
-from itertools import repeat
-from math import ceil, floor
+from math import floor
 from pathlib import Path
-from typing import List, Optional, Tuple, Union
+from typing import List, Optional, Union
 
 import numpy as np
 from logs2dq import DQ_PADS
@@ -32,6 +34,9 @@ from matplotlib import cm, colors
 from matplotlib import pyplot as plt
 
 from rowhammer_tester.scripts.utils import get_generated_file
+from rowhammer_tester.scripts.flip_store import load_results
+from rowhammer_tester.scripts.heatmap import HeatmapData, HeatmapPyramid, aligned_bins
+from rowhammer_tester.scripts.render_jobs import cached_store, input_stamp, open_store, render
 
 dq_data: list = []
 PLOT_STYLE = os.path.join(
@@ -40,11 +45,8 @@ PLOT_STYLE = os.path.join(
 
 
 def plot_interactive(
-    rows: List[int],
+    data: HeatmapData,
     aggressors: Union[List[int], List[List[int]]],
-    xdata: List[int],
-    bitflips: List[int],
-    avb_packed: List[Tuple[int, int, int]],
     column_count: int,
     xlabel: str,
     title: str,
@@ -55,23 +57,20 @@ def plot_interactive(
     group_rows: int,
     avv: bool = False,
 ):
-    min_victim = min(rows) if rows else 0
-    max_victim = max(rows) if rows else 0
-    x_ax: List[int] = []
-    y_ax: List[int] = []
+    min_victim, max_victim = data.row_range
+    pyramid = HeatmapPyramid(data)
     if all(isinstance(ag, int) for ag in aggressors):
         min_aggressor = min(aggressors) if aggressors else 0
         max_aggressor = max(aggressors) if aggressors else 0
-        for ag in aggressors:
-            y_ax.extend(repeat(ag, column_count))  # type: ignore
-        x_ax = [x for rep in repeat(range(column_count), len(aggressors)) for x in rep]
+        y_ax = np.repeat(aggressors, column_count)
+        x_ax = np.tile(np.arange(column_count), len(aggressors))
     else:
         assert all(isinstance(ag, list) for ag in aggressors)
-        min_aggressor = min(min(aggressors)) if aggressors else 0  # type: ignore
-        max_aggressor = max(max(aggressors)) if aggressors else 0  # type: ignore
-        for idx in range(len(aggressors)):
-            x_ax.extend(repeat(idx, len(aggressors[idx])))  # type: ignore
-            y_ax.extend(aggressors[idx])  # type: ignore
+        all_aggressors = [ag for attempt in aggressors for ag in attempt]  # type: ignore
+        min_aggressor = min(all_aggressors) if all_aggressors else 0
+        max_aggressor = max(all_aggressors) if all_aggressors else 0
+        y_ax = np.array(all_aggressors)
+        x_ax = np.repeat(np.arange(len(aggressors)), [len(ag) for ag in aggressors])
 
     fig, ax = plt.subplots()
     fig.set_size_inches(16, 16)
@@ -84,54 +83,36 @@ def plot_interactive(
 
     def reset_axes():
         plt.ylim(abs_ylim)
-        plt.xlim(-0.5, column_count - 0.5)
+        plt.xlim(-0.5, column_count + 0.5)
 
     def draw_plot():
         nonlocal cbar, press_callback_en
         press_callback_en = False
         xlim, ylim = list(plt.xlim()), list(plt.ylim())
         ax.clear()
-        xlim[0] = int(floor(xlim[0]) + 0.5)
-        ylim[0] = int(floor(ylim[0]) + 0.5)
-        xl = xlim[1] - xlim[0] + 0.5
-        xstep = ceil(xl / group_cols)
-        xl = ceil(xl / xstep) * xstep
-        xlim[1] = int(xl + xlim[0])
-
-        yl = ylim[1] - ylim[0]
-        ystep = ceil(yl / group_rows)
-        yl = ceil(yl / ystep) * ystep
-        ylim[1] = int(yl + ylim[0])
-
-        bins = [int(xl / xstep), int(yl / ystep)]
-        qbins = deepcopy(bins)
-
-        hist_range = [[xlim[0], xlim[1]], [ylim[0], ylim[1]]]
-        qxdata, qrows, qbitflips = [], [], []
-        for i in reversed(range(len(xdata))):
-            if (xlim[0] <= xdata[i] < xlim[1]) and (ylim[0] <= rows[i] < ylim[1]):
-                qxdata.append(xdata[i])
-                qrows.append(rows[i])
-                qbitflips.append(bitflips[i])
+        # Power of 2 bins aligned to their size, so that they are summed from the cells
+        # of a single pyramid level, and the cost does not depend on the bitflip count. The
+        # view has a margin of half a unit around the bins, see plt.xlim() below.
+        xlim[0], xlim[1], xstep = aligned_bins(xlim[0] + 0.5, xlim[1] - 0.5, group_cols)
+        ylim[0], ylim[1], ystep = aligned_bins(ylim[0] + 0.5, ylim[1] - 0.5, group_rows)
+
+        counts = pyramid.histogram(xlim, ylim, xstep, ystep)
+        xedges = np.arange(xlim[0], xlim[1] + 1, xstep)
+        yedges = np.arange(ylim[0], ylim[1] + 1, ystep)
+        h = counts
 
         if avv and xstep == 1 and ystep == 1:
             press_callback_en = True
-            qbins[0] = bins[0] * 2 + 1
-            hist_range[0] = [xlim[0] - 0.25, xlim[1] + 0.25]
-            qxdata = [x + 0.5 for x in qxdata]
-
-        h, _, _, _ = ax.hist2d(
-            qxdata,
-            qrows,
-            bins=qbins,
-            range=hist_range,
-            weights=qbitflips,
-            cmap="plasma",
-            cmin=1,
-        )
+            # Narrow bins centered on the attempts, separated by empty ones
+            h = np.zeros((counts.shape[0] * 2 + 1, counts.shape[1]), dtype=counts.dtype)
+            h[1::2] = counts
+            xedges = xlim[0] - 0.25 + 0.5 * np.arange(h.shape[0] + 1)
+
+        h = np.where(h >= 1, h, np.nan)
+        ax.pcolormesh(xedges, yedges, h.T, cmap="plasma")
         sc = ax.scatter(
-            [x + xstep / 2 for x in x_ax],
-            [y + ystep / 2 for y in y_ax],
+            x_ax + xstep / 2,
+            y_ax + ystep / 2,
             10,
             marker="x",
         )
@@ -151,26 +132,16 @@ def plot_interactive(
         # Do not annotate by default since it slows down a plot and it makes it hard
         # to read without zooming in
         if annotate == "bitflips":
-            new_avb = np.zeros((bins[0], bins[1]))
-            xlb = (xlim[1] - xlim[0]) / (bins[0])
-            ylb = (ylim[1] - ylim[0]) / (bins[1])
-            for a, v, b in avb_packed:
-                if b == 0 or not (xlim[0] <= v < xlim[1]) or not (ylim[0] <= a < ylim[1]):
-                    continue
-                new_avb[int(floor((v - xlim[0]) / xlb))][int(floor((a - ylim[0]) / ylb))] += b
-            for i in range(new_avb.shape[0]):
-                for j in range(new_avb.shape[1]):
-                    if new_avb[i][j] == 0:
-                        continue
-                    ax.text(
-                        xticks[i],
-                        yticks[j],
-                        f"{int(new_avb[i][j])}",
-                        color="w",
-                        ha="center",
-                        va="center",
-                        fontweight="bold",
-                    )
+            for i, j in zip(*np.nonzero(counts)):
+                ax.text(
+                    xticks[i],
+                    yticks[j],
+                    f"{counts[i, j]}",
+                    color="w",
+                    ha="center",
+                    va="center",
+                    fontweight="bold",
+                )
 
         ax.grid(visible=True, which="both", color="gray", alpha=0.2, linestyle="-")
         plt.xlim(xlim[0] - 0.5, xlim[1] + 0.5)
@@ -226,55 +197,40 @@ def plot_interactive(
         plt.show()
     else:
         plt.tight_layout()  # 紧凑布局
-        # 确保PNG文件保存到test目录
-        if not os.path.isabs(png):  # 如果不是绝对路径
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            test_dir = os.path.join(script_dir, "test")
-            os.makedirs(test_dir, exist_ok=True)  # 创建test目录（如果不存在）
-            png = os.path.join(test_dir, png)
-        plt.savefig(png, dpi=600, bbox_inches='tight', pad_inches=0.05)  # 最小边距
+        plt.savefig(png_path(png), dpi=600, bbox_inches='tight', pad_inches=0.05)  # 最小边距
+        plt.close(fig)
+
+
+def png_path(png: str) -> str:
+    # 确保PNG文件保存到test目录
+    if not os.path.isabs(png):  # 如果不是绝对路径
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        test_dir = os.path.join(script_dir, "test")
+        os.makedirs(test_dir, exist_ok=True)  # 创建test目录（如果不存在）
+        png = os.path.join(test_dir, png)
+    return png
 
 
 def plot_single_attack(
-    data: dict,
+    aggressors: List[int],
+    data: HeatmapData,
     annotate: str = "bitflips",
     xlabel="DQ",
     png: Optional[str] = None,
     colorbar: bool = True,
-    col_count: int = 1024,
+    col_count: int = DQ_PADS,
     group_rows: int = 64,
     group_cols: int = 64,
 ):
-    aggressors = data["aggressors"]
     try:
         plt.style.use(PLOT_STYLE)
     except:
         pass  # Fall back to default style if custom style not available
 
-    columns = len(next(iter(data["victims"].values()))) if data["victims"].values() else col_count
-
-    xdata: list[int] = []
-    rows: list[int] = []
-    bitflips: list[int] = []
-    # Aggressors (a) with victims (v) and bitflips (b) packed into tuple (a, v, b)
-    avb_packed: List[Tuple[int, int, int]] = []
-    # Put aggressors and its victims into lists for hist2d
-    for row, bits in data["victims"].items():
-        for idx, flip_count in enumerate(bits):
-            rows.append(row)
-            xdata.append(idx)
-            bitflips.append(flip_count)
-
-            # Pack data for annotation
-            avb_packed.append((row, idx, flip_count))
-
     plot_interactive(
-        rows,
+        data,
         aggressors,
-        xdata,
-        bitflips,
-        avb_packed,
-        columns,
+        col_count,
         xlabel,
         "",  # 移除标题
         annotate,
@@ -286,61 +242,37 @@ def plot_single_attack(
 
 
 def plot_aggressors_vs_victims(
-    data: List[Tuple[List[int], list]],
+    store,
+    attack_ids: List[int],
     annotate: str,
     png: Optional[str],
     colorbar: bool = True,
     group_rows: int = 64,
     group_cols: int = 64,
 ):
-    aggressors: list[list[int]] = []
-    victims: list[int] = []
-    bitflips: list[int] = []
-    attempts: list[int] = []
     try:
         plt.style.use(PLOT_STYLE)
     except:
         pass  # Fall back to default style if custom style not available
 
-    # Aggressors (a) with victims (v) and bitflips (b) packed into tuple (a, v, b)
-    avb_packed: List[Tuple[int, int, int]] = []
-
     dq_data.clear()
-    # Put aggressors and its victims into lists for hist2d
-    attempt = -1
-    for aggressor, victim in data:
-        # Each victim must have its corresponding aggressor
-        attempt += 1
-        aggressors.append(aggressor)
-        attack_victims = {}
-        for v in victim:
-            # From json file - v[1] is a single victim row hierarchy
-            bitflip_amount = v[1]["bitflips"]
-            row_number = v[1]["row"]
-            cols = v[1]["col"]
-
-            victims.append(row_number)
-            bitflips.append(bitflip_amount)
-            attempts.append(attempt)
-
-            # Pack data for annotation
-            avb_packed.append((row_number, attempt, bitflip_amount))
-
-            # Save DQ data for single aggressor vs victim
-            dq_counters = count_bitflips_per_dq(cols)
-            attack_victims[row_number] = dq_counters
-        attack = {"aggressors": aggressor, "victims": attack_victims}
-        dq_data.append(attack)
-    amin, amax = min(min(aggressors)), max(max(aggressors))
+    aggressors: list[list[int]] = []
+    for attack_id in attack_ids:
+        # Each victim must have its corresponding aggressor, the bitflips of an attack are
+        # views of the store, read only when plotted
+        aggressors.append(hammered_rows(store, attack_id))
+        dq_data.append((aggressors[-1], store.attack_flips(attack_id)))
+
+    # Each bitflip counts in the cell of its attempt and victim row
+    attempts = np.repeat(np.arange(len(attack_ids)), store.flips_per_attack()[attack_ids])
+    victims = np.concatenate([flips["row"] for _, flips in dq_data]) if dq_data else []
+    data = HeatmapData.from_points(attempts, victims)
     # Handle empty attempts list
-    max_attempts = max(attempts) if attempts else 0
+    max_attempts = int(data.xdata.max()) if len(data) else 0
 
     plot_interactive(
-        victims,
+        data,
         aggressors,
-        attempts,
-        bitflips,
-        avb_packed,
         max_attempts,
         "Attempt",
         "",  # 移除标题
@@ -353,15 +285,9 @@ def plot_aggressors_vs_victims(
     )
 
 
-def count_bitflips_per_dq(data: dict):
-    """Count bitflips per DQ pad in data of a single aggressor vs victim"""
-    counts = np.zeros(DQ_PADS)
-
-    for _, single_read in data.items():
-        for bitflip in single_read:
-            counts[bitflip % DQ_PADS] += 1
-
-    return counts
+def hammered_rows(store, attack_id: int) -> List[int]:
+    rows = [int(store.attacks[name][attack_id]) for name in ["hammer_row_1", "hammer_row_2"]]
+    return [row for row in rows if row >= 0]
 
 
 def on_click(event):
@@ -370,19 +296,52 @@ def on_click(event):
     try:
         x = floor(event.xdata - 0.5)
         y = floor(event.ydata - 0.5)
-        dq_counters = dq_data[x]
-    except KeyError:
+        aggressors, flips = dq_data[x]
+    except (KeyError, IndexError):
         print(f"No data about attack - aggressor({x}) vs victim({y}).")
         return
     except TypeError:
         print("Press detected out of bounds.")
         return
-    plot_single_attack(dq_counters)
+    # Bitflips of a single aggressor vs victim grouped per DQ pad
+    plot_single_attack(aggressors, HeatmapData.from_points(flips["bit"] % DQ_PADS, flips["row"]))
+
+
+def render_plot(store, attack_ids: List[int], png: Optional[str], options: dict):
+    """Plots a set of attacks (aggressors vs victims) or a single attack."""
+    if options["aggressors_vs_victims"]:
+        plot_aggressors_vs_victims(
+            store,
+            attack_ids,
+            options["annotate"],
+            png,
+            colorbar=options["colorbar"],
+            group_rows=options["group_rows"],
+            group_cols=options["group_cols"],
+        )
+    else:
+        flips = store.attack_flips(attack_ids[0])
+        plot_single_attack(
+            hammered_rows(store, attack_ids[0]),
+            HeatmapData.from_points(flips["col"], flips["row"]),
+            annotate=options["annotate"],
+            xlabel="Column",
+            png=png,
+            colorbar=options["colorbar"],
+            col_count=options["cols"],
+            group_rows=options["group_rows"],
+            group_cols=options["group_cols"],
+        )
+
+
+def render_png(store_path: str, attack_ids: List[int], png: str, options: dict):
+    # Runs in worker processes, which open the memory-mapped store by path
+    render_plot(open_store(store_path), attack_ids, png, options)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("log_file", help="file with log output")
+    parser.add_argument("log_file", help="file with log output (JSON, JSONL or a flip store)")
     parser.add_argument(
         "--aggressors-vs-victims",
         action="store_true",
@@ -422,6 +381,18 @@ if __name__ == "__main__":
         default=64,
         help="Group columns into N groups (default N: 64)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Render png files in N parallel processes (default N: 1)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Render png files even if the log and options did not change since the last run",
+    )
     args = parser.parse_args()
 
     settings_file = Path(get_generated_file("litedram_settings.json"))
@@ -431,74 +402,56 @@ if __name__ == "__main__":
     COLS = 2 ** settings["geom"]["colbits"]
     ROWS = 2 ** settings["geom"]["rowbits"]
 
-    log_file = Path(args.log_file)
-    with log_file.open() as fd:
-        log_data = json.load(fd)
-
-    for _, attack_set_results in log_data.items():
-        aggressors_vs_victims = []
-        # Remove read_count as it's only disturbing here
-        if "read_count" in attack_set_results:
-            attack_set_results.pop("read_count")
-
-        # Single attack hierarchy
-        for attack, attack_results in attack_set_results.items():
-            if attack.startswith("pair"):
-                hammered_rows = [
-                    attack_results["hammer_row_1"],
-                    attack_results["hammer_row_2"],
-                ]
-                title = f"Hammered rows: {hammered_rows}"
-            elif attack.startswith("sequential"):
-                start_row = attack_results["row_pairs"][0][1]
-                end_row = attack_results["row_pairs"][-1][1]
-                hammered_rows = [r[1] for r in attack_results["row_pairs"]]
-                title = f"Sequential attack on rows from {start_row} to {end_row}"
-
-                if args.aggressors_vs_victims:
-                    print(
-                        "ERROR: Sequential attacks are not hammering a single row."
-                        " Unable to compare aggressors against victims."
-                    )
-                    exit()
-
-            # Collect all attack data into one dict if we plot aggressors vs victims
-            if args.aggressors_vs_victims:
-                # We don't need anything but victim rows hierarchy to generate plot
-                victim_rows = []
-                for row in attack_results["errors_in_rows"].items():
-                    victim_rows.append(row)
-
-                aggressors_vs_victims.append((hammered_rows, victim_rows))
-
-            # Otherwise plot single attack immediately
-            else:
-                victims = {}
-                for row in attack_results["errors_in_rows"].values():
-                    row_number = row["row"]
-                    cols = row["col"]
-                    victims[row_number] = list(repeat(0, COLS))
-                    for _, single_read in cols.items():
-                        for c in single_read:
-                            victims[row_number][c] += 1
-                data = {"aggressors": hammered_rows, "victims": victims}
-
-                plot_single_attack(
-                    data,
-                    annotate=args.annotate,
-                    xlabel="Column",
-                    png=args.png,
-                    colorbar=not args.no_colorbar,
-                    col_count=COLS,
-                    group_rows=args.group_rows,
-                    group_cols=args.group_columns,
-                )
+    if args.png is not None:
+        # Worker processes share the log converted once to a memory-mapped store
+        store_path = cached_store(
+            args.log_file, os.path.join(os.path.dirname(png_path(args.png)), ".flips")
+        )
+        store = open_store(store_path)
+    else:
+        store = load_results(args.log_file)
+
+    # Attacks grouped by read count, in the order of the log
+    attack_sets: dict = {}
+    for attack_id, read_count in enumerate(store.attacks["read_count"].tolist()):
+        attack_sets.setdefault(read_count, []).append(attack_id)
+
+    # Plots with the attacks they show and the suffix of their png file
+    plots = []
+    for read_count, attack_ids in attack_sets.items():
         if args.aggressors_vs_victims:
-            plot_aggressors_vs_victims(
-                aggressors_vs_victims,
-                args.annotate,
-                args.png,
-                colorbar=not args.no_colorbar,
-                group_rows=args.group_rows,
-                group_cols=args.group_columns,
-            )
+            if any(str(store.attacks["key"][a]).startswith("sequential") for a in attack_ids):
+                print(
+                    "ERROR: Sequential attacks are not hammering a single row."
+                    " Unable to compare aggressors against victims."
+                )
+                exit()
+            plots.append((attack_ids, f"{read_count}"))
+        else:
+            # Otherwise plot each attack separately
+            for attack_id in attack_ids:
+                plots.append(([attack_id], f"{read_count}_{store.attacks['key'][attack_id]}"))
+
+    options = {
+        "aggressors_vs_victims": args.aggressors_vs_victims,
+        "annotate": args.annotate,
+        "colorbar": not args.no_colorbar,
+        "group_rows": args.group_rows,
+        "group_cols": args.group_columns,
+        "cols": COLS,
+    }
+    if args.png is None:
+        for attack_ids, _ in plots:
+            render_plot(store, attack_ids, None, options)
+    else:
+        jobs = []
+        for attack_ids, suffix in plots:
+            png = png_path(args.png)
+            if len(plots) > 1:
+                # Each plot gets its own file
+                name, ext = os.path.splitext(png)
+                png = f"{name}_{suffix}{ext}"
+            stamp = input_stamp([args.log_file], attack_ids=attack_ids, **options)
+            jobs.append((png, stamp, (store_path, attack_ids, png, options)))
+        rendered, skipped = render(render_png, jobs, processes=args.jobs, force=args.force)
+        print(f"Rendered {len(rendered)} png files, {len(skipped)} up to date")
@@ -9,22 +9,14 @@ import datetime
 import json
 from pathlib import Path
 
+from rowhammer_tester.scripts.flip_stats import dqs_with_flips
+from rowhammer_tester.scripts.render_jobs import cached_store, input_stamp, open_store, render
 from rowhammer_tester.scripts.utils import get_generated_file
 
 
 def get_dqs_on_col(data: dict, dq_pads: int = 64):
-    dq_flips: list[str] = []
-
-    # Calculate DQ from each single bitflip
-    for flip in data:
-        dq = flip % dq_pads
-        dq_flips.append(f"dq[{dq}]")
-
-    # Different bitflips might occur on the same DQ
-    # Remove duplicates
-    dq_flips = list(dict.fromkeys(dq_flips))
-
-    return dq_flips
+    # Different bitflips might occur on the same DQ, each DQ is listed once
+    return [f"dq[{dq}]" for dq in dqs_with_flips(data, dq_pads)]
 
 
 def process_aggr_vs_vict(data: dict, _dq_pads: int = 64):
@@ -212,9 +204,9 @@ def generate_output_files(
     dq_pads: int,
     cols: int,
     cols_step: int,
-    vis_dir: str,
+    vis_dir: Path,
     output_name: str,
-):
+) -> Path:
     # generate visualization data from logs of all attacks
     vis_data, rows, cols = get_vis_data(
         data, no_empty_rows, aggressors_vs_victims, cols, cols_step, dq_pads=dq_pads
@@ -225,19 +217,50 @@ def generate_output_files(
     with data_file.open("w") as fd:
         json.dump(vis_data, fd)
 
+    rows_name = "rows" if no_empty_rows else "rowsRange"
     vis_meta = get_vis_metadata(rows, cols, data_file.name, rows_name)
     # write meta file
     meta_file = (vis_dir / output_name).with_suffix(".json")
-    meta_files.append(meta_file)
     with meta_file.open("w") as fd:
         json.dump(vis_meta, fd)
 
-    return meta_files
+    return meta_file
+
+
+def render_vis(
+    store_path: str, attack_ids: list[int], options: dict, vis_dir: Path, output_name: str
+):
+    # Runs in worker processes, which open the memory-mapped store by path
+    store = open_store(store_path)
+    attacks = store.attacks
+    if options["aggressors_vs_victims"]:
+        # Victim rows of each aggressor
+        data = {
+            int(attacks["hammer_row_1"][a]): list(store.errors_in_rows(a).items())
+            for a in attack_ids
+        }
+        cols_step = 1
+    else:
+        data = {"errors_in_rows": store.errors_in_rows(attack_ids[0])}
+        if attacks["hammer_row_1"][attack_ids[0]] >= 0:
+            for name in ["hammer_row_1", "hammer_row_2"]:
+                data[name] = int(attacks[name][attack_ids[0]])
+        cols_step = options["cols"] // options["vis_columns"]
+    generate_output_files(
+        data,
+        options["no_empty_rows"],
+        options["aggressors_vs_victims"],
+        options["dq_pads"],
+        options["cols"],
+        cols_step,
+        vis_dir,
+        output_name,
+    )
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("log_file", help="file with log output")
+    parser.add_argument("log_file", help="file with log output (JSON, JSONL or a flip store)")
     parser.add_argument("vis_dir", help="directory where to put visualization json files")
     parser.add_argument(
         "--vis-columns", type=int, default=32, help="how many columns to show in resulting grid"
@@ -251,6 +274,14 @@ if __name__ == "__main__":
         help="visualize single aggressor attacks and their victims",
     )
     parser.add_argument("--dq-pads", type=int, default=64, help="number of memory DQ pads")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="generate files in N parallel processes"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="generate files even if the log and options did not change since the last run",
+    )
     args = parser.parse_args()
 
     # get module settings to calculate total number of rows and columns
@@ -261,78 +292,64 @@ if __name__ == "__main__":
     COLS = 2 ** settings["geom"]["colbits"]
     ROWS = 2 ** settings["geom"]["rowbits"]
 
-    log_file = Path(args.log_file)
-    with log_file.open() as fd:
-        log_data = json.load(fd)
-
     vis_dir = Path(args.vis_dir).resolve()
     vis_dir.mkdir(parents=True, exist_ok=True)
 
+    # Worker processes share the log converted once to a memory-mapped store
+    store_path = cached_store(args.log_file, str(vis_dir / ".flips"))
+    store = open_store(store_path)
+    attacks = store.attacks
+
+    # Attacks grouped by read count, in the order of the log
+    attack_sets: dict = {}
+    for attack_id, read_count in enumerate(attacks["read_count"].tolist()):
+        attack_sets.setdefault(read_count, []).append(attack_id)
+
+    # Output files with the attacks they show
+    outputs = []
+    for read_count, attack_ids in attack_sets.items():
+        if not args.aggressors_vs_victims:
+            for attack_id in attack_ids:
+                outputs.append(([attack_id], f"{read_count}_{attacks['key'][attack_id]}"))
+            continue
+        for attack_id in attack_ids:
+            if str(attacks["key"][attack_id]).startswith("sequential"):
+                print(
+                    "ERROR: Sequential attacks are not hammering a single row."
+                    " Unable to compare aggressors against victims."
+                )
+                exit()
+            if attacks["hammer_row_1"][attack_id] != attacks["hammer_row_2"][attack_id]:
+                print(
+                    "ERROR: Attacks are not hammering single rows."
+                    " Unable to plot aggressors against their victims."
+                    " Use `--row-pair-distance 0` to target single row at once."
+                )
+                exit()
+        outputs.append((attack_ids, f"{read_count}_aggressors_vs_victims"))
+
+    options = {
+        "aggressors_vs_victims": args.aggressors_vs_victims,
+        "no_empty_rows": args.no_empty_rows,
+        "dq_pads": args.dq_pads,
+        "cols": COLS,
+        "vis_columns": args.vis_columns,
+    }
+    jobs = []
     # list of meta file names
     # only files listed in viewer config can be browsed
     meta_files: list[Path] = []
-
-    if args.no_empty_rows:
-        rows_name = "rows"
-    else:
-        rows_name = "rowsRange"
-
-    # read_count / read_count_range level
-    for read_count, attack_set_results in log_data.items():
-        aggressors_vs_victims = {}
-        # Remove read_count as it's only disturbing here
-        if "read_count" in attack_set_results:
-            attack_set_results.pop("read_count")
-
-        # Single attack hierarchy
-        for attack, attack_results in attack_set_results.items():
-            if args.aggressors_vs_victims:
-                if attack.startswith("pair"):
-                    # Collect all rows data into single dict for later processing
-                    victim_rows = []
-                    for row in attack_results["errors_in_rows"].items():
-                        victim_rows.append(row)
-
-                    hammered_row_1 = attack_results["hammer_row_1"]
-                    hammered_row_2 = attack_results["hammer_row_2"]
-                    aggressors_vs_victims[hammered_row_1] = victim_rows
-
-                    if hammered_row_1 != hammered_row_2:
-                        print(
-                            "ERROR: Attacks are not hammering single rows."
-                            " Unable to plot aggressors against their victims."
-                            " Use `--row-pair-distance 0` to target single row at once."
-                        )
-                        exit()
-                else:
-                    print(
-                        "ERROR: Sequential attacks are not hammering a single row."
-                        " Unable to compare aggressors against victims."
-                    )
-                    exit()
-            else:
-                meta_files = generate_output_files(
-                    attack_results,
-                    args.no_empty_rows,
-                    args.aggressors_vs_victims,
-                    args.dq_pads,
-                    COLS,
-                    COLS // args.vis_columns,
-                    vis_dir,
-                    output_name=f"{read_count}_{attack}",
-                )
-
-    if args.aggressors_vs_victims:
-        meta_files = generate_output_files(
-            aggressors_vs_victims,
-            args.no_empty_rows,
-            args.aggressors_vs_victims,
-            args.dq_pads,
-            COLS,
-            cols_step=1,
-            vis_dir=vis_dir,
-            output_name=f"{read_count}_aggressors_vs_victims",
+    for attack_ids, output_name in outputs:
+        meta_file = (vis_dir / output_name).with_suffix(".json")
+        meta_files.append(meta_file)
+        stamp = input_stamp([args.log_file], attack_ids=attack_ids, **options)
+        jobs.append(
+            (str(meta_file), stamp, (store_path, attack_ids, options, vis_dir, output_name))
         )
+    rendered, skipped = render(
+        render_vis, jobs, processes=args.jobs, force=args.force, headless=False
+    )
+    print(f"Generated {len(rendered)} visualizations, {len(skipped)} up to date")
 
     # write config file
     vis_config = get_vis_config(meta_files)
@@ -1,15 +1,32 @@
 from math import ceil
 from rowhammer_tester.gateware.payload_executor import Encoder, OpCode, Decoder
 from rowhammer_tester.scripts.utils import (get_expected_execution_cycles, DRAMAddressConverter)
+from rowhammer_tester.payload.optimizer import optimize_payload
+from rowhammer_tester.payload.asm import disassemble
 import sys
 
 
 # returns the number of refreshes issued
+# with refresh_op=None no time is reserved for refreshes
 def encode_one_loop(*, unrolled, rolled, row_sequence, timings, encoder, bank, refresh_op, payload):
     tras = timings.tRAS
     trp = timings.tRP
     trefi = timings.tREFI
     trfc = timings.tRFC
+    if refresh_op is None:
+        for row in row_sequence * unrolled:
+            payload.extend(
+                [
+                    encoder.I(
+                        OpCode.ACT, timeslice=tras, address=encoder.address(bank=bank, row=row)),
+                    encoder.I(OpCode.PRE, timeslice=trp,
+                              address=encoder.address(col=1 << 10)),  # all
+                ])
+        jump_target = 2 * unrolled * len(row_sequence)
+        assert jump_target < 2**Decoder.LOOP_JUMP
+        payload.append(encoder.I(OpCode.LOOP, count=rolled, jump=jump_target))
+        return 0
+
     local_refreshes = 1
     payload.append(encoder.I(refresh_op, timeslice=trfc))
     # Accumulate an extra cycle for the jump at the end to be conservative
@@ -77,7 +94,8 @@ def generate_payload_from_row_list(
         payload_mem_size,
         refresh=False,
         verbose=False,
-        sys_clk_freq=None):
+        sys_clk_freq=None,
+        optimize=True):
     encoder = Encoder(bankbits=bankbits)
 
     tras = timings.tRAS
@@ -129,6 +147,13 @@ def generate_payload_from_row_list(
     payload.append(encoder.I(refresh_op, timeslice=1))
     payload.append(encoder.I(OpCode.NOOP, timeslice=0))  # STOP
 
+    if optimize:
+        payload, stats = optimize_payload(payload)
+        if verbose:
+            print(
+                "  Optimized payload: {} -> {} instructions".format(
+                    stats.instructions_before, stats.instructions_after))
+
     if verbose:
         expected_cycles = get_expected_execution_cycles(payload)
         print(
@@ -145,9 +170,7 @@ def generate_payload_from_row_list(
             time = ' = {:.3f} ms'.format(1 / sys_clk_freq * expected_cycles * 1e3)
         print('  Expected execution time = {} cycles'.format(expected_cycles) + time)
 
-        for instruction in payload:
-            op, *args = map(lambda p: p[1], instruction._parts)
-            print(op, *map(hex, args), sep="\t")
+        print(disassemble(encoder(payload), bankbits=bankbits), end='')
 
     if len(payload) > payload_mem_size // 4:
         print(
@@ -159,6 +182,63 @@ def generate_payload_from_row_list(
     return encoder(payload)
 
 
+def generate_payload_from_row_lists(
+        *,
+        hammers,
+        timings,
+        bankbits,
+        bank,
+        payload_mem_size,
+        verbose=False,
+        sys_clk_freq=None,
+        optimize=True):
+    """
+    Generates a single payload hammering several row sequences one after another.
+
+    ``hammers`` is a list of ``(row_sequence, read_count)``. Refresh is disabled for
+    the whole payload and no time is reserved for it, so each sequence is a single
+    loop with the row sequence not unrolled.
+    """
+    encoder = Encoder(bankbits=bankbits)
+
+    # First instruction after mode transition should be a NOOP that waits until tRFC is satisfied
+    payload = [encoder.I(OpCode.NOOP, timeslice=max(1, timings.tRFC - 2))]
+    for row_sequence, read_count in hammers:
+        if read_count == 0:
+            continue
+        encode_long_loop(
+            unrolled=1,
+            rolled=read_count,
+            row_sequence=list(row_sequence),
+            timings=timings,
+            encoder=encoder,
+            bank=bank,
+            refresh_op=None,
+            payload=payload)
+    payload.append(encoder.I(OpCode.NOOP, timeslice=0))  # STOP
+
+    if optimize:
+        payload, stats = optimize_payload(payload)
+
+    if verbose:
+        expected_cycles = get_expected_execution_cycles(payload)
+        print(
+            '  Payload size = {:5.2f}KB / {:5.2f}KB'.format(
+                4 * len(payload) / 2**10, payload_mem_size / 2**10))
+        print('  Payload row sequences = {}'.format(len(hammers)))
+        time = ''
+        if sys_clk_freq is not None:
+            time = ' = {:.3f} ms'.format(1 / sys_clk_freq * expected_cycles * 1e3)
+        print('  Expected execution time = {} cycles'.format(expected_cycles) + time)
+
+    if len(payload) > payload_mem_size // 4:
+        raise ValueError(
+            'Memory required for payload executor instructions ({} bytes) exceeds available payload memory ({} bytes)'
+            .format(len(payload) * 4, payload_mem_size))
+
+    return encoder(payload)
+
+
 def get_range_from_rows(wb, settings, row_nums):
     conv = DRAMAddressConverter.load()
     min_row = min(row_nums)
@@ -8,7 +8,7 @@ class PayloadGenerator():
     def get_by_name(name):
         return PayloadGenerator.subclasses[name]
 
-    def initialize(self, config):
+    def initialize(self, config, settings):
         raise NotImplementedError("Initialize attributes from config")
 
     def get_payload(self, *, settings, bank, payload_mem_size, sys_clk_freq=None):
@@ -10,8 +10,7 @@ from rowhammer_tester.scripts.utils import (get_expected_execution_cycles, valid
 
 from rowhammer_tester.scripts.playbook.row_generators import RowGenerator
 from rowhammer_tester.scripts.playbook.row_generators.half_double import HalfDoubleRowGenerator
-from rowhammer_tester.scripts.playbook.row_mappings import (
-    RowMapping, TrivialRowMapping, TypeARowMapping, TypeBRowMapping)
+from rowhammer_tester.scripts.playbook.row_mappings import load_row_mapping
 
 
 class HalfDoubleAnalysisState(Enum):
@@ -29,12 +28,12 @@ class HalfDoubleAnalysisPayloadGenerator(PayloadGenerator):
             "max_dilution", "fill_local"
         ])
 
-    def initialize(self, config):
+    def initialize(self, config, settings):
         self.module_config = config["payload_generator_config"]
         assert validate_keys(self.module_config, self._valid_module_keys)
 
-        row_mapping_name = self.module_config["row_mapping"]
-        self.row_mapping = RowMapping.get_by_name(row_mapping_name)
+        self.row_mapping = load_row_mapping(
+            self.module_config["row_mapping"], settings.geom.rowbits)
 
         self.max_total_read_count = self.module_config["max_total_read_count"]
         self.read_count_steps = self.module_config["read_count_steps"]
@@ -175,9 +174,12 @@ class HalfDoubleAnalysisPayloadGenerator(PayloadGenerator):
 
     def process_errors(self, settings, row_errors):
         logical_victim = self.row_generator.get_logical_victim(self.iteration)
-        row_errors_logical = {}
-        for row in row_errors:
-            row_errors_logical[self.row_mapping.physical_to_logical(row)] = (row, row_errors[row])
+        rows = list(row_errors)
+        logical_rows = self.row_mapping.to_logical(rows).tolist()
+        row_errors_logical = {
+            logical_row: (row, row_errors[row])
+            for logical_row, row in zip(logical_rows, rows)
+        }
         victim_flipped = False
         victim_errors = 0
 
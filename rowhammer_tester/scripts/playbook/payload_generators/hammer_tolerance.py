@@ -2,8 +2,9 @@ from collections import defaultdict
 from rowhammer_tester.scripts.playbook.payload_generators import PayloadGenerator
 from rowhammer_tester.scripts.playbook.lib import (
     generate_payload_from_row_list, get_range_from_rows)
-from rowhammer_tester.scripts.playbook.row_mappings import (
-    RowMapping, TrivialRowMapping, TypeARowMapping, TypeBRowMapping)
+from rowhammer_tester.scripts.playbook.row_mappings import load_row_mapping
+from rowhammer_tester.scripts.flip_stats import (
+    flips_per_beat, flips_per_chip, histogram, masks_to_bits)
 from rowhammer_tester.scripts.utils import validate_keys
 
 
@@ -15,12 +16,12 @@ class HammerTolerancePayloadGenerator(PayloadGenerator):
             "first_dummy_row"
         ])
 
-    def initialize(self, config):
+    def initialize(self, config, settings):
         self.module_config = config["payload_generator_config"]
         assert validate_keys(self.module_config, self._valid_module_keys)
 
-        row_mapping_name = self.module_config["row_mapping"]
-        self.row_mapping = RowMapping.get_by_name(row_mapping_name)
+        self.row_mapping = load_row_mapping(
+            self.module_config["row_mapping"], settings.geom.rowbits)
 
         self.max_iteration = self.module_config["max_iteration"]
         self.verbose = self.module_config["verbose"]
@@ -77,15 +78,6 @@ class HammerTolerancePayloadGenerator(PayloadGenerator):
             verbose=self.verbose,
             sys_clk_freq=sys_clk_freq)
 
-    def extract_bits(self, bit_string, first_bit, group_stride, group_size, nr_groups):
-        idx = first_bit
-        bits = ""
-        for group in range(nr_groups):
-            bits += bit_string[idx:(idx + group_size)]
-            idx += group_stride
-
-        return bits
-
     # Returns logical and physical row number for row_idx from the point of view of the
     # current iteration.
     def get_row_for_iter(self, row_idx):
@@ -126,36 +118,22 @@ class HammerTolerancePayloadGenerator(PayloadGenerator):
         return cls.bitcount(val ^ ref)
 
     def gather_full_stats(self, step, errors):
-        dq_bits = 64 // self.nr_chips
-        for addr, value, expected in errors:
-            flips = value ^ expected
-            flips_bin = format(flips, "512b")[::-1]
-            assert len(flips_bin) == 512
-            total_flip_count = 0
-            for bits in range(8):
-                beat_flips = flips_bin[bits * 64:(bits + 1) * 64]
-                flip_count = beat_flips.count('1')
-                assert flip_count < 64
-                if flip_count == 0:
-                    continue
-                total_flip_count += flip_count
-                self.beat_errors[step][flip_count] += 1
-                chip_count = 0
-                for chip in range(self.nr_chips):
-                    chip_flips_count = beat_flips[chip * dq_bits:(chip + 1) * dq_bits].count('1')
-                    if chip_flips_count != 0:
-                        self.chip_errors_per_beat[step][chip][chip_flips_count] += 1
-                    chip_count += 1
-
-                if chip_count > 0:
-                    self.chips_with_errors_per_beat[step][chip_count] += 1
-
-            for chip in range(self.nr_chips):
-                chip_flips = self.extract_bits(flips_bin, chip * dq_bits, 64, dq_bits, 8)
-                chip_flips_count = chip_flips.count('1')
-                if chip_flips_count != 0:
-                    self.chip_errors_per_read[step][chip][chip_flips_count] += 1
-            self.bit_errors[step] += total_flip_count
+        bits = masks_to_bits([value ^ expected for addr, value, expected in errors])
+        beat_flips = flips_per_beat(bits)
+        chip_beat_flips = flips_per_chip(bits, self.nr_chips, per_beat=True)
+
+        for count, n in histogram(beat_flips).items():
+            self.beat_errors[step][count] += n
+        # Only beats with errors count towards the number of chips with errors
+        chips_with_errors = (chip_beat_flips > 0).sum(axis=2)[beat_flips > 0]
+        for chips, n in histogram(chips_with_errors).items():
+            self.chips_with_errors_per_beat[step][chips] += n
+        for chip in range(self.nr_chips):
+            for count, n in histogram(chip_beat_flips[:, :, chip]).items():
+                self.chip_errors_per_beat[step][chip][count] += n
+            for count, n in histogram(chip_beat_flips[:, :, chip].sum(axis=1)).items():
+                self.chip_errors_per_read[step][chip][count] += n
+        self.bit_errors[step] += int(beat_flips.sum())
 
     def process_errors(self, settings, row_errors):
         step = ((self.iteration % self.iters_per_row) + 1) * self.read_count_step
@@ -5,8 +5,7 @@ from rowhammer_tester.scripts.utils import validate_keys
 from rowhammer_tester.scripts.playbook.row_generators import RowGenerator
 from rowhammer_tester.scripts.playbook.row_generators.even_rows import EvenRowGenerator
 from rowhammer_tester.scripts.playbook.row_generators.half_double import HalfDoubleRowGenerator
-from rowhammer_tester.scripts.playbook.row_mappings import (
-    RowMapping, TrivialRowMapping, TypeARowMapping, TypeBRowMapping)
+from rowhammer_tester.scripts.playbook.row_mappings import load_row_mapping
 
 
 class RowListPayloadGenerator(PayloadGenerator):
@@ -16,12 +15,12 @@ class RowListPayloadGenerator(PayloadGenerator):
             "row_mapping", "max_iteration", "fill_local"
         ])
 
-    def initialize(self, config):
+    def initialize(self, config, settings):
         self.module_config = config["payload_generator_config"]
         assert validate_keys(self.module_config, self._valid_module_keys)
 
-        row_mapping_name = self.module_config["row_mapping"]
-        self.row_mapping = RowMapping.get_by_name(row_mapping_name)
+        self.row_mapping = load_row_mapping(
+            self.module_config["row_mapping"], settings.geom.rowbits)
 
         row_generator_name = self.module_config["row_generator"]
         self.row_generator = RowGenerator.get_by_name(row_generator_name)
@@ -69,9 +68,12 @@ class RowListPayloadGenerator(PayloadGenerator):
         return cls.bitcount(val ^ ref)
 
     def process_errors(self, settings, row_errors):
-        row_errors_logical = {}
-        for row in row_errors:
-            row_errors_logical[self.row_mapping.physical_to_logical(row)] = (row, row_errors[row])
+        rows = list(row_errors)
+        logical_rows = self.row_mapping.to_logical(rows).tolist()
+        row_errors_logical = {
+            logical_row: (row, row_errors[row])
+            for logical_row, row in zip(logical_rows, rows)
+        }
         for logical_row in sorted(row_errors_logical.keys()):
             row, errors = row_errors_logical[logical_row]
             if len(errors) > 0:
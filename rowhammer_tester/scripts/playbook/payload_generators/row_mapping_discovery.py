@@ -0,0 +1,118 @@
+import json
+from rowhammer_tester.scripts.playbook.payload_generators import PayloadGenerator
+from rowhammer_tester.scripts.playbook.lib import (
+    generate_payload_from_row_lists, get_range_from_rows)
+from rowhammer_tester.scripts.playbook.row_mappings import (
+    RowMapping, RowMappingTable, XorRowMapping)
+from rowhammer_tester.scripts.playbook.row_mappings.discovery import (
+    attribute_victims, solve_row_mapping)
+from rowhammer_tester.scripts.utils import validate_keys
+
+
+class RowMappingDiscoveryPayloadGenerator(PayloadGenerator):
+    """
+    Discovers the logical to physical row mapping
+
+    Every row is hammered single-sided and the rows that flip are recorded as its
+    physical neighbours. Aggressors ``spacing`` rows apart are hammered in the
+    same round, one after another in a single payload, between a single fill and
+    verification. At the end the XOR rules making the most neighbours adjacent
+    are printed as a ``row_mapping`` config value (and saved to ``output_file``).
+    """
+    _valid_module_keys = set(
+        [
+            "read_count", "first_row", "nr_rows", "spacing", "max_rows_per_round",
+            "search_bits", "verbose", "fill_local", "output_file"
+        ])
+
+    def initialize(self, config, settings):
+        self.module_config = config["payload_generator_config"]
+        assert validate_keys(self.module_config, self._valid_module_keys)
+
+        self.read_count = self.module_config["read_count"]
+        self.first_row = self.module_config.get("first_row", 0)
+        self.nr_rows = self.module_config["nr_rows"]
+        # Aggressors of a round must be further apart than rows scrambled by the mapping
+        self.spacing = self.module_config.get("spacing", 32)
+        self.max_rows_per_round = self.module_config.get("max_rows_per_round", self.nr_rows)
+        self.search_bits = self.module_config.get("search_bits", 4)
+        self.verbose = self.module_config.get("verbose", False)
+        self.fill_local = self.module_config.get("fill_local", True)
+        self.output_file = self.module_config.get("output_file", None)
+        self.nr_all_rows = 2**settings.geom.rowbits
+
+        last_row = min(self.first_row + self.nr_rows, self.nr_all_rows)
+        self.rounds = []
+        for offset in range(self.spacing):
+            rows = list(range(self.first_row + offset, last_row, self.spacing))
+            for i in range(0, len(rows), self.max_rows_per_round):
+                self.rounds.append(rows[i:i + self.max_rows_per_round])
+        self.iteration = 0
+        self.pairs = []
+
+    def get_rows_range(self, wb, settings):
+        first = max(self.first_row - self.spacing, 0)
+        last = min(self.first_row + self.nr_rows + self.spacing, self.nr_all_rows) - 1
+        return get_range_from_rows(wb, settings, [first, last])
+
+    def get_memset_range(self, wb, settings):
+        if not self.fill_local:
+            return PayloadGenerator.get_memset_range(self, wb, settings)
+        return self.get_rows_range(wb, settings)
+
+    def get_memtest_range(self, wb, settings):
+        if not self.fill_local:
+            return PayloadGenerator.get_memtest_range(self, wb, settings)
+        return self.get_rows_range(wb, settings)
+
+    def get_payload(self, *, settings, bank, payload_mem_size, sys_clk_freq=None):
+        aggressors = self.rounds[self.iteration]
+        print(
+            "Round {} / {}: {} aggressors".format(
+                self.iteration + 1, len(self.rounds), len(aggressors)))
+        return generate_payload_from_row_lists(
+            hammers=[([row], self.read_count) for row in aggressors],
+            timings=settings.timing,
+            bankbits=settings.geom.bankbits,
+            bank=bank,
+            payload_mem_size=payload_mem_size,
+            verbose=self.verbose,
+            sys_clk_freq=sys_clk_freq)
+
+    def process_errors(self, settings, row_errors):
+        aggressors = self.rounds[self.iteration]
+        victims = [row for row, errors in row_errors.items() if len(errors) > 0]
+        pairs = attribute_victims(aggressors, victims, max_distance=self.spacing // 2)
+        self.pairs.extend(pairs.tolist())
+        if self.verbose:
+            for aggressor, victim in pairs.tolist():
+                print("  {} -> {}".format(aggressor, victim))
+        print("  {} rows with bit-flips, {} attributed".format(len(victims), len(pairs)))
+        self.iteration += 1
+
+    def done(self):
+        return self.iteration >= len(self.rounds)
+
+    def summarize(self):
+        print("Aggressor/victim pairs: {}".format(len(self.pairs)))
+        if not self.pairs:
+            print("No bit-flips found, increase read_count")
+            return
+        rules, adjacent = solve_row_mapping(self.pairs, nbits=self.search_bits)
+        print("Pairs made adjacent: {:.1f}%".format(100 * adjacent))
+
+        # Name the mapping if it is one of the known ones
+        table = RowMappingTable(XorRowMapping(rules), self.search_bits + 1)
+        for name, mapping in RowMapping.subclasses.items():
+            if name != "XorRowMapping" and mapping.bijective:
+                known = RowMappingTable(mapping, self.search_bits + 1)
+                if (known.forward == table.forward).all():
+                    print("Same as {}".format(name))
+                    break
+
+        row_mapping = {"row_mapping": {"xor": {str(bit): bits for bit, bits in rules.items()}}}
+        print(json.dumps(row_mapping))
+        if self.output_file is not None:
+            with open(self.output_file, "w") as f:
+                json.dump(row_mapping, f, indent=4)
+            print("Row mapping saved to: {}".format(self.output_file))
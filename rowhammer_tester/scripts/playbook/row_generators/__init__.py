@@ -8,6 +8,7 @@ class RowGenerator:
     def get_by_name(name):
         return RowGenerator.subclasses[name]
 
+    # row_mapping is a RowMappingTable
     def initialize(self, config, row_mapping):
         raise NotImplementedError("Initialize attributes from config")
 
@@ -1,7 +1,7 @@
+import numpy as np
+
 from rowhammer_tester.scripts.playbook.lib import get_range_from_rows
 from rowhammer_tester.scripts.playbook.row_generators import RowGenerator
-from rowhammer_tester.scripts.playbook.row_mappings import (
-    RowMapping, TrivialRowMapping, TypeARowMapping, TypeBRowMapping)
 from rowhammer_tester.scripts.utils import validate_keys
 
 
@@ -16,15 +16,9 @@ class EvenRowGenerator(RowGenerator):
         self.row_mapping = row_mapping
 
     def generate_rows(self, iteration):
-        row_list = []
-        for i in range(0, self.nr_rows):
-            row_list.append(
-                self.row_mapping.logical_to_physical((iteration + 2 * i) % self.max_row))
-
-        return row_list
+        logical_rows = (iteration + 2 * np.arange(self.nr_rows)) % self.max_row
+        return self.row_mapping.to_physical(logical_rows).tolist()
 
     def get_memory_range(self, wb, settings):
-        row_list = []
-        for row in range(self.max_row):
-            row_list.append(self.row_mapping.logical_to_physical(row))
+        row_list = self.row_mapping.to_physical(np.arange(self.max_row)).tolist()
         return get_range_from_rows(wb, settings, row_list)
@@ -1,7 +1,5 @@
 from collections import defaultdict
 from rowhammer_tester.scripts.playbook.row_generators import RowGenerator
-from rowhammer_tester.scripts.playbook.row_mappings import (
-    RowMapping, TrivialRowMapping, TypeARowMapping, TypeBRowMapping)
 from rowhammer_tester.scripts.utils import validate_keys
 
 
@@ -78,4 +76,4 @@ class HalfDoubleRowGenerator(RowGenerator):
         for row in sorted(row_dict.keys()):
             print('\tRow {} x {}'.format(row, row_dict[row]))
 
-        return list(map(self.row_mapping.logical_to_physical, row_list))
+        return self.row_mapping.to_physical(row_list).tolist()
@@ -1,5 +1,10 @@
+import numpy as np
+
+
 class RowMapping:
     subclasses = {}
+    # Whether every physical row has a logical row, see RowMappingTable
+    bijective = True
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -36,6 +41,7 @@ class TypeARowMapping(RowMapping):
 
 
 class TypeBRowMapping(RowMapping):
+    bijective = False  # only even physical rows are used
 
     def logical_to_physical(self, logical):
         return logical * 2
@@ -95,3 +101,97 @@ class SamsungRowMapping(RowMapping):
         else:
             # 第3位为0时，直接返回物理地址
             return physical
+
+
+class XorRowMapping(RowMapping):
+    """
+    Row mapping declared by XOR rules instead of code
+
+    ``rules`` maps a bit of the physical row number to the bits of the logical
+    row number XORed into it, e.g. ``{1: [3], 2: [3]}`` is the same as
+    TypeARowMapping. In configs use ``"row_mapping": {"xor": {"1": [3], "2": [3]}}``.
+    Raises ValueError if the rules do not make a bijective mapping.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = {int(bit): [int(b) for b in bits] for bit, bits in (rules or {}).items()}
+        # Only the bits up to the highest one used by the rules are changed,
+        # the inverse of that part is a small lookup table
+        nbits = max([bit for bit in self.rules] + [b for bits in self.rules.values() for b in bits],
+                    default=-1) + 1
+        self.low_mask = 2**nbits - 1
+        forward = self._apply(np.arange(2**nbits))
+        if len(np.unique(forward)) != len(forward):
+            raise ValueError("XOR rules {} do not make a bijective row mapping".format(rules))
+        self.inverse = np.empty_like(forward)
+        self.inverse[forward] = np.arange(2**nbits)
+
+    def _apply(self, logical):
+        physical = logical
+        for bit, bits in self.rules.items():
+            for b in bits:
+                physical = physical ^ (((logical >> b) & 1) << bit)
+        return physical
+
+    def logical_to_physical(self, logical):
+        return self._apply(logical)
+
+    def physical_to_logical(self, physical):
+        logical = (physical & ~self.low_mask) | self.inverse[physical & self.low_mask]
+        return logical if isinstance(logical, np.ndarray) else int(logical)
+
+
+class RowMappingTable:
+    """
+    RowMapping compiled into lookup tables over all 2**rowbits rows
+
+    Conversions are array lookups, so whole lists of rows are converted at once
+    with ``to_physical``/``to_logical`` (array in, array out). The scalar
+    ``logical_to_physical``/``physical_to_logical`` make the table usable
+    wherever a RowMapping is. When loading, the mapping is checked to be
+    a bijection (only an injection for mappings with ``bijective = False``)
+    and the inverse to really invert it, otherwise ValueError is raised.
+    """
+
+    def __init__(self, mapping, rowbits):
+        self.mapping = mapping
+        self.rowbits = rowbits
+        rows = np.arange(2**rowbits)
+        self.forward = np.fromiter(map(mapping.logical_to_physical, rows.tolist()), dtype=np.int64)
+        self.backward = np.fromiter(map(mapping.physical_to_logical, rows.tolist()), dtype=np.int64)
+
+        name = type(mapping).__name__
+        in_range = (self.forward >= 0) & (self.forward < len(rows))
+        if mapping.bijective and not in_range.all():
+            raise ValueError("{} maps rows out of {} row bits".format(name, rowbits))
+        physical = self.forward[in_range]
+        if len(np.unique(physical)) != len(physical):
+            raise ValueError("{} maps different rows to the same row".format(name))
+        if not np.array_equal(self.backward[physical], rows[in_range]):
+            raise ValueError("{} physical_to_logical is not the inverse mapping".format(name))
+
+    def to_physical(self, logical):
+        return self.forward[np.asarray(logical, dtype=np.int64)]
+
+    def to_logical(self, physical):
+        return self.backward[np.asarray(physical, dtype=np.int64)]
+
+    def logical_to_physical(self, logical):
+        return int(self.forward[logical])
+
+    def physical_to_logical(self, physical):
+        return int(self.backward[physical])
+
+
+def load_row_mapping(config, rowbits):
+    """
+    Row mapping from the ``row_mapping`` config value, compiled into a RowMappingTable
+
+    The value is either the name of a RowMapping class or a dict with XOR rules
+    (see XorRowMapping).
+    """
+    if isinstance(config, dict):
+        mapping = XorRowMapping(config["xor"])
+    else:
+        mapping = RowMapping.get_by_name(config)
+    return RowMappingTable(mapping, rowbits)
@@ -0,0 +1,77 @@
+import numpy as np
+
+
+def attribute_victims(aggressors, victims, max_distance):
+    """
+    Pairs victim rows with the aggressors that disturbed them
+
+    Each victim is paired with the nearest aggressor (in logical row numbers),
+    if it is not further than ``max_distance``. Victims that were hammered
+    themselves are skipped. Returns an array of (aggressor, victim) pairs.
+    """
+    aggressors = np.unique(np.asarray(aggressors, dtype=np.int64))
+    victims = np.setdiff1d(np.asarray(victims, dtype=np.int64), aggressors)
+    if len(aggressors) == 0 or len(victims) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    right = np.clip(np.searchsorted(aggressors, victims), 0, len(aggressors) - 1)
+    left = np.clip(right - 1, 0, len(aggressors) - 1)
+    nearest = np.where(
+        np.abs(aggressors[left] - victims) <= np.abs(aggressors[right] - victims),
+        aggressors[left], aggressors[right])
+    close = np.abs(nearest - victims) <= max_distance
+    return np.stack([nearest[close], victims[close]], axis=1)
+
+
+def _candidate_tables(nbits):
+    # Every nbits x nbits matrix over GF(2): row i is the mask of logical bits
+    # XORed into physical bit i. Returns the masks and the lookup tables of
+    # the invertible ones.
+    size = 2**nbits
+    matrices = np.arange(2**(nbits * nbits), dtype=np.int64)
+    masks = (matrices[:, None] >> (np.arange(nbits) * nbits)) & (size - 1)
+    values = np.arange(size)
+    parity = np.array([bin(v).count('1') & 1 for v in range(size)])
+    bits = parity[masks[:, :, None] & values[None, None, :]]
+    tables = (bits << np.arange(nbits)[None, :, None]).sum(axis=1)
+    invertible = (np.sort(tables, axis=1) == values).all(axis=1)
+    return masks[invertible], tables[invertible]
+
+
+def solve_row_mapping(pairs, nbits=4, chunk=4096):
+    """
+    Finds XOR rules making (aggressor, victim) pairs of logical rows physically adjacent
+
+    Every invertible linear mapping of the ``nbits`` lowest row bits (this covers
+    bit permutations and XOR rules) is scored by the number of pairs that it makes
+    adjacent; ties are won by the mapping with the fewest XOR terms. Returns the
+    rules in the XorRowMapping format and the fraction of pairs made adjacent.
+    """
+    assert nbits <= 4, 'Searching more than 4 row bits takes too long'
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    if len(pairs) == 0:
+        return {}, 0.0
+    size = 2**nbits
+    masks, tables = _candidate_tables(nbits)
+
+    # Only the low bits differ between candidates, so pairs reduce to a few distinct
+    # cases; ones further apart than a block of rows can never be adjacent
+    high_diff = (pairs[:, 0] >> nbits) - (pairs[:, 1] >> nbits)
+    cases = np.stack([pairs[:, 0] & (size - 1), pairs[:, 1] & (size - 1), high_diff], axis=1)
+    cases, counts = np.unique(cases[np.abs(high_diff) <= 1], axis=0, return_counts=True)
+
+    scores = np.zeros(len(tables), dtype=np.int64)
+    for start in range(0, len(tables), chunk):
+        t = tables[start:start + chunk]
+        diff = cases[:, 2] * size + t[:, cases[:, 0]] - t[:, cases[:, 1]]
+        scores[start:start + chunk] = ((np.abs(diff) == 1) * counts).sum(axis=1)
+
+    # Physical bit i is logical bit i XOR the rule bits, so bit i itself is a rule
+    # bit exactly when the mask does not contain it
+    rule_masks = masks ^ (1 << np.arange(nbits))
+    terms = np.array([[bin(m).count('1') for m in row] for row in rule_masks]).sum(axis=1)
+    best = np.lexsort((terms, -scores))[0]
+    rules = {}
+    for bit, mask in enumerate(rule_masks[best].tolist()):
+        if mask:
+            rules[bit] = [b for b in range(nbits) if mask >> b & 1]
+    return rules, float(scores[best] / len(pairs))
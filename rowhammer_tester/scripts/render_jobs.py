@@ -0,0 +1,109 @@
+"""
+Parallel rendering of outputs of result files (``logs2plot.py --png``, ``logs2vis.py``,
+``quick_heatmap.py``).
+
+A result file is converted once to a memory-mapped flip store (:func:`cached_store`), which
+the worker processes open by path, so that the bitflips are shared through the page cache
+instead of being pickled to each worker. Each output gets a stamp file next to it, with a
+digest of its inputs and of the options it was rendered with; :func:`render` skips outputs
+whose stamp is unchanged.
+"""
+
+import os
+import json
+import hashlib
+from multiprocessing import Pool
+
+from rowhammer_tester.scripts.flip_store import FlipStore, FlipStoreBuilder, import_file
+
+STAMP_SUFFIX = '.stamp'
+
+
+def _file_id(path):
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def input_stamp(paths, **options):
+    """Digest of the identity (path, size, modification time) of files and of options."""
+    state = {'files': [_file_id(path) for path in paths], 'options': options}
+    return hashlib.sha1(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def is_up_to_date(output, stamp):
+    try:
+        with open(output + STAMP_SUFFIX) as f:
+            return os.path.exists(output) and f.read() == stamp
+    except FileNotFoundError:
+        return False
+
+
+def write_stamp(output, stamp):
+    with open(output + STAMP_SUFFIX, 'w') as f:
+        f.write(stamp)
+
+
+def cached_store(path, cache_dir):
+    """
+    Path of a memory-mappable store (a directory of ``.npy`` files) with the bitflips of a
+    result file, imported into ``cache_dir`` unless it is up to date. Stores are returned
+    as they are.
+    """
+    if path.endswith('.npz') or os.path.isdir(path):
+        return path
+    store_dir = os.path.join(cache_dir, os.path.basename(path) + '.flips')
+    # The stamp of a directory is kept next to it
+    stamp = input_stamp([path])
+    if not is_up_to_date(store_dir, stamp):
+        builder = FlipStoreBuilder()
+        import_file(builder, path)
+        builder.build().save(store_dir)
+        write_stamp(store_dir, stamp)
+    return store_dir
+
+
+_stores = {}
+
+
+def open_store(path):
+    """Loads a store once per process, memory-mapped."""
+    if path not in _stores:
+        _stores[path] = FlipStore.load(path)
+    return _stores[path]
+
+
+def _headless():
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def _run(job):
+    function, output, stamp, args = job
+    function(*args)
+    write_stamp(output, stamp)
+    return output
+
+
+def render(function, jobs, processes=1, force=False, headless=True):
+    """
+    Calls ``function(*args)`` to render each job, given as ``(output, stamp, args)``, in
+    ``processes`` worker processes. Jobs whose output has an up to date stamp are skipped
+    unless ``force`` is set. With ``headless`` matplotlib uses a non-interactive backend.
+    ``function`` must be picklable, i.e. defined at the module level. Returns the lists of
+    rendered and skipped outputs.
+    """
+    todo, skipped = [], []
+    for output, stamp, args in jobs:
+        if force or not is_up_to_date(output, stamp):
+            todo.append((function, output, stamp, args))
+        else:
+            skipped.append(output)
+    initializer = _headless if headless else None
+    if processes > 1 and len(todo) > 1:
+        with Pool(processes, initializer=initializer) as pool:
+            rendered = list(pool.imap_unordered(_run, todo))
+    else:
+        if initializer is not None:
+            initializer()
+        rendered = [_run(job) for job in todo]
+    return rendered, skipped
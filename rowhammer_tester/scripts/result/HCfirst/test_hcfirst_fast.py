@@ -12,17 +12,11 @@ HCfirst快速测试脚本 - 性能优化版本
 
 import os
 import sys
-import subprocess
 import json
 import argparse
-import tempfile
-import shutil
 from datetime import datetime
 
-# 添加脚本路径以便导入hw_rowhammer
-script_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(script_dir)
-sys.path.append(parent_dir)
+from rowhammer_tester.scripts.campaign import Campaign, add_checkpoint_arguments, checkpoint_path
 
 def parse_args():
     """解析命令行参数"""
@@ -31,87 +25,27 @@ def parse_args():
     parser.add_argument('--count', type=int, default=100, help='测试行数 (默认: 100)')
     parser.add_argument('--max-hc', type=int, default=30000, help='最大hammer count (默认: 30000)')
     parser.add_argument('--min-hc', type=int, default=1000, help='最小hammer count (默认: 1000)')
-    parser.add_argument('--timeout', type=int, default=30, help='单次测试超时时间(秒) (默认: 30)')
     parser.add_argument('--output', type=str, help='输出文件名 (默认: 自动生成)')
     parser.add_argument('--test', action='store_true', help='测试模式：只处理前3行')
-    return parser.parse_args()
+    # 中断后可用 --checkpoint 文件 --resume 继续，已完成的测试不会重复
+    add_checkpoint_arguments(parser)
+    args = parser.parse_args()
+    args.checkpoint = checkpoint_path(parser, args)
+    return args
 
 class HCFirstFastTester:
-    def __init__(self, min_hc=1000, max_hc=50000, timeout=30):
+    def __init__(self, campaign, min_hc=1000, max_hc=50000):
+        self.campaign = campaign  # 所有测试共用一个连接
         self.min_hc = min_hc
         self.max_hc = max_hc
-        self.timeout = timeout
-        self.python_path = None
-        self.find_python()
-        
-    def find_python(self):
-        """查找Python可执行文件路径"""
-        # 检查是否在虚拟环境中
-        venv_paths = [
-            "/home/hc/rowhammer-tester-ZCU104/.venv/bin/python",
-            "/home/hc/rowhammer-tester/.venv/bin/python",
-            "python3",
-            "python"
-        ]
-        
-        for path in venv_paths:
-            try:
-                result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    self.python_path = path
-                    print(f"使用Python: {path}")
-                    if "3.10" in result.stdout:
-                        print(f"Python版本: {result.stdout.strip()}")
-                    return
-            except (FileNotFoundError, subprocess.TimeoutExpired):
-                continue
-        
-        print("错误: 未找到可用的Python解释器")
-        sys.exit(1)
     
     def run_hw_rowhammer(self, row, read_count):
-        """运行hw_rowhammer.py测试"""
-        cmd = [
-            self.python_path, "hw_rowhammer.py",
-            "--row-pairs", "const",
-            "--const-rows-pair", str(row), str(row),
-            "--read_count", str(read_count),
-            "--no-refresh",
-            "--nrows", "8192",
-            "--payload-executor"
-        ]
-        
-        # hw_rowhammer.py 在 scripts 目录中
-        scripts_path = "/home/hc/rowhammer-tester/rowhammer_tester/scripts"
-        
+        """运行单次测试，返回 (是否成功, 是否有bit flip, 错误信息)"""
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout, cwd=scripts_path)
-            return result.returncode == 0, result.stdout, result.stderr
-        except subprocess.TimeoutExpired:
-            return False, "", f"测试超时 (>{self.timeout}s)"
+            result = self.campaign.hammer((row, row), read_count, pattern='01_per_row')
         except Exception as e:
-            return False, "", str(e)
-    
-    def has_bitflips(self, stdout, stderr):
-        """检查是否有bit flip（改进版本）"""
-        # 检查输出中的错误计数
-        lines = stdout.strip().split('\n')
-        
-        # 查找Progress行中的错误计数 - 找最后一个Progress行
-        error_count = 0
-        for line in lines:
-            if "progress:" in line.lower() and "errors:" in line.lower():
-                # 提取错误数量
-                import re
-                error_match = re.search(r'errors:\s*(\d+)', line.lower())
-                if error_match:
-                    error_count = int(error_match.group(1))
-                    # 不要break，继续找下一个，这样找到的是最后一个
-        
-        # 也检查是否有"Bit-flips for row"这样的输出
-        bitflip_detected = any("bit-flips for row" in line.lower() for line in lines)
-        
-        return error_count > 0 or bitflip_detected
+            return False, False, str(e)
+        return True, result.has_bitflips, ""
     
     def exponential_search(self, row):
         """指数搜索找到大致范围"""
@@ -121,14 +55,14 @@ class HCFirstFastTester:
         current = self.min_hc
         while current <= self.max_hc:
             print(f"  测试 HC={current:,}")
-            success, stdout, stderr = self.run_hw_rowhammer(row, current)
+            success, bitflips, error = self.run_hw_rowhammer(row, current)
             
             if not success:
-                print(f"    测试失败: {stderr}")
+                print(f"    测试失败: {error}")
                 current *= 2
                 continue
             
-            if self.has_bitflips(stdout, stderr):
+            if bitflips:
                 print(f"    发现bit flip! 范围: {current//2} - {current}")
                 # 返回搜索范围
                 return max(current // 2, self.min_hc), current
@@ -149,14 +83,14 @@ class HCFirstFastTester:
             mid = (low + high) // 2
             print(f"  测试 HC={mid:,}")
             
-            success, stdout, stderr = self.run_hw_rowhammer(row, mid)
+            success, bitflips, error = self.run_hw_rowhammer(row, mid)
             
             if not success:
-                print(f"    测试失败: {stderr}")
+                print(f"    测试失败: {error}")
                 low = mid + 1
                 continue
             
-            if self.has_bitflips(stdout, stderr):
+            if bitflips:
                 print(f"    有bit flip")
                 first_flip = mid
                 high = mid - 1
@@ -215,24 +149,19 @@ class HCFirstFastTester:
 def main():
     args = parse_args()
     
-    # 创建测试器
-    tester = HCFirstFastTester(
-        min_hc=args.min_hc,
-        max_hc=args.max_hc,
-        timeout=args.timeout
-    )
-    
     print("HCfirst快速测试工具")
     print(f"测试范围: 行 {args.start} - {args.start + args.count - 1}")
     print(f"HammerCount范围: {args.min_hc:,} - {args.max_hc:,}")
-    print(f"超时时间: {args.timeout}s")
     if args.test:
         print("*** 测试模式 ***")
     print()
     
     # 开始测试
     start_time = datetime.now()
-    results, failed_rows = tester.test_rows(args.start, args.count, args.test)
+    with Campaign.connect(nrows=8192, no_refresh=True, payload_executor=True,
+                          checkpoint_path=args.checkpoint) as campaign:
+        tester = HCFirstFastTester(campaign, min_hc=args.min_hc, max_hc=args.max_hc)
+        results, failed_rows = tester.test_rows(args.start, args.count, args.test)
     end_time = datetime.now()
     
     # 统计结果
@@ -272,8 +201,7 @@ def main():
                 "duration_seconds": round(duration, 1),
                 "parameters": {
                     "min_hc": args.min_hc,
-                    "max_hc": args.max_hc,
-                    "timeout": args.timeout
+                    "max_hc": args.max_hc
                 }
             },
             "results": results
@@ -19,13 +19,11 @@ import os
 import sys
 import json
 import time
-import subprocess
-import tempfile
-import glob
-import shutil
 import argparse
 from datetime import datetime
 
+from rowhammer_tester.scripts.campaign import Campaign, add_checkpoint_arguments, checkpoint_path
+
 # ===== 可自定义配置参数 =====
 INITIAL_READ_COUNT = 20000        # 起始read_count值 (可自定义)
 # 已移除验证功能，找到bit翻转即确定HCfirst
@@ -35,9 +33,7 @@ MIN_READ_COUNT = 10000           # 最小read_count值
 MAX_READ_COUNT = 30000           # 最大read_count值
 
 # 结果保存目录
-RESULTS_DIR = "/home/hc/rowhammer-tester/rowhammer_tester/scripts/result/HCfirst"
-SCRIPT_DIR = "/home/hc/rowhammer-tester/rowhammer_tester/scripts"
-PYTHON_PATH = "/home/hc/rowhammer-tester-ZCU104/.venv/bin/python"  # 虚拟环境Python路径
+RESULTS_DIR = os.path.dirname(os.path.abspath(__file__))
 
 def parse_args():
     """解析命令行参数"""
@@ -50,7 +46,11 @@ def parse_args():
                        help='测试行数 (默认: 8192)')
     parser.add_argument('--precision', type=int, default=1,
                        help='精度控制：1=精确到个位, 10=精确到十位, 100=精确到百位 (默认: 1)')
-    return parser.parse_args()
+    # 中断后可用 --checkpoint 文件 --resume 继续，已完成的测试不会重复
+    add_checkpoint_arguments(parser)
+    args = parser.parse_args()
+    args.checkpoint = checkpoint_path(parser, args)
+    return args
 
 # 全局变量，在main函数中设置
 START_ROW = 0
@@ -58,7 +58,8 @@ TOTAL_ROWS = 8192
 PRECISION = 1  # 精度控制
 
 class SimpleHCFirstTester:
-    def __init__(self):
+    def __init__(self, campaign):
+        self.campaign = campaign  # 所有测试共用一个连接
         self.results = {}
         self.tested_count = 0
         self.success_count = 0
@@ -67,9 +68,6 @@ class SimpleHCFirstTester:
         # 创建结果目录
         os.makedirs(RESULTS_DIR, exist_ok=True)
         
-        # 创建临时目录用于log文件
-        self.temp_log_dir = tempfile.mkdtemp(prefix="hcfirst_logs_")
-        
         # 生成结果文件名
         # 根据实际测试范围生成文件名，不包含时间戳
         end_row = START_ROW + TOTAL_ROWS - 1
@@ -86,170 +84,21 @@ class SimpleHCFirstTester:
         print(f"初始read_count: {INITIAL_READ_COUNT:,}")
         print(f"精度控制: {self.precision} ({'个位' if self.precision == 1 else f'{self.precision}的倍数'})")
         print(f"不进行验证，找到bit翻转即确定HCfirst")
-        print(f"临时日志目录: {self.temp_log_dir}")
         print(f"结果文件: {self.result_file}")
         print("=" * 60)
 
     def run_test(self, row, read_count):
         """运行单次测试并返回详细结果"""
-        # 清理之前的临时文件
-        self.cleanup_temp_files()
-        
-        cmd = [
-            PYTHON_PATH, "hw_rowhammer.py",
-            "--row-pairs", "const",
-            "--const-rows-pair", str(row), str(row),
-            "--read_count", str(int(read_count)),
-            "--pattern", "all_1",
-            "--no-refresh",
-            "--payload-executor",
-            "--log-dir", self.temp_log_dir  # 使用临时目录
-        ]
-        
         try:
-            result = subprocess.run(cmd, cwd=SCRIPT_DIR, capture_output=True, text=True, timeout=300)
-            
-            if result.returncode == 0:
-                # 检查是否有bit翻转
-                lines = result.stdout.strip().split('\n')
-                
-                # 查找Progress行中的错误计数 - 需要找最后一个Progress行
-                error_count = 0
-                for line in lines:
-                    if "progress:" in line.lower() and "errors:" in line.lower():
-                        # 提取错误数量
-                        import re
-                        error_match = re.search(r'errors:\s*(\d+)', line.lower())
-                        if error_match:
-                            error_count = int(error_match.group(1))
-                            # 不要break，继续找下一个，这样找到的是最后一个
-                
-                # 如果有错误，读取详细的JSON日志
-                detailed_errors = None
-                if error_count > 0:
-                    detailed_errors = self.get_detailed_errors(row, read_count)
-                
-                return {
-                    'has_bitflips': error_count > 0,
-                    'error_count': error_count,
-                    'detailed_errors': detailed_errors
-                }
-            else:
-                print(f"      测试失败: {result.stderr.strip()}")
-                return None
-                
-        except subprocess.TimeoutExpired:
-            print(f"      测试超时")
-            return None
+            result = self.campaign.hammer((row, row), int(read_count), pattern='all_1')
         except Exception as e:
             print(f"      异常: {str(e)}")
             return None
 
-    def get_detailed_errors(self, row, read_count):
-        """从log目录中获取详细的错误信息"""
-        try:
-            # 查找最新的error_summary文件
-            pattern = os.path.join(self.temp_log_dir, "error_summary_*.json")
-            log_files = glob.glob(pattern)
-            
-            if not log_files:
-                return None
-                
-            # 获取最新的文件
-            latest_file = max(log_files, key=os.path.getmtime)
-            
-            with open(latest_file, 'r') as f:
-                data = json.load(f)
-            
-            # 查找对应read_count的数据
-            read_count_key = str(read_count)
-            if read_count_key in data:
-                pair_key = f"pair_{row}_{row}"
-                if pair_key in data[read_count_key]:
-                    return data[read_count_key][pair_key].get('errors_in_rows', {})
-            
-            return None
-        except Exception as e:
-            print(f"      读取详细错误失败: {e}")
-            return None
-
-    def cleanup_temp_files(self):
-        """清理临时日志文件"""
-        try:
-            pattern = os.path.join(self.temp_log_dir, "error_summary_*.json")
-            for file_path in glob.glob(pattern):
-                os.remove(file_path)
-        except Exception as e:
-            print(f"      清理临时文件失败: {e}")
-
-    def parse_hw_rowhammer_output(self, output, hammer_row, read_count):
-        """解析hw_rowhammer.py的输出，提取详细的bit翻转信息"""
-        import os
-        import glob
-        
-        lines = output.strip().split('\n')
-        
-        # 查找最后一个Progress行的错误计数
-        error_count = 0
-        for line in lines:
-            if "progress:" in line.lower() and "errors:" in line.lower():
-                import re
-                error_match = re.search(r'errors:\s*(\d+)', line.lower())
-                if error_match:
-                    error_count = int(error_match.group(1))
-        
-        if error_count == 0:
-            return {'has_bitflips': False}
-        
-        # 尝试读取生成的JSON文件获取详细信息
-        errors_in_rows = {}
-        
-        # 查找最新生成的error_summary文件
-        json_files = glob.glob("/tmp/error_summary_*.json")
-        if json_files:
-            # 选择最新的文件
-            latest_file = max(json_files, key=os.path.getmtime)
-            try:
-                with open(latest_file, 'r') as f:
-                    json_data = json.load(f)
-                    
-                # 提取错误信息
-                if str(read_count) in json_data:
-                    pair_key = f"pair_{hammer_row}_{hammer_row}"
-                    if pair_key in json_data[str(read_count)]:
-                        pair_data = json_data[str(read_count)][pair_key]
-                        if "errors_in_rows" in pair_data:
-                            errors_in_rows = pair_data["errors_in_rows"]
-                
-                # 删除临时文件
-                os.remove(latest_file)
-                
-            except Exception as e:
-                print(f"      读取JSON文件失败: {e}")
-        
-        # 如果没有从JSON文件获取到详细信息，从标准输出解析基本信息
-        if not errors_in_rows:
-            for line in lines:
-                # 查找"Bit-flips for row XXX: YYY"行
-                import re
-                row_match = re.match(r'Bit-flips for row\s+(\d+):\s+(\d+)', line.strip())
-                if row_match:
-                    victim_row = int(row_match.group(1))
-                    bitflip_count = int(row_match.group(2))
-                    
-                    errors_in_rows[victim_row] = {
-                        "bank": 0,
-                        "row": victim_row,
-                        "col": {
-                            "0": list(range(bitflip_count))  # 简化的bit位置
-                        },
-                        "bitflips": bitflip_count
-                    }
-        
         return {
-            'has_bitflips': True,
-            'error_count': error_count,
-            'errors_in_rows': errors_in_rows
+            'has_bitflips': result.has_bitflips,
+            'error_count': result.bitflips,
+            'detailed_errors': result.errors_in_rows if result.has_bitflips else None
         }
 
     def find_hcfirst(self, row):
@@ -439,10 +288,6 @@ class SimpleHCFirstTester:
         finally:
             self.save_results()
             self.print_summary(time.time() - start_time)
-            # 清理临时目录
-            if os.path.exists(self.temp_log_dir):
-                shutil.rmtree(self.temp_log_dir)
-                print(f"已清理临时目录: {self.temp_log_dir}")
 
     def print_summary(self, total_time):
         """打印测试总结"""
@@ -486,17 +331,10 @@ def main():
         TOTAL_ROWS = args.count
         print(f"=== 正常模式：测试{TOTAL_ROWS}行(从第{START_ROW}行开始) ===")
     
-    if not os.path.exists(SCRIPT_DIR):
-        print(f"错误: 目录不存在 {SCRIPT_DIR}")
-        return
-        
-    if not os.path.exists(os.path.join(SCRIPT_DIR, "hw_rowhammer.py")):
-        print(f"错误: hw_rowhammer.py 不存在")
-        return
-    
-    tester = SimpleHCFirstTester()
-    tester.run_all_tests()
-
+    with Campaign.connect(bank=0, column=512, no_refresh=True, payload_executor=True,
+                          checkpoint_path=args.checkpoint) as campaign:
+        tester = SimpleHCFirstTester(campaign)
+        tester.run_all_tests()
 
 if __name__ == "__main__":
     main()
@@ -68,10 +68,10 @@ def analyze_bitflip_data(json_file_path):
             print("-" * 60)
             
             # 按行号排序
-            sorted_rows = sorted(details.items(), key=lambda x: int(x[0]))
+            sorted_rows = sorted(details.items(), key=lambda x: int(x[1].get('row', x[0])))
             
             for row_str, row_info in sorted_rows:
-                row_num = int(row_str)
+                row_num = int(row_info.get('row', row_str))
                 col_data = row_info['col']
                 
                 for col_str, col_info in col_data.items():
@@ -114,7 +114,7 @@ def analyze_bitflip_data(json_file_path):
         
         for details in time_data['repeat_details']:
             for row_str, row_info in details.items():
-                all_affected_rows.add(int(row_str))
+                all_affected_rows.add(int(row_info.get('row', row_str)))
                 for col_str in row_info['col'].keys():
                     all_affected_cols.add(int(col_str))
     
@@ -18,10 +18,11 @@ import sys
 import json
 import time
 import numpy as np
-import subprocess
 from pathlib import Path
 from datetime import datetime
 
+from rowhammer_tester.scripts.campaign import Campaign
+
 # =============================================================================
 # 测试配置 - 直接在这里修改所有参数
 # =============================================================================
@@ -40,70 +41,23 @@ def generate_time_points(start, end, num_points):
     """生成均匀分布的时间点"""
     return np.linspace(start, end, num_points)
 
-def run_rowhammer_test(attack_time_sec):
+def run_rowhammer_test(campaign, attack_time_sec):
     """
     运行单次retention测试 (原rowhammer测试，实际为内存数据保持测试)
     
     Args:
+        campaign: 测试使用的Campaign (共用一个连接)
         attack_time_sec: 等待时间（秒）
         
     Returns:
         tuple: (总bit翻转数量, 详细错误信息)
     """
-    # 将秒转换为纳秒
-    attack_time_ns = int(attack_time_sec * 1e9)
-    
-    print(f"开始测试时间点: {attack_time_sec:.2f}s (attack_time_ns: {attack_time_ns})")
+    print(f"开始测试时间点: {attack_time_sec:.2f}s")
     
     try:
-        # 直接调用Python模块而不是subprocess，以获取详细的错误信息
-        import sys
-        from pathlib import Path
-        
-        # 确保能够导入rowhammer模块
-        scripts_path = Path(__file__).parent
-        sys.path.insert(0, str(scripts_path))
-        
-        from hw_rowhammer import HwRowHammer
-        from rowhammer import main as rowhammer_main
-        from utils import RemoteClient, get_litedram_settings
-        
-        # 创建连接
-        wb = RemoteClient()
-        wb.open()
-        
-        # 获取设置
-        settings = get_litedram_settings()
-        
-        # 创建HwRowHammer实例
-        row_hammer = HwRowHammer(
-            wb=wb,
-            settings=settings,
-            nrows=0,  # 在no_attack_time模式下无效，使用默认值
-            column=0,
-            bank=0,
-            rows_start=0,
-            no_refresh=True,
-            verbose=True,
-            payload_executor=False,
-            no_attack_time=attack_time_ns,
-            data_inversion=False
-        )
-        
-        # 生成测试模式
-        def pattern_generator(rows):
-            return {row: 0xffffffff for row in rows}  # all_1 pattern
-        
         # 运行测试
         print(f"  执行retention测试 (等待时间: {attack_time_sec:.2f}s)...")
-        errors_in_rows = row_hammer.run(
-            row_pairs=[],  # 空的row_pairs，因为使用no_attack_time模式
-            pattern_generator=pattern_generator,
-            read_count=0,  # 不相关，因为使用no_attack_time
-            verify_initial=True
-        )
-        
-        wb.close()
+        errors_in_rows = campaign.retention(attack_time_sec, pattern='all_1').errors_in_rows
         
         # 计算总的bit翻转数量和整理错误详情
         total_bitflips = 0
@@ -147,7 +101,7 @@ def run_rowhammer_test(attack_time_sec):
         traceback.print_exc()
         return 0, {}
 
-def run_time_series_test(start_time, end_time, num_points, num_repeats):
+def run_time_series_test(campaign, start_time, end_time, num_points, num_repeats):
     """运行完整的时间序列retention测试"""
     
     # 生成时间点
@@ -188,7 +142,7 @@ def run_time_series_test(start_time, end_time, num_points, num_repeats):
         for repeat in range(num_repeats):
             print(f"  重复 {repeat+1}/{num_repeats}...")
             
-            bitflips, details = run_rowhammer_test(attack_time)
+            bitflips, details = run_rowhammer_test(campaign, attack_time)
             repeat_results.append(bitflips)
             repeat_details.append(details)
             
@@ -420,20 +374,16 @@ def main():
         print(f"  文件后缀: {OUTPUT_SUFFIX}")
     print("=" * 60)
     
-    # 检查是否在正确的目录
-    if not os.path.exists('hw_rowhammer.py'):
-        print("错误: 找不到 hw_rowhammer.py 文件")
-        print("请确保在 rowhammer_tester/scripts 目录下运行此脚本")
-        sys.exit(1)
-    
     try:
         # 运行测试
-        results = run_time_series_test(
-            START_TIME, 
-            END_TIME, 
-            NUM_POINTS, 
-            NUM_REPEATS
-        )
+        with Campaign.connect(no_refresh=True, payload_executor=False, verbose=True) as campaign:
+            results = run_time_series_test(
+                campaign,
+                START_TIME, 
+                END_TIME, 
+                NUM_POINTS, 
+                NUM_REPEATS
+            )
         
         # 保存结果
         json_path, csv_path, analysis_path = save_results(
@@ -10,12 +10,13 @@ Rowhammer位翻转最短时间查找工具
 """
 
 import argparse
-import subprocess
 import sys
 import time
 import os
 from pathlib import Path
 
+from rowhammer_tester.scripts.campaign import Campaign
+
 # ============= 配置参数 =============
 # 默认测试时间范围 (秒)
 DEFAULT_START_TIME = 0.1    # 100ms
@@ -30,34 +31,24 @@ DEFAULT_REPEAT_COUNT = 5    # 每个时间点的重复测试次数
 
 # 测试参数
 DEFAULT_PATTERN = "all_1"   # 数据模式
-DEFAULT_EXTRA_ARGS = ["--no-refresh"]  # 额外的hw_rowhammer.py参数
 
 # 结果保存路径
 DEFAULT_RESULT_DIR = "result/retention"  # 默认结果保存目录
 # ===================================
 
-def run_bitflip_test(test_time_ns, pattern="all_1", extra_args=None, repeat_count=1):
+def run_bitflip_test(campaign, test_time_ns, pattern="all_1", repeat_count=1):
     """
     执行位翻转测试
     
     Args:
+        campaign: 测试使用的Campaign (共用一个连接)
         test_time_ns: 测试时间(纳秒)
         pattern: 数据模式
-        extra_args: 额外参数列表
         repeat_count: 重复测试次数
     
     Returns:
-        tuple: (是否发现位翻转, 所有测试输出, 位翻转统计)
+        tuple: (是否发现位翻转, 所有测试结果, 位翻转统计)
     """
-    if extra_args is None:
-        extra_args = []
-    
-    cmd = [
-        "python", "hw_rowhammer.py",
-        "--no-attack-time", str(int(test_time_ns)),
-        "--pattern", pattern
-    ] + extra_args
-    
     all_outputs = []
     bitflip_results = []
     
@@ -66,50 +57,21 @@ def run_bitflip_test(test_time_ns, pattern="all_1", extra_args=None, repeat_coun
     for repeat in range(repeat_count):
         try:
             if repeat_count > 1:
-                print(f"      第 {repeat + 1}/{repeat_count} 次: {' '.join(cmd)}")
-            else:
-                print(f"    执行命令: {' '.join(cmd)}")
+                print(f"      第 {repeat + 1}/{repeat_count} 次: 等待 {test_time_ns / 1e9:.6f}s")
             
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=120  # 2分钟超时
-            )
-            
-            output = result.stdout + result.stderr
-            has_bitflips = "Bit-flips" in output
+            result = campaign.retention(test_time_ns / 1e9, pattern=pattern)
             
-            # 提取位翻转数量
-            bitflip_count = 0
-            if has_bitflips:
-                for line in output.split('\n'):
-                    if "Bit-flips for row" in line:
-                        try:
-                            # 解析 "Bit-flips for row XXX: N" 格式
-                            bitflip_count += int(line.split(':')[-1].strip())
-                        except (ValueError, IndexError):
-                            pass
-            
-            all_outputs.append(output)
+            all_outputs.append(result)
             bitflip_results.append({
-                'has_bitflips': has_bitflips,
-                'bitflip_count': bitflip_count,
+                'has_bitflips': result.has_bitflips,
+                'bitflip_count': result.bitflips,
                 'repeat': repeat + 1
             })
             
             if repeat_count > 1:
-                status = f"发现 {bitflip_count} 个位翻转" if has_bitflips else "无位翻转"
+                status = f"发现 {result.bitflips} 个位翻转" if result.has_bitflips else "无位翻转"
                 print(f"      结果: {status}")
                 
-        except subprocess.TimeoutExpired:
-            print(f"      ⚠️ 第 {repeat + 1} 次测试超时 (>120s)")
-            all_outputs.append("测试超时")
-            bitflip_results.append({
-                'has_bitflips': False,
-                'bitflip_count': 0,
-                'repeat': repeat + 1
-            })
         except Exception as e:
             print(f"      ❌ 第 {repeat + 1} 次执行错误: {e}")
             all_outputs.append(str(e))
@@ -132,26 +94,23 @@ def run_bitflip_test(test_time_ns, pattern="all_1", extra_args=None, repeat_coun
         'details': bitflip_results
     }
 
-def binary_search_min_time(start_time, end_time, precision=None, max_iterations=None, 
-                          pattern="all_1", extra_args=None, repeat_count=3):
+def binary_search_min_time(campaign, start_time, end_time, precision=None, max_iterations=None,
+                          pattern="all_1", repeat_count=3):
     """
     二分查找最短位翻转时间
     
     Args:
+        campaign: 测试使用的Campaign
         start_time: 起始时间(秒)
         end_time: 结束时间(秒) 
         precision: 时间精度(秒)，与max_iterations二选一
         max_iterations: 最大迭代次数，与precision二选一
         pattern: 数据模式
-        extra_args: 额外参数
         repeat_count: 每个时间点的重复测试次数
     
     Returns:
         tuple: (最短时间(秒), 测试日志列表)
     """
-    if extra_args is None:
-        extra_args = []
-    
     low_ns = int(start_time * 1e9)  # 转换为纳秒
     high_ns = int(end_time * 1e9)
     best_time_ns = -1
@@ -166,7 +125,7 @@ def binary_search_min_time(start_time, end_time, precision=None, max_iterations=
         print(f"   最大迭代: {max_iterations}次")
     print(f"   重复测试: 每个时间点测试 {repeat_count} 次")
     print(f"   数据模式: {pattern}")
-    print(f"   额外参数: {' '.join(extra_args)}")
+    print(f"   刷新: {'关闭' if campaign.row_hammer.no_refresh else '开启'}")
     print("=" * 70)
     
     while low_ns <= high_ns:
@@ -189,7 +148,7 @@ def binary_search_min_time(start_time, end_time, precision=None, max_iterations=
         print(f"当前范围: [{low_ns/1e9:.6f}s, {high_ns/1e9:.6f}s]")
         
         has_bitflips, outputs, bitflip_stats = run_bitflip_test(
-            mid_ns, pattern, extra_args, repeat_count
+            campaign, mid_ns, pattern, repeat_count
         )
         
         log_entry = {
@@ -222,7 +181,7 @@ def binary_search_min_time(start_time, end_time, precision=None, max_iterations=
         # 验证结果
         print(f"\n🔬 验证结果...")
         has_bitflips, _, verify_stats = run_bitflip_test(
-            best_time_ns, pattern, extra_args, repeat_count
+            campaign, best_time_ns, pattern, repeat_count
         )
         if has_bitflips:
             verify_rate = verify_stats['success_rate'] * 100
@@ -256,7 +215,7 @@ def save_result_summary(min_time, test_params, test_log, result_dir=DEFAULT_RESU
             f.write(f"  结束时间: {test_params['end_time']:.3f}s\n")
             f.write(f"  重复次数: {test_params['repeat_count']}次/时间点\n")
             f.write(f"  数据模式: {test_params['pattern']}\n")
-            f.write(f"  额外参数: {' '.join(test_params['extra_args'])}\n")
+            f.write(f"  刷新: {'开启' if test_params['refresh'] else '关闭'}\n")
             if test_params.get('precision'):
                 f.write(f"  时间精度: {test_params['precision']:.6f}s\n")
             if test_params.get('max_iterations'):
@@ -321,8 +280,8 @@ def main():
   # 自定义结果保存目录
   python find_min_bitflip_time.py --result-dir ./my_results
   
-  # 添加额外测试参数
-  python find_min_bitflip_time.py --extra-args "--bank 1 --column 256"
+  # 测试时保持刷新开启
+  python find_min_bitflip_time.py --refresh
         """
     )
     
@@ -342,8 +301,10 @@ def main():
                        help=f'数据模式, 默认: {DEFAULT_PATTERN}')
     parser.add_argument('--repeat-count', type=int, default=DEFAULT_REPEAT_COUNT,
                        help=f'每个时间点的重复测试次数, 默认: {DEFAULT_REPEAT_COUNT}')
-    parser.add_argument('--extra-args', default=' '.join(DEFAULT_EXTRA_ARGS),
-                       help=f'额外的hw_rowhammer.py参数, 默认: "{" ".join(DEFAULT_EXTRA_ARGS)}"')
+    parser.add_argument('--refresh', action='store_true',
+                       help='测试时不关闭刷新 (默认关闭刷新)')
+    parser.add_argument('--srv', action='store_true',
+                       help='启动LiteX server')
     parser.add_argument('--result-dir', default=DEFAULT_RESULT_DIR,
                        help=f'结果保存目录, 默认: {DEFAULT_RESULT_DIR}')
     parser.add_argument('--no-save', action='store_true',
@@ -364,9 +325,6 @@ def main():
         print("❌ 错误: 重复次数必须大于0")
         sys.exit(1)
     
-    # 解析额外参数
-    extra_args = args.extra_args.split() if args.extra_args.strip() else []
-    
     # 确定停止条件
     precision = args.precision if not args.max_iterations else None
     max_iterations = args.max_iterations if args.max_iterations else DEFAULT_MAX_ITERATIONS
@@ -376,17 +334,18 @@ def main():
     
     # 执行二分查找
     try:
-        min_time, test_log = binary_search_min_time(
-            args.start_time, args.end_time, precision, max_iterations,
-            args.pattern, extra_args, args.repeat_count
-        )
+        with Campaign.connect(srv=args.srv, no_refresh=not args.refresh) as campaign:
+            min_time, test_log = binary_search_min_time(
+                campaign, args.start_time, args.end_time, precision, max_iterations,
+                args.pattern, args.repeat_count
+            )
         
         # 准备测试参数用于保存结果
         test_params = {
             'start_time': args.start_time,
             'end_time': args.end_time,
             'pattern': args.pattern,
-            'extra_args': extra_args,
+            'refresh': args.refresh,
             'precision': precision,
             'max_iterations': max_iterations,
             'repeat_count': args.repeat_count
@@ -405,11 +364,8 @@ def main():
         
         if min_time:
             print(f"   🎯 最短位翻转时间: {min_time:.6f}s")
-            if not args.no_log:
-                if log_path:
-                    print(f"   📄 详细日志: {log_path}")
-                if summary_path:
-                    print(f"   � 结果摘要: {summary_path}")
+            if summary_path:
+                print(f"   📋 结果摘要: {summary_path}")
             print(f"\n✅ 测试完成！最短位翻转时间为 {min_time:.6f} 秒")
         else:
             print(f"   ⚠️ 未在指定范围内找到位翻转")
@@ -11,6 +11,9 @@ import matplotlib.pyplot as plt
 from matplotlib.colors import LogNorm
 import argparse
 from collections import defaultdict
+from pathlib import Path
+
+from rowhammer_tester.scripts.render_jobs import cached_store, input_stamp, open_store, render
 
 def extract_row_col_from_data(row_key, col_key, bitflip_position):
     """从已处理的数据中提取真实的行列地址（已经是物理地址，无需再次计算）"""
@@ -49,51 +52,8 @@ def extract_bitflip_positions(raw_data, dram_rows=8192, dram_cols=1024):
         }
     return all_positions
 
-def plot_quick_heatmap(json_file, time_point=None, save_plot=True):
-    """快速绘制热力图"""
-    print(f"Loading file: {json_file}")
-    
-    with open(json_file, 'r') as f:
-        data = json.load(f)
-    
-    # 提取数据
-    raw_data = data.get('raw_data', {})
-    metadata = data.get('metadata', {})
-    
-    # 提取位翻转位置
-    all_positions = extract_bitflip_positions(raw_data)
-    
-    # 选择要绘制的时间点
-    if time_point is None:
-        # 找到位翻转最多的时间点
-        max_flips = 0
-        best_time_key = None
-        for time_key, time_data in all_positions.items():
-            total_flips = sum(time_data['positions'].values())
-            if total_flips > max_flips:
-                max_flips = total_flips
-                best_time_key = time_key
-    else:
-        # 查找最接近指定时间点的数据
-        best_time_key = None
-        min_diff = float('inf')
-        for time_key, time_data in all_positions.items():
-            diff = abs(time_data['attack_time'] - time_point)
-            if diff < min_diff:
-                min_diff = diff
-                best_time_key = time_key
-    
-    if best_time_key is None:
-        print("No valid data found")
-        return
-    
-    # 创建散点图数据
-    time_data = all_positions[best_time_key]
-    attack_time = time_data['attack_time']
-    positions = time_data['positions']
-    
-    print(f"Creating scatter plot for {len(positions)} positions")
-    
+def draw_heatmap(positions, attack_time, num_repeats):
+    """绘制一个时间点的散点图，positions: {(row, col): 翻转次数}"""
     # 绘制散点图 - 显示整个DRAM的位翻转位置
     plt.figure(figsize=(15, 12))
     
@@ -106,7 +66,7 @@ def plot_quick_heatmap(json_file, time_point=None, save_plot=True):
         for (row, col), count in positions.items():
             rows.append(row)
             cols.append(col)
-            counts.append(count / metadata.get('num_repeats', 1))  # 标准化为平均值
+            counts.append(count / num_repeats)  # 标准化为平均值
         
         # 创建散点图，缩小点的大小
         sizes = [c * 20 + 5 for c in counts]  # 减小点的大小：从50+10改为20+5
@@ -161,6 +121,53 @@ def plot_quick_heatmap(json_file, time_point=None, save_plot=True):
                  bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
     
     plt.tight_layout()
+
+def plot_quick_heatmap(json_file, time_point=None, save_plot=True):
+    """快速绘制热力图"""
+    print(f"Loading file: {json_file}")
+    
+    with open(json_file, 'r') as f:
+        data = json.load(f)
+    
+    # 提取数据
+    raw_data = data.get('raw_data', {})
+    metadata = data.get('metadata', {})
+    
+    # 提取位翻转位置
+    all_positions = extract_bitflip_positions(raw_data)
+    
+    # 选择要绘制的时间点
+    if time_point is None:
+        # 找到位翻转最多的时间点
+        max_flips = 0
+        best_time_key = None
+        for time_key, time_data in all_positions.items():
+            total_flips = sum(time_data['positions'].values())
+            if total_flips > max_flips:
+                max_flips = total_flips
+                best_time_key = time_key
+    else:
+        # 查找最接近指定时间点的数据
+        best_time_key = None
+        min_diff = float('inf')
+        for time_key, time_data in all_positions.items():
+            diff = abs(time_data['attack_time'] - time_point)
+            if diff < min_diff:
+                min_diff = diff
+                best_time_key = time_key
+    
+    if best_time_key is None:
+        print("No valid data found")
+        return
+    
+    # 创建散点图数据
+    time_data = all_positions[best_time_key]
+    attack_time = time_data['attack_time']
+    positions = time_data['positions']
+    
+    print(f"Creating scatter plot for {len(positions)} positions")
+    
+    draw_heatmap(positions, attack_time, metadata.get('num_repeats', 1))
     
     # 保存图片
     if save_plot:
@@ -191,8 +198,29 @@ def plot_quick_heatmap(json_file, time_point=None, save_plot=True):
     print(f"Affected positions: {len(positions)}")
     print(f"Number of repeats: {metadata.get('num_repeats', 1)}")
 
-def generate_all_heatmaps(json_file, save_plot=True):
+def positions_from_store(store, attack_ids, dram_rows=8192, dram_cols=1024):
+    """位翻转位置 {(row, col): 翻转次数}，来自列式flip store中的若干次攻击"""
+    rows = np.concatenate([store.attack_flips(a)['row'] for a in attack_ids]).astype(np.int64)
+    cols = np.concatenate([store.attack_flips(a)['col'] for a in attack_ids]).astype(np.int64)
+    mask = (rows < dram_rows) & (cols < dram_cols)
+    cells, counts = np.unique(rows[mask] * dram_cols + cols[mask], return_counts=True)
+    return {(row, col): count for row, col, count in zip(
+        (cells // dram_cols).tolist(), (cells % dram_cols).tolist(), counts.tolist())}
+
+def render_time_point(store_path, attack_ids, attack_time, output_path):
+    """在工作进程中绘制一个时间点并保存（无界面后端）"""
+    store = open_store(store_path)
+    positions = positions_from_store(store, attack_ids)
+    # 每次重复是store中的一次攻击
+    draw_heatmap(positions, attack_time, len(attack_ids))
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+def generate_all_heatmaps(json_file, save_plot=True, jobs=1, force=False):
     """为所有时间点生成热力图"""
+    if save_plot:
+        return save_all_heatmaps(json_file, jobs=jobs, force=force)
+
     print(f"Loading file: {json_file}")
     
     with open(json_file, 'r') as f:
@@ -213,18 +241,50 @@ def generate_all_heatmaps(json_file, save_plot=True):
     
     print(f"\nCompleted! Generated {len(time_points)} heatmaps.")
 
+def save_all_heatmaps(json_file, jobs=1, force=False):
+    """
+    并行保存所有时间点的热力图（--jobs 个进程，无界面后端）。
+    JSON只解析一次并转为内存映射的flip store，各进程共享；输入未变化的图片跳过。
+    """
+    input_path = Path(json_file)
+    output_dir = input_path.parent / "photo"
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    store_path = cached_store(json_file, str(output_dir / ".flips"))
+    store = open_store(store_path)
+
+    # 每个时间点的所有重复
+    time_points = {}
+    for attack_id, key in enumerate(store.attacks['key'].tolist()):
+        time_points.setdefault(key, []).append(attack_id)
+
+    render_jobs = []
+    for key, attack_ids in time_points.items():
+        attack_time = float(store.attacks['attack_time'][attack_ids[0]])
+        output_path = str(output_dir / f"bitflip_heatmap_{attack_time:.2f}s.png")
+        stamp = input_stamp([json_file], time_point=key)
+        render_jobs.append((output_path, stamp, (store_path, attack_ids, attack_time, output_path)))
+
+    print(f"Found {len(render_jobs)} time points, generating heatmaps with {jobs} jobs...")
+    rendered, skipped = render(render_time_point, render_jobs, processes=jobs, force=force)
+    print(f"\nCompleted! Generated {len(rendered)} heatmaps, {len(skipped)} up to date.")
+
 def main():
     parser = argparse.ArgumentParser(description='Quick bitflip heatmap visualization')
     parser.add_argument('json_file', help='输入的JSON测试结果文件')
     parser.add_argument('--time', '-t', type=float, help='Specify time point (seconds)')
     parser.add_argument('--save', '-s', action='store_true', help='Save plot to file')
     parser.add_argument('--all', '-a', action='store_true', help='Generate heatmaps for all time points')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='With --all --save, render time points in N parallel processes')
+    parser.add_argument('--force', action='store_true',
+                        help='With --all --save, render heatmaps even if the input did not change')
     
     args = parser.parse_args()
     
     if args.all:
         # 生成所有时间点的热力图
-        generate_all_heatmaps(args.json_file, save_plot=args.save)
+        generate_all_heatmaps(args.json_file, save_plot=args.save, jobs=args.jobs, force=args.force)
     else:
         plot_quick_heatmap(args.json_file, args.time, save_plot=args.save)
 
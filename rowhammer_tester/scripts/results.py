@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Streaming storage of Rowhammer test results.
+
+:class:`ResultWriter` appends one compact JSON record per attack to a JSONL file as soon
+as the attack finishes, so an interrupted campaign keeps everything measured so far and
+memory use does not grow with the campaign. Each record holds the read count, the key of
+the attack (e.g. ``pair_10_12``) and the entry that ``error_summary_*.json`` files keep
+under that key::
+
+    {"read_count": 1000000, "key": "pair_10_12", "entry": {"hammer_row_1": 10, ...}}
+
+:func:`to_legacy` (and this script) converts the records back to the ``error_summary_*.json``
+layout used by ``logs2plot.py`` and ``logs2vis.py``. :class:`Checkpoint` uses the same files
+to resume interrupted campaigns.
+"""
+
+import os
+import gzip
+import json
+import time
+import zlib
+import argparse
+
+
+class ResultWriter:
+    """
+    Appends result records to a JSONL file.
+
+    Records are flushed to the OS after every write and synced to the disk at most every
+    ``fsync_interval`` seconds (and on :meth:`close`). With ``compress=True`` the records
+    are also written to a gzip sidecar (``path + '.gz'``), flushed at each sync so that it
+    stays readable after a crash. The sidecar is written again from the records already in
+    the file when it is opened: after a crash it ends with an unfinished gzip member, and
+    members appended after that one could not be read back.
+    """
+
+    def __init__(self, path, *, fsync_interval=10.0, compress=False):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.file = open(path, 'a')
+        self.gzip = None
+        if compress:
+            self.gzip = gzip.GzipFile(path + '.gz', 'wb')
+            with open(path, 'rb') as f:
+                for line in f:
+                    if line.endswith(b'\n'):
+                        self.gzip.write(line)
+        self.last_sync = time.monotonic()
+
+    def write(self, read_count, key, entry):
+        line = json.dumps(
+            {
+                'read_count': read_count,
+                'key': key,
+                'entry': entry
+            }, separators=(',', ':')) + '\n'
+        self.file.write(line)
+        self.file.flush()
+        if self.gzip is not None:
+            self.gzip.write(line.encode())
+        if time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        if self.gzip is not None:
+            self.gzip.flush(zlib.Z_SYNC_FLUSH)
+            os.fsync(self.gzip.fileobj.fileno())
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.sync()
+        self.file.close()
+        if self.gzip is not None:
+            self.gzip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Checkpoint:
+    """
+    Units of work completed by a campaign, stored as records of a JSONL results file.
+
+    A unit is identified by its read count and key. Records already present in the file are
+    loaded when it is opened and new ones are appended, so opening the file of an
+    interrupted campaign allows to skip the units completed before the interruption.
+    Keyword arguments are forwarded to :class:`ResultWriter`.
+    """
+
+    def __init__(self, path, **kwargs):
+        self.path = path
+        self.completed = {}
+        if os.path.exists(path):
+            for record in read_records(path):
+                self.completed[(record['read_count'], record['key'])] = record['entry']
+            _drop_partial_record(path)
+        self.writer = ResultWriter(path, **kwargs)
+
+    def get(self, read_count, key):
+        """Returns the entry of a unit completed before opening the file, or None."""
+        return self.completed.get((read_count, key))
+
+    def add(self, read_count, key, entry):
+        self.writer.write(read_count, key, entry)
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _drop_partial_record(path):
+    # Remove a record cut by an interruption, so that new records start on a new line
+    with open(path, 'rb+') as f:
+        data = f.read()
+        f.truncate(data.rfind(b'\n') + 1)
+
+
+def _gzip_lines(path):
+    # Unlike gzip.open, returns the data of a stream cut after the last flush
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = b''
+    while raw:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        data += decompressor.decompress(raw)
+        if not decompressor.eof:
+            break
+        raw = decompressor.unused_data
+    return data.decode().splitlines(keepends=True)
+
+
+def read_records(path):
+    """
+    Yields records from a JSONL results file (gzip-compressed if the name ends with .gz).
+    A truncated last line, left by an interrupted write, is skipped.
+    """
+    if path.endswith('.gz'):
+        yield from _parse_lines(_gzip_lines(path))
+    else:
+        with open(path) as f:
+            yield from _parse_lines(f)
+
+
+def _parse_lines(lines):
+    for line in lines:
+        if not line.endswith('\n'):
+            break
+        if line.strip():
+            yield json.loads(line)
+
+
+def to_legacy(records):
+    """Groups records into the ``error_summary_*.json`` layout: ``{read_count: {key: entry}}``."""
+    summary = {}
+    for record in records:
+        count = record['read_count']
+        summary.setdefault(str(count), {'read_count': count})[record['key']] = record['entry']
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert JSONL results to the error_summary_*.json layout')
+    parser.add_argument('input', help='JSONL results file (optionally .gz)')
+    parser.add_argument('output', help='Output JSON file')
+    args = parser.parse_args()
+
+    with open(args.output, 'w') as f:
+        json.dump(to_legacy(read_records(args.input)), f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
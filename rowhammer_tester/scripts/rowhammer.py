@@ -2,6 +2,7 @@
 
 import sys
 import time
+import bisect
 import random
 import argparse
 import json
@@ -11,8 +12,12 @@ import os
 from pathlib import Path
 from rowhammer_tester.scripts.utils import (
     memfill, memcheck, memwrite, DRAMAddressConverter, litex_server, RemoteClient,
-    get_litedram_settings, get_generated_defs, execute_payload, read_ident, _progress)
-from rowhammer_tester.scripts.playbook.lib import (generate_payload_from_row_list)
+    get_litedram_settings, get_generated_defs, execute_payload, read_ident, _progress,
+    PayloadMemoryMirror, progress_reporter, progress_sink)
+from rowhammer_tester.scripts.playbook.lib import (
+    generate_payload_from_row_list, generate_payload_from_row_lists)
+from rowhammer_tester.scripts.results import Checkpoint
+from rowhammer_tester.scripts.hcfirst_search import RowSearch, BisectSearch
 
 ################################################################################
 
@@ -42,10 +47,10 @@ class RowHammer:
         for name, val in locals().items():
             setattr(self, name, val)
         self.converter = DRAMAddressConverter.load()
-        self._addresses_per_row = {}
         self.bitflip_found = False
         self.log_directory = None
         self.err_summary = {}
+        self.payload_mirror = PayloadMemoryMirror(wb)
 
     @property
     def rows(self):
@@ -55,19 +60,7 @@ class RowHammer:
 
         return list(range(self.rows_start, self.rows_start + self.nrows))
 
-    def addresses_per_row(self, row):
-        """Returns a list of column addresses for a given row"""
-
-        # Calculate the addresses lazily and cache them
-        if row not in self._addresses_per_row:
-            addresses = [
-                self.converter.encode_bus(bank=self.bank, col=col, row=row)
-                for col in range(2**self.settings.geom.colbits)
-            ]
-            self._addresses_per_row[row] = addresses
-        return self._addresses_per_row[row]
-
-    def attack(self, row_tuple, read_count, progress_header=''):
+    def attack(self, row_tuple, read_count, progress_header='', bank=None):
         """
         Performs the actual attack.
         Uses *rowhammer*tester/gateware/rowhammer.py* underneath to perform reads via the DMA.
@@ -75,7 +68,10 @@ class RowHammer:
         ``row_tuple`` is a pair of rows to be hammered (attacked row is between them)
         ``row_count`` is divided between hammered rows, so specifying ``read_count = 2e5`` means,
         that each row will be hammered ``1e5`` times
+        ``bank`` overrides the bank given in the constructor
         """
+        if bank is None:
+            bank = self.bank
         # FIXME: describe what progress_header does
 
         # Make sure that the Rowhammer module is in reset state
@@ -87,7 +83,7 @@ class RowHammer:
             row_tuple
         ) == 2, 'Use BIST modules/Payload Executor to hammer different number of rows than 2'
         addresses = [
-            self.converter.encode_dma(bank=self.bank, col=self.column, row=r) for r in row_tuple
+            self.converter.encode_dma(bank=bank, col=self.column, row=r) for r in row_tuple
         ]
         self.wb.regs.rowhammer_address1.write(addresses[0])
         self.wb.regs.rowhammer_address2.write(addresses[1])
@@ -95,22 +91,31 @@ class RowHammer:
 
         row_strw = len(str(2**self.settings.geom.rowbits - 1))
 
-        def progress(count):
-            s = '  {}'.format(progress_header + ' ' if progress_header else '')
-            s += 'Rows = {}, Count = {:5.2f}M / {:5.2f}M'.format(
-                row_tuple, count / 1e6, read_count / 1e6, n=row_strw)
-            print(s, end='  \r')
+        def progress(count, last=False):
+
+            def render():
+                s = '  {}'.format(progress_header + ' ' if progress_header else '')
+                s += 'Rows = {}, Count = {:5.2f}M / {:5.2f}M'.format(
+                    row_tuple, count / 1e6, read_count / 1e6, n=row_strw)
+                return s + '  '
+
+            progress_reporter.report('Attack', count, read_count, render, last=last)
 
         # Wait for hammering to finish
+        start = time.monotonic()
         while True:
             count = self.wb.regs.rowhammer_count.read()
             progress(count)
             if count >= read_count:
                 break
+            # The attack goes on until disabled, so poll less often only while far from
+            # the end: sleep for a fraction of the estimated remaining time
+            if count > 0:
+                remaining = (time.monotonic() - start) * (read_count - count) / count
+                time.sleep(min(remaining / 4, 10e-3))
 
         self.wb.regs.rowhammer_enabled.write(0)
-        progress(self.wb.regs.rowhammer_count.read())  # also clears the value
-        print()
+        progress(self.wb.regs.rowhammer_count.read(), last=True)  # also clears the value
 
     def row_access_iterator(self, burst=16):
         """
@@ -124,10 +129,8 @@ class RowHammer:
         """
 
         for row in self.rows:
-            addresses = self.addresses_per_row(row)
-            n = (max(addresses) - min(addresses)) // 4
-            base_addr = addresses[0]
-            yield row, n, base_addr
+            start, end = self.converter.row_range(bank=self.bank, row=row)
+            yield row, (end - start) // 4, start
 
     def check_errors(self, row_patterns, row_progress=16):
         """
@@ -191,8 +194,9 @@ class RowHammer:
 
         err_dict = {}
         for row in row_errors:
-            cols = {}
-            row_bank = None  # 用于记录该行所属的bank
+            # Errors of the row in each bank, rounds attacking many banks (--batch-banks)
+            # may flip bits in rows with the same number in different banks
+            per_bank = {}
             if len(row_errors[row]) > 0:
                 flips = sum(
                     self.bitflips(value, expected) for addr, value, expected in row_errors[row])
@@ -200,30 +204,37 @@ class RowHammer:
                     "Bit-flips for row {:{n}}: {}".format(
                         row, flips, n=len(str(2**self.settings.geom.rowbits - 1))))
             if self.verbose or do_error_summary:
+                base_addr = self.converter.row_base(bank=self.bank, row=row)
                 for i, word, expected in row_errors[row]:
-                    base_addr = min(self.addresses_per_row(row))
                     addr = base_addr + 4 * i
                     bank, _row, col = self.converter.decode_bus(addr)
-                    if row_bank is None:
-                        row_bank = bank  # 记录第一个解码的bank信息
                     if self.verbose:
                         print(
                             "Error: 0x{:08x}: 0x{:08x} (bank={}, row={}, col={})".format(
                                 addr, word, bank, _row, col))
-                    bitflips = self.bitflip_list(word, expected)
-                    cols[col] = bitflips
+                    errors = per_bank.setdefault(
+                        bank, {'bank': bank, 'row': _row, 'col': {}, 'bitflips': 0})
+                    errors['col'][col] = self.bitflip_list(word, expected)
+                    errors['bitflips'] += self.bitflips(word, expected)
             if do_error_summary:
-                err_dict["{}".format(row)] = {
-                    'bank': row_bank if row_bank is not None else 0,  # 添加bank信息
-                    'row': _row, 
-                    'col': cols, 
-                    'bitflips': flips
-                }
+                # Rows of other banks than --bank are keyed "{row}_bank{bank}", as in
+                # FlipStore.errors_in_rows
+                for bank, errors in per_bank.items():
+                    key = str(row) if bank == self.bank else "{}_bank{}".format(row, bank)
+                    err_dict[key] = errors
 
         if do_error_summary:
             return err_dict
 
-    def run(self, row_pairs, pattern_generator, read_count, row_progress=16, verify_initial=False):
+    def run(
+            self,
+            row_pairs,
+            pattern_generator,
+            read_count,
+            row_progress=16,
+            verify_initial=False,
+            banks=None,
+            fill=True):
         """
         Main part of the script.
         First fills the memory with specified patterns, then optionally checks its integrity.
@@ -231,25 +242,34 @@ class RowHammer:
         Next it executes the attack, one row pair at a time.
         If refreshes were disabled, it reenables them.
         It checks for errors, and if any were found, displays them.
+
+        ``banks`` optionally gives the bank to attack for each of ``row_pairs``.
+        With ``fill=False`` the memory is not filled again, which is valid only if the
+        previous run used the same pattern and found no bitflips.
         """
 
         # TODO: need to invert data when writing/reading, make sure Python integer inversion works correctly
         if self.data_inversion:
             raise NotImplementedError('Currently only HW rowhammer supports data inversion')
+        if banks is not None and any(bank != self.bank for bank in banks):
+            raise NotImplementedError('Currently only HW rowhammer supports attacks in other banks')
 
         print('\nPreparing ...')
         row_patterns = pattern_generator(self.rows)
 
-        print('\nFilling memory with data ...')
-        for row, n, base in self.row_access_iterator():
-            memfill(self.wb, n, pattern=row_patterns[row], base=base, burst=255)
-            if row % row_progress == 0:
-                print('.', end='', flush=True)
-            # makes sure to synchronize with the writes (without it for slower connection
-            # we may have a timeout on the first read after writing)
-            self.wb.regs.ctrl_scratch.read()
+        if fill:
+            print('\nFilling memory with data ...')
+            for row, n, base in self.row_access_iterator():
+                memfill(self.wb, n, pattern=row_patterns[row], base=base, burst=255)
+                if row % row_progress == 0:
+                    print('.', end='', flush=True)
+                # makes sure to synchronize with the writes (without it for slower connection
+                # we may have a timeout on the first read after writing)
+                self.wb.regs.ctrl_scratch.read()
+        else:
+            print('\nReusing memory contents verified by the previous run')
 
-        if verify_initial:
+        if fill and verify_initial:
             print('\nVerifying written memory ...')
             errors = self.check_errors(row_patterns, row_progress=row_progress)
             if self.errors_count(errors) == 0:
@@ -267,13 +287,15 @@ class RowHammer:
             self.no_attack_sleep()
         else:
             print('\nRunning Rowhammer attacks ...')
-            for i, row_tuple in enumerate(row_pairs, start=1):
+            for i, (row_tuple, bank) in enumerate(zip(row_pairs, banks or [None] * len(row_pairs)),
+                                                  start=1):
                 s = 'Iter {:{n}} / {:{n}}'.format(i, len(row_pairs), n=len(str(len(row_pairs))))
                 print(f'Attacking rows: {row_tuple}')
                 if self.payload_executor:
-                    self.payload_executor_attack(read_count=read_count, row_tuple=row_tuple)
+                    self.payload_executor_attack(
+                        read_count=read_count, row_tuple=row_tuple, bank=bank)
                 else:
-                    self.attack(row_tuple, read_count=read_count, progress_header=s)
+                    self.attack(row_tuple, read_count=read_count, progress_header=s, bank=bank)
 
         if self.no_refresh:
             print('\nReenabling refresh ...')
@@ -291,10 +313,12 @@ class RowHammer:
             self.bitflip_found = True
             return errors_in_rows
 
-    def payload_executor_attack(self, read_count, row_tuple):
+    def payload_executor_attack(self, read_count, row_tuple, bank=None):
         """
         Performs the attack using payload executor
         """
+        if bank is None:
+            bank = self.bank
 
         sys_clk_freq = float(get_generated_defs()['SYS_CLK_FREQ'])
         payload = generate_payload_from_row_list(
@@ -302,14 +326,33 @@ class RowHammer:
             row_sequence=row_tuple,
             timings=self.settings.timing,
             bankbits=self.settings.geom.bankbits,
-            bank=self.bank,
+            bank=bank,
             payload_mem_size=self.wb.mems.payload.size,
             refresh=not self.no_refresh,
             sys_clk_freq=sys_clk_freq,
             verbose=self.verbose,
         )
 
-        execute_payload(self.wb, payload)
+        execute_payload(self.wb, payload, mirror=self.payload_mirror)
+
+    def payload_executor_attack_many(self, hammers):
+        """
+        Performs attacks on many row tuples using a single payload.
+        ``hammers`` is a list of ``(row_tuple, read_count)``, refresh is not issued.
+        """
+
+        sys_clk_freq = float(get_generated_defs()['SYS_CLK_FREQ'])
+        payload = generate_payload_from_row_lists(
+            hammers=hammers,
+            timings=self.settings.timing,
+            bankbits=self.settings.geom.bankbits,
+            bank=self.bank,
+            payload_mem_size=self.wb.mems.payload.size,
+            sys_clk_freq=sys_clk_freq,
+            verbose=self.verbose,
+        )
+
+        execute_payload(self.wb, payload, mirror=self.payload_mirror)
 
 
 ################################################################################
@@ -331,6 +374,112 @@ def patterns_random_per_row(rows, seed=42):
     return {row: rng.randint(0, 2**32 - 1) for row in rows}
 
 
+PATTERNS = {
+    'all_0': lambda rows: patterns_const(rows, 0x00000000),
+    'all_1': lambda rows: patterns_const(rows, 0xffffffff),
+    '01_in_row': lambda rows: patterns_const(rows, 0xaaaaaaaa),
+    '01_per_row': patterns_alternating_per_row,
+    'rand_per_row': patterns_random_per_row,
+}
+
+
+def group_row_pairs(row_pairs, min_distance, banks=(None, ), max_round_size=None):
+    """
+    Groups aggressor pairs into rounds hammered between a single fill and verification.
+
+    Each pair is attacked in each of ``banks``. Rows of different pairs in one round are at
+    least ``min_distance`` apart (regardless of the bank), so that bitflips can be attributed
+    back to the pair with :func:`attribute_errors`. Rounds have at most ``max_round_size``
+    pairs. Returns a list of rounds, each being a list of ``(bank, row_tuple)``.
+    """
+    rounds = []  # (pairs, sorted rows of the pairs)
+    for bank in banks:
+        for pair in row_pairs:
+            lo, hi = min(pair), max(pair)
+            for pairs, rows in rounds:
+                if max_round_size is not None and len(pairs) >= max_round_size:
+                    continue
+                # No row of the round may be in (lo - min_distance, hi + min_distance)
+                i = bisect.bisect_right(rows, lo - min_distance)
+                if i == len(rows) or rows[i] >= hi + min_distance:
+                    break
+            else:
+                pairs, rows = [], []
+                rounds.append((pairs, rows))
+            pairs.append((bank, tuple(pair)))
+            bisect.insort(rows, lo)
+            bisect.insort(rows, hi)
+    return [pairs for pairs, _ in rounds]
+
+
+def attribute_errors(errors_in_rows, round_pairs, max_distance=None):
+    """
+    Splits errors summary of a round (as returned by ``run``) between the pairs of the round.
+
+    Each victim row is assigned to the nearest aggressor pair attacked in the same bank.
+    Victims further than ``max_distance`` from any aggressor are ignored.
+    Returns a list of error summaries, one for each of ``round_pairs``.
+    """
+    per_pair = [{} for _ in round_pairs]
+    for key, info in errors_in_rows.items():
+        # Keys of rows outside of --bank are "{row}_bank{bank}"
+        row, bank = int(info.get('row', key)), info.get('bank')
+        candidates = [
+            i for i, (pair_bank, _) in enumerate(round_pairs)
+            if pair_bank is None or bank is None or pair_bank == bank
+        ] or range(len(round_pairs))
+        distances = {i: min(abs(row - r) for r in round_pairs[i][1]) for i in candidates}
+        nearest = min(distances, key=distances.get)
+        if max_distance is None or distances[nearest] <= max_distance:
+            per_pair[nearest][key] = info
+    return per_pair
+
+
+READ_COUNT_SEARCHES = {
+    'bisect': BisectSearch,
+    'exp-bisect': RowSearch,
+}
+
+
+def search_read_count(row_hammer, pair, search, pattern_generator):
+    """
+    Probes read counts proposed by ``search`` (see :mod:`hcfirst_search`) on ``pair`` until
+    the lowest read count causing bitflips is found.
+
+    Memory is filled again only after probes which caused bitflips: verification reads
+    (so activates) every row, which restores the charge of the cells just as a fill would.
+    Returns the probe trace, a list of ``{'read_count', 'bitflips'}``, where ``bitflips`` is
+    None if it is not known (no error summary). Stops early if the memory was found
+    corrupted before the attack. The probes are not recorded, a search interrupted before
+    it completed has to be started again.
+    """
+    trace = []
+    fill = True
+    while not search.resolved:
+        read_count = search.next_probe()
+        row_hammer.bitflip_found = False
+        errors_in_rows = row_hammer.run(
+            row_pairs=[pair], read_count=read_count, pattern_generator=pattern_generator, fill=fill)
+        flipped = row_hammer.bitflip_found
+        if errors_in_rows is None and not flipped:
+            print('Errors found in memory before the attack, stopping the search')
+            break
+        bitflips = sum(e['bitflips'] for e in errors_in_rows.values()) \
+            if errors_in_rows is not None else None
+        trace.append({'read_count': read_count, 'bitflips': bitflips})
+        search.observe(read_count, errors_in_rows, flipped)
+        fill = flipped
+    return trace
+
+
+def ensure_dram_initialized(wb):
+    """Runs DRAM initialization (mem.py) if it has not been done yet."""
+    if wb.regs.ddrctrl_init_done.read() != 1:
+        scripts_dir = os.path.dirname(os.path.realpath(__file__))
+        mem_script = os.path.join(scripts_dir, "mem.py")
+        subprocess.check_call(["python3", mem_script])
+
+
 def generate_filename(args, prefix="HCfirst"):
     """Generate intelligent filename based on command arguments."""
     
@@ -401,12 +550,19 @@ def main(row_hammer_cls):
         help=
         'Range of how many reads to perform for single address pair in a set of tests, given as [start] [stop] [step]'
     )
+    parser.add_argument(
+        '--read-count-search',
+        choices=list(READ_COUNT_SEARCHES),
+        help='For each row pair find the lowest read count causing bitflips in '
+        '--read_count_range [start] [stop] [precision], instead of testing every count. '
+        'Only completed searches are recorded in --results-jsonl, --resume repeats the '
+        'probes of an interrupted search')
     parser.add_argument(
         '--no-refresh', action='store_true', help='Disable refresh commands during the attacks')
     parser.add_argument(
         '--pattern',
         default='01_per_row',
-        choices=['all_0', 'all_1', '01_in_row', '01_per_row', 'rand_per_row'],
+        choices=list(PATTERNS),
         help='Pattern written to DRAM before running attacks')
     row_selector_group = parser.add_mutually_exclusive_group()
     row_selector_group.add_argument(
@@ -439,11 +595,31 @@ def main(row_hammer_cls):
         default=1,
         required=False,
         help='Jump between rows when using --all-rows')
+    parser.add_argument(
+        '--batch-distance',
+        type=int,
+        default=0,
+        help='With --all-rows, hammer pairs that are at least this many rows apart in one round '
+        '(single fill and verification per round)')
+    parser.add_argument(
+        '--batch-banks',
+        type=int,
+        nargs='+',
+        help='With --batch-distance, attack each pair in each of given banks (default: --bank)')
     parser.add_argument(
         '--payload-executor',
         action='store_true',
         help='Do the attack using Payload Executor (1st row only)')
     parser.add_argument('-v', '--verbose', action='store_true', help='Be more verbose')
+    parser.add_argument(
+        '--progress',
+        choices=['auto', 'on', 'off'],
+        default='auto',
+        help='Show progress lines (auto: only when the output is a terminal)')
+    parser.add_argument(
+        '--progress-events',
+        metavar='DEST',
+        help='Emit progress events as JSON to a file or to udp://host:port')
     parser.add_argument("--srv", action="store_true", help='Start LiteX server')
     parser.add_argument(
         "--experiment-no", type=int, default=0, help='Run preconfigured experiment #no')
@@ -466,6 +642,19 @@ def main(row_hammer_cls):
         help=
         "Directory for output files. If not given, the output files (e.g. error summary) won't be written"
     )
+    parser.add_argument(
+        "--results-jsonl",
+        help='Append a record of each attack to this JSONL file as soon as it finishes '
+        '(convert with results.py)')
+    parser.add_argument(
+        "--results-gzip",
+        action="store_true",
+        help='With --results-jsonl, also write a gzip-compressed copy (<file>.gz)')
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help='Continue an interrupted campaign from its --results-jsonl file, '
+        'skipping the attacks recorded there')
     args = parser.parse_args()
 
     if args.experiment_no == 1:
@@ -532,6 +721,35 @@ def main(row_hammer_cls):
     else:
         parser.error("No operation specified")
 
+    if args.resume and not args.results_jsonl:
+        parser.error('--resume requires --results-jsonl')
+    if args.results_jsonl and os.path.exists(args.results_jsonl) and not args.resume:
+        parser.error(f'{args.results_jsonl} already exists, use --resume to continue it')
+
+    if args.read_count_search:
+        if not args.read_count_range:
+            parser.error('--read-count-search requires --read_count_range')
+        if args.hammer_only or args.no_attack_time is not None or args.batch_distance:
+            parser.error(
+                '--read-count-search cannot be used with --hammer-only, --no-attack-time '
+                'or --batch-distance')
+
+    if args.batch_banks and not args.batch_distance:
+        parser.error('--batch-banks requires --batch-distance')
+    if args.batch_distance:
+        if not args.all_rows:
+            parser.error('--batch-distance requires --all-rows')
+        rounds = group_row_pairs(
+            row_pairs, args.batch_distance, banks=args.batch_banks or [args.bank])
+        print(f"Batched {sum(map(len, rounds))} attacks into {len(rounds)} rounds")
+
+    if args.progress == 'auto':
+        progress_reporter.enabled = sys.stdout.isatty()
+    else:
+        progress_reporter.enabled = args.progress == 'on'
+    if args.progress_events:
+        progress_reporter.sink = progress_sink(args.progress_events)
+
     if args.srv:
         litex_server()
 
@@ -539,10 +757,7 @@ def main(row_hammer_cls):
     wb.open()
     print("Board info:", read_ident(wb))
 
-    if wb.regs.ddrctrl_init_done.read() != 1:
-        scripts_dir = os.path.dirname(os.path.realpath(__file__))
-        mem_script = os.path.join(scripts_dir, "mem.py")
-        subprocess.check_call(["python3", mem_script])
+    ensure_dram_initialized(wb)
 
     row_hammer = row_hammer_cls(
         wb,
@@ -564,13 +779,38 @@ def main(row_hammer_cls):
             log_dir.mkdir(parents=True)
         row_hammer.log_directory = args.log_dir
 
-    pattern = {
-        'all_0': lambda rows: patterns_const(rows, 0x00000000),
-        'all_1': lambda rows: patterns_const(rows, 0xffffffff),
-        '01_in_row': lambda rows: patterns_const(rows, 0xaaaaaaaa),
-        '01_per_row': patterns_alternating_per_row,
-        'rand_per_row': patterns_random_per_row,
-    }[args.pattern]
+    pattern = PATTERNS[args.pattern]
+
+    checkpoint = None
+    if args.results_jsonl:
+        checkpoint = Checkpoint(args.results_jsonl, compress=args.results_gzip)
+        if checkpoint.completed:
+            print(f"Resuming: {len(checkpoint.completed)} attacks already completed")
+    # The whole summary is kept in memory only for the single JSON files written at the end
+    keep_summary = bool(row_hammer.log_directory or args.save)
+
+    def record(count, key, entry):
+        if checkpoint is not None:
+            checkpoint.add(count, key, entry)
+        if keep_summary:
+            row_hammer.err_summary[str(count)][key] = entry
+
+    def restore(count, key):
+        # Use the result of an attack completed before --resume instead of repeating it
+        entry = checkpoint.get(count, key) if checkpoint is not None else None
+        if entry is None:
+            return False
+        if keep_summary:
+            row_hammer.err_summary[str(count)][key] = entry
+        if entry["errors_in_rows"]:
+            row_hammer.bitflip_found = True
+        return True
+
+    # Key of the attack in modes doing a single attack per read count
+    if args.row_pairs == 'const':
+        single_key = "pair_{}_{}".format(*row_pairs[0])
+    else:
+        single_key = "sequential_attacks"
 
     if args.read_count_range:
         count_start, count_stop, count_step = map(int, args.read_count_range)
@@ -579,52 +819,132 @@ def main(row_hammer_cls):
         count_stop = count_start
         count_step = 1
 
-    for count in range(count_start, count_stop + 1, count_step):
-        row_hammer.err_summary[str(count)] = {"read_count": count}
+    counts = range(count_start, count_stop + 1, count_step)
+    if args.read_count_search:
+        counts = []  # the searches choose the read counts
+        # Searches completed before --resume, recorded under the read count they found
+        searched = {key: count for count, key in checkpoint.completed} if checkpoint else {}
+        for pair in row_pairs:
+            key = "pair_{}_{}".format(*pair)
+            if key in searched:
+                if keep_summary:
+                    row_hammer.err_summary.setdefault(
+                        str(searched[key]), {"read_count": searched[key]})
+                restore(searched[key], key)
+                continue
+            search = READ_COUNT_SEARCHES[args.read_count_search](
+                pair, min_hc=count_start, max_hc=count_stop, precision=count_step)
+            trace = search_read_count(row_hammer, pair, search, pattern)
+            count = search.hcfirst if search.hcfirst is not None else count_stop
+            if keep_summary:
+                row_hammer.err_summary.setdefault(str(count), {"read_count": count})
+            print(f"Pair {pair}: lowest read count with bitflips: {search.hcfirst}"
+                  f" ({len(trace)} probes)")
+            record(
+                count, key, {
+                    "hammer_row_1": pair[0],
+                    "hammer_row_2": pair[1],
+                    "hcfirst": search.hcfirst,
+                    "probes": trace,
+                    "errors_in_rows": search.errors_in_rows or None
+                })
+            if search.hcfirst is not None and args.exit_on_bit_flip:
+                break
+
+    for count in counts:
+        if keep_summary:
+            row_hammer.err_summary[str(count)] = {"read_count": count}
         if args.hammer_only:
             pair = row_pairs[0]
             if args.payload_executor:
                 row_hammer.payload_executor_attack(read_count=count, row_tuple=pair)
             else:
                 row_hammer.attack(row_tuple=pair, read_count=count)
+        elif args.all_rows and args.batch_distance:
+            for round_pairs in rounds:
+                keys = []
+                for bank, pair in round_pairs:
+                    key = "pair_{}_{}".format(*pair)
+                    if args.batch_banks:
+                        key += "_bank_{}".format(bank)
+                    keys.append(key)
+                todo = [i for i, key in enumerate(keys) if not restore(count, key)]
+                if not todo:
+                    continue
+                round_pairs = [round_pairs[i] for i in todo]
+                keys = [keys[i] for i in todo]
+
+                err_in_rows = row_hammer.run(
+                    row_pairs=[pair for _, pair in round_pairs],
+                    banks=[bank for bank, _ in round_pairs],
+                    read_count=count,
+                    pattern_generator=pattern)
+
+                if err_in_rows is None:
+                    pair_errors = [err_in_rows] * len(round_pairs)
+                else:
+                    pair_errors = attribute_errors(err_in_rows, round_pairs)
+                for (bank, pair), key, errors in zip(round_pairs, keys, pair_errors):
+                    record(
+                        count, key, {
+                            "hammer_row_1": pair[0],
+                            "hammer_row_2": pair[1],
+                            "bank": bank,
+                            "errors_in_rows": errors
+                        })
         elif args.all_rows:
             for pair in row_pairs:
+                key = "pair_{}_{}".format(*pair)
+                if restore(count, key):
+                    continue
                 err_in_rows = row_hammer.run(
                     row_pairs=[pair], read_count=count, pattern_generator=pattern)
 
-                row_hammer.err_summary[str(count)]["pair_{}_{}".format(*pair)] = {
-                    "hammer_row_1": pair[0],
-                    "hammer_row_2": pair[1],
-                    "errors_in_rows": err_in_rows
-                }
+                record(
+                    count, key, {
+                        "hammer_row_1": pair[0],
+                        "hammer_row_2": pair[1],
+                        "errors_in_rows": err_in_rows
+                    })
+        elif args.no_attack_time is not None and restore(count, "no_attack_sleep"):
+            pass  # completed before --resume
         elif args.no_attack_time is not None:
             # Run with the dummy row pair but the sleep functionality will be used
             err_in_rows = row_hammer.run(
                 row_pairs=row_pairs, read_count=count, pattern_generator=pattern)
             
-            row_hammer.err_summary[str(count)]["no_attack_sleep"] = {
-                "sleep_time_ns": args.no_attack_time,
-                "errors_in_rows": err_in_rows
-            }
+            record(
+                count, "no_attack_sleep", {
+                    "sleep_time_ns": args.no_attack_time,
+                    "errors_in_rows": err_in_rows
+                })
+        elif restore(count, single_key):
+            pass  # completed before --resume
         else:
             err_in_rows = row_hammer.run(
                 row_pairs=row_pairs, read_count=count, pattern_generator=pattern)
             if args.row_pairs == 'const':
                 pair = row_pairs[0]
-                row_hammer.err_summary[str(count)]["pair_{}_{}".format(*pair)] = {
-                    "hammer_row_1": pair[0],
-                    "hammer_row_2": pair[1],
-                    "errors_in_rows": err_in_rows
-                }
+                record(
+                    count, single_key, {
+                        "hammer_row_1": pair[0],
+                        "hammer_row_2": pair[1],
+                        "errors_in_rows": err_in_rows
+                    })
             else:
-                row_hammer.err_summary[str(count)]["sequential_attacks"] = {
-                    "row_pairs": row_pairs,
-                    "errors_in_rows": err_in_rows
-                }
+                record(
+                    count, single_key, {
+                        "row_pairs": row_pairs,
+                        "errors_in_rows": err_in_rows
+                    })
 
         if row_hammer.bitflip_found and args.exit_on_bit_flip:
             break
 
+    if checkpoint is not None:
+        checkpoint.close()
+        print(f"\nResults streamed to: {args.results_jsonl}")
+
     # Save to user-specified log directory if provided (original behavior)
     if row_hammer.log_directory:
         with open("{}/error_summary_{}.json".format(row_hammer.log_directory, time.time()),
@@ -645,6 +965,7 @@ def main(row_hammer_cls):
         
         print(f"\nResults saved to: {filepath}")
 
+    progress_reporter.close()
     wb.close()
 
 
@@ -30,7 +30,13 @@ python samsung_row_transformer.py result/a-hammer/a-hammer_single_side_r0-1000_r
 
 import json
 import random
-from collections import defaultdict
+
+from rowhammer_tester.scripts import transform_results
+from rowhammer_tester.scripts.transform_results import ResultTransformer
+from rowhammer_tester.scripts.playbook.row_mappings import load_row_mapping
+
+# 行映射表覆盖的行地址位数
+ROWBITS = 17
 
 
 class SamsungRowTransformer:
@@ -172,7 +178,7 @@ class SamsungRowTransformer:
 
 def transform_file(input_file_path, output_file_path=None):
     """
-    变换rowhammer结果文件
+    变换rowhammer结果文件（逐条记录流式处理，见transform_results.py）
     
     Args:
         input_file_path: 输入文件路径
@@ -184,16 +190,6 @@ def transform_file(input_file_path, output_file_path=None):
     import os
     
     try:
-        # 加载输入数据
-        with open(input_file_path, 'r') as f:
-            data = json.load(f)
-        
-        # 初始化变换器
-        transformer = SamsungRowTransformer()
-        
-        # 执行变换
-        transformed_data = transformer.transform_result_data(data)
-        
         # 确定输出文件路径
         if output_file_path is None:
             input_dir = os.path.dirname(input_file_path)
@@ -201,9 +197,10 @@ def transform_file(input_file_path, output_file_path=None):
             name, ext = os.path.splitext(input_name)
             output_file_path = os.path.join(input_dir, f"{name}_samsung_transformed{ext}")
         
-        # 保存变换后的数据
-        with open(output_file_path, 'w') as f:
-            json.dump(transformed_data, f, indent=2)
+        # SamsungRowMapping与transform_victim_row相同（自逆映射）
+        transformer = ResultTransformer(
+            row_mapping=load_row_mapping("SamsungRowMapping", ROWBITS))
+        transform_results.transform_file(input_file_path, output_file_path, transformer)
         
         print(f"✓ 文件变换成功")
         print(f"  输入: {input_file_path}")
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Streaming transformations of Rowhammer and retention result files.
+
+Applies, record by record, any of:
+
+* row remapping with a playbook row mapping (``--row-mapping``), to hammered and victim rows,
+* re-addressing of bitflips to chips/DQs (``--chips``, see :func:`convert_physical_address`),
+* splitting of the results by bank into separate files (``--split-banks``).
+
+Inputs are ``error_summary_*.json``/``a-hammer_*`` files, retention test files and JSONL
+results (:mod:`results`). JSON documents are not loaded as a whole: :func:`iter_items` parses
+one record at a time (a pair of a read count, a time point of a retention test) and
+:class:`JsonItemWriter` writes it out right away, so memory use does not depend on the size
+of the file. Multiple files can be processed in parallel with ``-j``.
+"""
+
+import os
+import re
+import json
+import argparse
+from multiprocessing import Pool
+
+from rowhammer_tester.scripts.results import read_records
+from rowhammer_tester.scripts.playbook.row_mappings import load_row_mapping
+
+# ######################### Streaming JSON #############################
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r'\s*')
+
+
+class _Reader:
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size):
+        if self.pos > self.chunk_size:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        data = self.f.read(size)
+        self.eof = not data
+        self.buf += data
+
+    def peek(self):
+        while True:
+            self.pos = _whitespace.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                raise ValueError('Unexpected end of JSON document')
+            self._fill(self.chunk_size)
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError('Expected {!r} at offset {} of JSON buffer'.format(char, self.pos))
+        self.pos += 1
+
+    def decode(self):
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Value longer than the buffer, read bigger chunks to keep parsing linear
+            self._fill(size)
+            size *= 2
+
+
+def _iter_object(reader, path, depth):
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+        return
+    while True:
+        key = reader.decode()
+        reader.expect(':')
+        if depth > 1 and reader.peek() == '{':
+            empty = True
+            for item in _iter_object(reader, path + (key, ), depth - 1):
+                empty = False
+                yield item
+            if empty:
+                yield path + (key, ), {}
+        else:
+            yield path + (key, ), reader.decode()
+        char = reader.peek()
+        reader.pos += 1
+        if char == '}':
+            return
+        if char != ',':
+            raise ValueError('Expected "," or "}}" in JSON object, got {!r}'.format(char))
+
+
+def iter_items(f, depth=2, chunk_size=2**20):
+    """
+    Yields ``(path, value)`` for the values of a JSON document nested in ``depth`` objects,
+    where ``path`` is the tuple of keys leading to the value. Values of shallower keys that
+    are not objects are yielded as well. Only a single value is kept in memory at a time.
+    """
+    return _iter_object(_Reader(f, chunk_size), (), depth)
+
+
+class JsonItemWriter:
+    """
+    Writes a JSON document from ``(path, value)`` items as yielded by :func:`iter_items`.
+    Items sharing a path prefix must be written one after another.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.path = None  # path of the objects currently open
+
+    def write(self, path, value):
+        *parents, key = path
+        if self.path is None:
+            self.f.write('{')
+            self.path = []
+            common = 0
+        else:
+            common = 0
+            while (common < min(len(parents), len(self.path))
+                   and parents[common] == self.path[common]):
+                common += 1
+            self.f.write('}' * (len(self.path) - common) + ',')
+        for parent in parents[common:]:
+            self.f.write('\n{}:{{'.format(json.dumps(parent)))
+        self.path = list(parents)
+        self.f.write('\n{}:{}'.format(json.dumps(key), json.dumps(value, separators=(',', ':'))))
+
+    def close(self):
+        if self.path is None:
+            self.f.write('{')
+            self.path = []
+        self.f.write('}' * (len(self.path) + 1) + '\n')
+
+
+# ######################### Transformations #############################
+
+
+def convert_physical_address(original_bank, original_row, original_col, original_bit):
+    """
+    Converts the address of a bitflip to the address within a chip.
+
+    Returns ``(new_bank, new_row, new_col, new_bit, chip)``.
+    """
+    new_bank = original_bank
+    chip = original_bit // 64 + 1
+    new_row = original_row
+    new_col = original_col + (original_bit % 64) // 8 + 1
+    new_bit = (original_bit % 64) % 8
+    return new_bank, new_row, new_col, new_bit, chip
+
+
+def _row_bits(col_data):
+    # Bits are stored either as a list or under bitflip_positions
+    if isinstance(col_data, dict):
+        return col_data.get('bitflip_positions', [])
+    return col_data
+
+
+def split_chips(row_key, row_data):
+    """
+    Re-addresses bitflips of a row with :func:`convert_physical_address`. Returns a list of
+    ``(row_key, row_data)``, one per chip, with ``_chip{N}`` appended to the key if the
+    bitflips are in more than one chip.
+    """
+    chips = {}
+    for col, col_data in row_data.get('col', {}).items():
+        for bit in _row_bits(col_data):
+            bank, row, new_col, new_bit, chip = convert_physical_address(
+                row_data['bank'], row_data['row'], int(col), bit)
+            if chip not in chips:
+                chips[chip] = {'bank': bank, 'row': row, 'col': {}, 'bitflips': 0, 'chip': chip}
+            cols = chips[chip]['col']
+            if str(new_col) not in cols:
+                cols[str(new_col)] = {'bitflip_positions': [], 'total_bitflips': 0}
+            cols[str(new_col)]['bitflip_positions'].append(new_bit)
+            cols[str(new_col)]['total_bitflips'] += 1
+            chips[chip]['bitflips'] += 1
+    if not chips:
+        return [(row_key, row_data)]
+
+    for chip_data in chips.values():
+        for col_data in chip_data['col'].values():
+            col_data['bitflip_positions'].sort()
+    if len(chips) == 1:
+        return [(row_key, chip_data)]
+    return [('{}_chip{}'.format(row_key, chip), chip_data) for chip, chip_data in chips.items()]
+
+
+class ResultTransformer:
+    """
+    Transforms records of result files.
+
+    ``row_mapping`` is a compiled playbook row mapping
+    (:class:`~rowhammer_tester.scripts.playbook.row_mappings.RowMappingTable`) or None,
+    ``to_physical`` selects the direction of the mapping. With ``chips=True`` bitflips are
+    re-addressed to chips. With ``split_banks=True`` records are split by bank (see
+    :meth:`transform`), errors of an entry without bank information go to ``default_bank``.
+    """
+
+    def __init__(
+            self,
+            *,
+            row_mapping=None,
+            to_physical=True,
+            chips=False,
+            split_banks=False,
+            default_bank=0):
+        self.row_mapping = row_mapping
+        self.to_physical = to_physical
+        self.chips = chips
+        self.split_banks = split_banks
+        self.default_bank = default_bank
+
+    def map_row(self, row):
+        if self.row_mapping is None:
+            return row
+        if self.to_physical:
+            return self.row_mapping.logical_to_physical(row)
+        return self.row_mapping.physical_to_logical(row)
+
+    def transform_errors(self, errors):
+        """Transforms a ``{row_key: {'bank': ..., 'row': ..., 'col': ...}}`` dict."""
+        transformed = {}
+        for row_key, row_data in errors.items():
+            if not isinstance(row_data, dict) or 'bank' not in row_data:
+                transformed[row_key] = row_data  # e.g. just a count of bitflips
+                continue
+            if self.row_mapping is not None:
+                row = self.map_row(row_data['row'])
+                row_key = re.sub(r'^\d+', str(row), row_key)
+                row_data = dict(row_data, row=row)
+            rows = split_chips(row_key, row_data) if self.chips else [(row_key, row_data)]
+            transformed.update(rows)
+        return transformed
+
+    def _errors_by_bank(self, errors, bank):
+        banks = {bank: {}}
+        for row_key, row_data in errors.items():
+            row_bank = row_data.get('bank', bank) if isinstance(row_data, dict) else bank
+            banks.setdefault(row_bank, {})[row_key] = row_data
+        return banks
+
+    def transform_entry(self, key, entry):
+        """Transforms a single attack entry, returns ``{bank: entry}``."""
+        entry = dict(entry)
+        for name in ['hammer_row_1', 'hammer_row_2']:
+            if isinstance(entry.get(name), int):
+                entry[name] = self.map_row(entry[name])
+        if entry.get('errors_in_rows'):
+            entry['errors_in_rows'] = self.transform_errors(entry['errors_in_rows'])
+        if not self.split_banks:
+            return {None: entry}
+
+        # Attacks of batched runs have the bank in their key
+        match = re.search(r'_bank_(\d+)$', key)
+        bank = int(match.group(1)) if match else self.default_bank
+        if not entry.get('errors_in_rows'):
+            return {bank: entry}
+        return {
+            b: dict(entry, errors_in_rows=errors)
+            for b, errors in self._errors_by_bank(entry['errors_in_rows'], bank).items()
+        }
+
+    def transform_time_point(self, data):
+        """Transforms ``raw_data`` of a retention test time point, returns ``{bank: data}``."""
+        details = [
+            self.transform_errors(d) if isinstance(d, dict) else d
+            for d in data.get('repeat_details', [])
+        ]
+        if not self.split_banks:
+            return {None: dict(data, repeat_details=details)}
+        per_bank = [
+            self._errors_by_bank(d, self.default_bank) if isinstance(d, dict) else {}
+            for d in details
+        ]
+        banks = set().union(*per_bank) or {self.default_bank}
+        return {
+            bank: dict(data, repeat_details=[d.get(bank, {}) for d in per_bank])
+            for bank in sorted(banks)
+        }
+
+    def transform(self, path, value):
+        """
+        Transforms an item yielded by :func:`iter_items`, returns ``{bank: value}`` (with
+        None as the only bank without ``split_banks``). Items that are not banked are
+        returned with the bank None also when splitting, they go to all the outputs.
+        """
+        if len(path) == 2 and path[0] == 'raw_data' and isinstance(value, dict):
+            return self.transform_time_point(value)
+        if isinstance(value, dict) and 'errors_in_rows' in value:
+            return self.transform_entry(path[-1], value)
+        return {None: value}
+
+
+# ######################### Files #############################
+
+
+class _JsonlWriter:
+    # Writes items with (read_count, key) paths as JSONL result records
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, path, value):
+        read_count, key = path
+        record = {'read_count': read_count, 'key': key, 'entry': value}
+        self.f.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def close(self):
+        pass
+
+
+class _Outputs:
+    # Output files opened on first use, one per bank when splitting
+
+    def __init__(self, path, writer_cls, split_banks):
+        self.path = path
+        self.writer_cls = writer_cls
+        self.split_banks = split_banks
+        self.files = {}
+        self.writers = {}
+        self.shared = []  # items not specific to a bank, copied to each output
+
+    def output_path(self, bank):
+        if bank is None:
+            return self.path
+        name, ext = os.path.splitext(self.path)
+        return '{}_bank{}{}'.format(name, bank, ext)
+
+    def writer(self, bank):
+        if bank not in self.writers:
+            self.files[bank] = open(self.output_path(bank), 'w')
+            self.writers[bank] = self.writer_cls(self.files[bank])
+            for item in self.shared:
+                self.writers[bank].write(*item)
+        return self.writers[bank]
+
+    def write(self, path, transformed):
+        if not self.split_banks:
+            self.writer(None).write(path, transformed[None])
+        elif None in transformed:
+            self.shared.append((path, transformed[None]))
+            for writer in self.writers.values():
+                writer.write(path, transformed[None])
+        else:
+            for bank, value in transformed.items():
+                self.writer(bank).write(path, value)
+
+    def close(self):
+        if not self.writers:
+            self.writer(None)
+        for bank, writer in self.writers.items():
+            writer.close()
+            self.files[bank].close()
+        return [self.output_path(bank) for bank in self.writers]
+
+
+def transform_file(input_path, output_path, transformer):
+    """
+    Transforms a JSON or JSONL (``.jsonl``, ``.jsonl.gz``) results file with ``transformer``
+    (:class:`ResultTransformer`). Returns the paths of the written files.
+    """
+    jsonl = '.jsonl' in os.path.basename(input_path)
+    writer_cls = _JsonlWriter if jsonl else JsonItemWriter
+    outputs = _Outputs(output_path, writer_cls, transformer.split_banks)
+    try:
+        if jsonl:
+            for record in read_records(input_path):
+                path = (record['read_count'], record['key'])
+                outputs.write(path, transformer.transform(path, record['entry']))
+        else:
+            with open(input_path) as f:
+                for path, value in iter_items(f):
+                    outputs.write(path, transformer.transform(path, value))
+    finally:
+        paths = outputs.close()
+    return paths
+
+
+_worker_transformer = None
+
+
+def _init_worker(transformer):
+    global _worker_transformer
+    _worker_transformer = transformer
+
+
+def _run_job(job):
+    input_path, output_path = job
+    return input_path, transform_file(input_path, output_path, _worker_transformer)
+
+
+def default_output_path(input_path, output_dir=None, suffix='_transformed'):
+    name, ext = os.path.splitext(os.path.basename(input_path))
+    if ext == '.gz':
+        name, ext = os.path.splitext(name)
+    return os.path.join(output_dir or os.path.dirname(input_path), name + suffix + ext)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Transform Rowhammer/retention result files record by record')
+    parser.add_argument('inputs', nargs='+', help='JSON or JSONL result files')
+    parser.add_argument(
+        '--row-mapping',
+        help='Playbook row mapping applied to the rows: class name (e.g. SamsungRowMapping) '
+        'or XOR rules as JSON, e.g. \'{"xor": {"1": [3], "2": [3]}}\'')
+    parser.add_argument(
+        '--to-logical',
+        action='store_true',
+        help='Map rows from physical to logical numbers instead of logical to physical')
+    parser.add_argument(
+        '--rowbits', type=int, default=17, help='Row bits covered by the row mapping tables')
+    parser.add_argument(
+        '--chips', action='store_true', help='Re-address bitflips to chips (convert_address.py)')
+    parser.add_argument(
+        '--split-banks', action='store_true', help='Write the results of each bank to its own file')
+    parser.add_argument(
+        '--default-bank', type=int, default=0, help='Bank of attacks without bank information')
+    parser.add_argument('-o', '--output', help='Output file (only with a single input file)')
+    parser.add_argument('--output-dir', help='Output directory (default: next to the inputs)')
+    parser.add_argument(
+        '--suffix', default='_transformed', help='Suffix added to the names of output files')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Files processed in parallel')
+    args = parser.parse_args()
+
+    if args.output and len(args.inputs) > 1:
+        parser.error('--output can only be used with a single input file')
+    row_mapping = None
+    if args.row_mapping:
+        config = args.row_mapping
+        if config.lstrip().startswith('{'):
+            config = json.loads(config)
+        row_mapping = load_row_mapping(config, args.rowbits)
+    transformer = ResultTransformer(
+        row_mapping=row_mapping,
+        to_physical=not args.to_logical,
+        chips=args.chips,
+        split_banks=args.split_banks,
+        default_bank=args.default_bank)
+
+    jobs = [
+        (path, args.output or default_output_path(path, args.output_dir, args.suffix))
+        for path in args.inputs
+    ]
+    if args.jobs > 1:
+        with Pool(args.jobs, initializer=_init_worker, initargs=(transformer, )) as pool:
+            results = list(pool.imap_unordered(_run_job, jobs))
+    else:
+        _init_worker(transformer)
+        results = [_run_job(job) for job in jobs]
+    for input_path, output_paths in results:
+        print('{} -> {}'.format(input_path, ', '.join(output_paths)))
+
+
+if __name__ == "__main__":
+    main()
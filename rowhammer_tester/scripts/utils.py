@@ -5,14 +5,16 @@ import csv
 import sys
 import glob
 import json
+import math
 import time
-from operator import or_
-from functools import reduce
+import socket
 from collections import namedtuple
 
+import numpy as np
 from migen import log2_int
 
-from rowhammer_tester.gateware.payload_executor import Encoder, OpCode, Decoder
+from rowhammer_tester.gateware.payload_executor import Encoder, OpCode, Decoder, payload_checksum
+from rowhammer_tester.scripts.address_mapping import AddressMapping
 
 # ###########################################################################
 
@@ -79,6 +81,10 @@ class ReadonlySettings:
             return ReadonlySettings(val)
         return val
 
+    def raw(self, name):
+        """Value of a setting as stored, without wrapping dicts."""
+        return self._settings[name]
+
 
 def get_litedram_settings():
     with open(get_generated_file('litedram_settings.json')) as f:
@@ -258,7 +264,8 @@ class DRAMAddressConverter:
         self.address_align = address_align
         self.address_mapping = address_mapping
         self.dram_port_width = dram_port_width
-        assert self.address_mapping == 'ROW_BANK_COL'
+        self.mapping = AddressMapping.from_settings(
+            address_mapping, colbits=colbits, rowbits=rowbits, bankbits=bankbits)
 
     @classmethod
     def load(cls):
@@ -274,26 +281,16 @@ class DRAMAddressConverter:
             rowbits=settings.geom.rowbits,
             bankbits=settings.geom.bankbits,
             address_align=address_align,
-            address_mapping=settings.address_mapping,
+            # Custom mappings are dicts, keep them unwrapped
+            address_mapping=settings.raw('address_mapping'),
             dram_port_width=settings.phy.nphases * settings.phy.dfi_databits,
         )
 
     def _encode(self, bank, row, col):
-        assert bank < 2**self.bankbits
-        assert col < 2**self.colbits
-        assert row < 2**self.rowbits
-
-        def masked(value, width, offset):
-            masked = value & (2**width - 1)
-            assert masked == value, "Value larger than value bit-width"
-            return masked << offset
-
-        return reduce(
-            or_, [
-                masked(row, self.rowbits, self.bankbits + self.colbits),
-                masked(bank, self.bankbits, self.colbits),
-                masked(col, self.colbits, 0),
-            ])
+        assert 0 <= bank < 2**self.bankbits, "Value larger than value bit-width"
+        assert 0 <= row < 2**self.rowbits, "Value larger than value bit-width"
+        assert 0 <= col < 2**self.colbits, "Value larger than value bit-width"
+        return self.mapping.encode(bank, row, col)
 
     def _get_bus_shift(self, bus_width):
         addr_shift = log2_int(self.dram_port_width // bus_width)
@@ -310,21 +307,29 @@ class DRAMAddressConverter:
             address >>= -shift
         return base + address
 
+    def row_base(self, *, bank, row, base=0x40000000, bus_width=32):
+        """Bus address of the first column of a row."""
+        return self.encode_bus(bank=bank, row=row, col=0, base=base, bus_width=bus_width)
+
+    def row_span(self, bus_width=32):
+        """Number of bus address bytes taken by a single row."""
+        assert self.mapping.contiguous_rows, 'Columns of a row are not at contiguous addresses'
+        shift = self._get_bus_shift(bus_width)
+        if shift > 0:
+            return 2**self.colbits << shift
+        return 2**self.colbits >> -shift
+
+    def row_range(self, *, bank, row, base=0x40000000, bus_width=32):
+        """Bus address range ``(start, end)`` of a row, ``end`` is exclusive."""
+        start = self.row_base(bank=bank, row=row, base=base, bus_width=bus_width)
+        return start, start + self.row_span(bus_width)
+
     def encode_dma(self, *, bank, row, col):
         address = self._encode(bank, row, col)
         return address >> self.address_align
 
     def _decode(self, address):
-
-        def extract(value, width, offset):
-            mask = 2**width - 1
-            return (value & (mask << offset)) >> offset
-
-        row = extract(address, self.rowbits, self.bankbits + self.colbits)
-        bank = extract(address, self.bankbits, self.colbits)
-        col = extract(address, self.colbits, 0)
-
-        return bank, row, col
+        return self.mapping.decode(address)
 
     def decode_bus(self, address, base=0x40000000, bus_width=32):
         address -= base
@@ -338,20 +343,132 @@ class DRAMAddressConverter:
     def decode_dma(self, address):
         return self._decode(address << self.address_align)
 
+    # Batch variants taking and returning NumPy arrays (int64), with the same results as
+    # the scalar methods for each element
+
+    def _shift_many(self, address, shift):
+        if shift > 0:
+            return address << shift
+        return address >> -shift
+
+    def _encode_many(self, bank, row, col):
+        bank, row, col = (np.asarray(v, dtype=np.int64) for v in (bank, row, col))
+        for value, width in [(bank, self.bankbits), (row, self.rowbits), (col, self.colbits)]:
+            assert np.all((value >= 0) & (value < 2**width)), "Value larger than value bit-width"
+        return self.mapping.encode(bank, row, col)
+
+    def encode_bus_many(self, *, bank, row, col, base=0x40000000, bus_width=32):
+        address = self._encode_many(bank, row, col)
+        return base + self._shift_many(address, self._get_bus_shift(bus_width))
+
+    def encode_dma_many(self, *, bank, row, col):
+        return self._encode_many(bank, row, col) >> self.address_align
+
+    def decode_bus_many(self, addresses, base=0x40000000, bus_width=32):
+        address = np.asarray(addresses, dtype=np.int64) - base
+        return self._decode(self._shift_many(address, -self._get_bus_shift(bus_width)))
+
+    def decode_dma_many(self, addresses):
+        return self._decode(np.asarray(addresses, dtype=np.int64) << self.address_align)
+
 
 # ######################### HW (accel) memory utils #############################
 
 
+class ProgressReporter:
+    """
+    Decouples the progress display from polling of the hardware.
+
+    Loops report progress on every poll, but a progress line of a given name is printed at
+    most ``rate`` times per second (and always for the last update of an operation), so the
+    console does not slow down the polling. With ``enabled=False`` (batch mode) nothing is
+    formatted nor printed. Updates passing the rate limit are also given to ``sink`` (a
+    callable taking a dict, see :func:`progress_sink`) for dashboards.
+    """
+
+    def __init__(self, rate=10, enabled=True, sink=None):
+        self.rate = rate
+        self.enabled = enabled
+        self.sink = sink
+        self._last_time = {}
+
+    def due(self, name, last=False):
+        """Whether an update would be reported now, to skip reading progress registers."""
+        if not self.enabled and self.sink is None:
+            return False
+        return last or time.monotonic() - self._last_time.get(name, -math.inf) >= 1 / self.rate
+
+    def report(self, name, current, total, render, last=False, **fields):
+        """``render`` is called to get the progress line only when it gets printed."""
+        if not self.due(name, last):
+            return
+        self._last_time[name] = time.monotonic()
+        if self.enabled:
+            print(render(), end='\n' if last else '\r')
+        if self.sink is not None:
+            self.sink(
+                dict(
+                    name=name, current=current, total=total, last=last, time=time.time(),
+                    **fields))
+
+    def close(self):
+        """Closes the sink (if it can be closed) and stops sending events to it."""
+        close = getattr(self.sink, 'close', None)
+        if close is not None:
+            close()
+        self.sink = None
+
+
+class ProgressSink:
+    """
+    Sink for :class:`ProgressReporter` writing events as JSON lines to a file, or sending
+    them as UDP datagrams if ``destination`` is ``udp://host:port``.
+    """
+
+    def __init__(self, destination):
+        self.address = None
+        if destination.startswith('udp://'):
+            host, port = destination[len('udp://'):].rsplit(':', 1)
+            self.address = (host, int(port))
+            self.file = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        else:
+            self.file = open(destination, 'a', buffering=1)
+
+    def __call__(self, event):
+        if self.address is None:
+            self.file.write(json.dumps(event) + '\n')
+            return
+        try:
+            self.file.sendto(json.dumps(event).encode(), self.address)
+        except OSError:
+            pass  # nobody listening, events are best effort
+
+    def close(self):
+        self.file.close()
+
+
+def progress_sink(destination):
+    """Returns a :class:`ProgressSink`, closed by :meth:`ProgressReporter.close`."""
+    return ProgressSink(destination)
+
+
+progress_reporter = ProgressReporter()
+
+
 def _progress(current, max, bar_w=40, last=False, name='Progress', opt=None):
-    s = '{name}: [{bar:{bw}}] {cur:{n}} / {max:{n}}{opt}'.format(
-        name=name,
-        cur=current,
-        max=max,
-        n=len(str(max)),
-        bar='=' * int(current / max * bar_w),
-        bw=bar_w,
-        opt='' if opt is None else ' ({})'.format(opt))
-    print(s + ' ', end='\n' if last else '\r')
+
+    def render():
+        s = '{name}: [{bar:{bw}}] {cur:{n}} / {max:{n}}{opt}'.format(
+            name=name,
+            cur=current,
+            max=max,
+            n=len(str(max)),
+            bar='=' * int(current / max * bar_w),
+            bw=bar_w,
+            opt='' if opt is None else ' ({})'.format(opt))
+        return s + ' '
+
+    progress_reporter.report(name, current, max, render, last=last)
 
 
 #
@@ -396,7 +513,8 @@ def hw_memset(wb, offset, size, patterns, dbg=False):
     while True:
         if wb.regs.writer_ready.read():
             break
-        _progress(wb.regs.writer_done.read(), count)
+        if progress_reporter.due('Progress'):
+            _progress(wb.regs.writer_done.read(), count)
         time.sleep(10e-3)  # 10 ms
     _progress(wb.regs.writer_done.read(), count, last=True)
 
@@ -404,6 +522,36 @@ def hw_memset(wb, offset, size, patterns, dbg=False):
 BISTError = namedtuple('BISTError', ['offset', 'data', 'expected'])
 
 
+def decode_errors_per_row(errors, *, converter, settings, base, bank=None):
+    """
+    Decodes errors returned by :func:`hw_memtest` and groups them by row.
+
+    Returns ``{row: [(word, data, expected)]}`` where ``word`` is the index of the 32-bit
+    word counted from the beginning of the row in ``bank`` (by default the bank of the
+    error). All the addresses are decoded at once with array operations, so this stays
+    fast for hundreds of thousands of errors.
+    """
+    if len(errors) == 0:
+        return {}
+    dma_data_bytes = settings.phy.dfi_databits * settings.phy.nphases // 8
+    # Only the offsets fit in 64 bits, data words are as wide as the DMA (128-512 bits)
+    offsets = np.fromiter((e.offset for e in errors), dtype=np.int64, count=len(errors))
+
+    addr = base + offsets * dma_data_bytes
+    err_bank, row, _ = converter.decode_bus_many(addr)
+    row_base = converter.encode_bus_many(
+        bank=err_bank if bank is None else bank, row=row, col=np.zeros_like(row))
+    word = (addr - row_base) // 4
+
+    # Stable sort keeps the order of errors within each row
+    order = np.argsort(row, kind='stable')
+    rows, starts = np.unique(row[order], return_index=True)
+    items = [(w, errors[i].data, errors[i].expected)
+             for w, i in zip(word[order].tolist(), order.tolist())]
+    bounds = starts.tolist() + [len(items)]
+    return {row: items[bounds[i]:bounds[i + 1]] for i, row in enumerate(rows.tolist())}
+
+
 def hw_memtest(wb, offset, size, patterns, dbg=False):
     # we are limited to multiples of DMA data width
     settings = get_litedram_settings()
@@ -446,8 +594,9 @@ def hw_memtest(wb, offset, size, patterns, dbg=False):
     errors = []
 
     def progress(last=False):
-        _progress(
-            wb.regs.reader_done.read(), count, last=last, opt='Errors: {}'.format(len(errors)))
+        if progress_reporter.due('Progress', last):
+            _progress(
+                wb.regs.reader_done.read(), count, last=last, opt='Errors: {}'.format(len(errors)))
 
     # Read unmatched offset
     def append_errors(wb, err):
@@ -466,7 +615,6 @@ def hw_memtest(wb, offset, size, patterns, dbg=False):
         if wb.regs.reader_ready.read():
             break
         append_errors(wb, errors)
-        _progress(wb.regs.reader_done.read(), count)
         progress()
         time.sleep(10e-3)  # !0 ms
     progress(last=True)
@@ -508,13 +656,114 @@ def get_expected_execution_cycles(payload):
     return cycles
 
 
-def execute_payload(wb, payload):
-    print('\nTransferring the payload ...')
-    memwrite(wb, payload, base=wb.mems.payload.base)
+def payload_executor_ready(wb):
+    status = wb.regs.payload_executor_status.read()
+    return (status & 1) != 0
+
+
+class PayloadMemoryMirror:
+    """
+    Host-side copy of the payload memory contents.
+
+    Consecutive payloads usually differ only in a few words (loop counts, row addresses),
+    so only the changed word ranges are uploaded. Ranges closer than ``max_gap`` words
+    are coalesced and sent in bursts of up to ``burst`` words.
+
+    Memory contents are unknown until the first upload (or after :meth:`invalidate`). If the
+    payload executor provides the checksum CSR, the mirror can be validated against the
+    memory contents, e.g. after reconnecting to the board.
+    """
+
+    def __init__(self, wb, burst=0xff, max_gap=4):
+        self.wb = wb
+        self.burst = burst
+        self.max_gap = max_gap
+        self.data = None
+
+    @property
+    def depth(self):
+        return self.wb.mems.payload.size // 4
+
+    @property
+    def has_checksum(self):
+        return hasattr(self.wb.regs, 'payload_executor_checksum')
+
+    def invalidate(self):
+        self.data = None
+
+    def read_checksum(self):
+        assert payload_executor_ready(self.wb)
+        self.wb.regs.payload_executor_checksum_start.write(1)
+        while not payload_executor_ready(self.wb):
+            time.sleep(0.001)
+        return self.wb.regs.payload_executor_checksum.read()
+
+    def validate(self, data=None):
+        """
+        Checks that the payload memory holds ``data`` (or the mirror contents if not given).
+        On success the mirror is updated, else it gets invalidated. Returns False if the
+        checksum CSR is not available.
+        """
+        if data is None:
+            data = self.data
+        if data is None or not self.has_checksum:
+            return False
+        data = list(data) + [0] * (self.depth - len(data))
+        if self.read_checksum() == payload_checksum(data):
+            self.data = data
+            return True
+        self.invalidate()
+        return False
 
-    def ready():
-        status = wb.regs.payload_executor_status.read()
-        return (status & 1) != 0
+    def changed_ranges(self, payload):
+        """Yields (start, end) ranges of words that differ from the mirror, split into bursts"""
+        start = end = None
+        for i, (new, old) in enumerate(zip(payload, self.data)):
+            if new == old:
+                continue
+            if start is not None and i - end > self.max_gap:
+                yield from self._bursts(start, end)
+                start = None
+            if start is None:
+                start = i
+            end = i + 1
+        if start is not None:
+            yield from self._bursts(start, end)
+
+    def _bursts(self, start, end):
+        for i in range(start, end, self.burst):
+            yield i, min(i + self.burst, end)
+
+    def upload(self, payload):
+        """Writes payload to the memory, returns the number of words transferred"""
+        payload = [int(w) for w in payload]
+        assert len(payload) <= self.depth, \
+            'Payload too long: {} vs {}'.format(len(payload), self.depth)
+
+        if self.data is None:
+            # Contents unknown, check if the memory already holds the payload padded with STOPs
+            padded = payload + [0] * (self.depth - len(payload))
+            if self.validate(padded):
+                return 0
+            self.data = padded
+            memwrite(self.wb, self.data, base=self.wb.mems.payload.base, burst=self.burst)
+            return self.depth
+
+        transferred = 0
+        for start, end in self.changed_ranges(payload):
+            self.wb.write(self.wb.mems.payload.base + 4 * start, payload[start:end])
+            self.data[start:end] = payload[start:end]
+            transferred += end - start
+        return transferred
+
+
+def execute_payload(wb, payload, mirror=None):
+    print('\nTransferring the payload ...')
+    if mirror is None:
+        memwrite(wb, payload, base=wb.mems.payload.base)
+    else:
+        transferred = mirror.upload(payload)
+        print('Transferred {} / {} words'.format(transferred, len(payload)))
 
     # if refresh is enabled we will consider tracking progress of dfi_switch_at_refresh
     refresh_enabled = hasattr(
@@ -533,7 +782,7 @@ def execute_payload(wb, payload):
         return False
 
     print('\nExecuting ...')
-    assert ready()
+    assert payload_executor_ready(wb)
 
     start = time.time()
     start_transition = None
@@ -542,7 +791,7 @@ def execute_payload(wb, payload):
     transitioned = False
     first = True
 
-    while not ready():
+    while not payload_executor_ready(wb):
         if refresh_enabled:
             # show progress of waiting for transition at concrete refresh command
             prev = transitioned
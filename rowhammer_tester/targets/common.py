@@ -39,6 +39,7 @@ import rowhammer_tester.targets.modules as local_modules
 from rowhammer_tester.gateware.bist import Reader, Writer, PatternMemory
 from rowhammer_tester.gateware.rowhammer import RowHammerDMA
 from rowhammer_tester.gateware.payload_executor import PayloadExecutor, DFISwitch, SyncableRefresher
+from rowhammer_tester.scripts.address_mapping import AddressMapping
 
 # SoC ----------------------------------------------------------------------------------------------
 
@@ -245,11 +246,14 @@ class RowHammerSoC(SoCCore):
             self.logger.info('{}: Length: {}, Data Width: {}-bit, Address width: {}-bit'.format(
                 colorer('BIST pattern'), colorer(pattern_length), colorer(pattern_data_width), colorer(32)))
 
-            assert controller_settings.address_mapping == 'ROW_BANK_COL'
-            row_offset = controller_settings.geom.bankbits + controller_settings.geom.colbits
+            geom = controller_settings.geom
+            address_mapping = AddressMapping.from_settings(controller_settings.address_mapping,
+                colbits=geom.colbits, rowbits=geom.rowbits, bankbits=geom.bankbits)
+            inversion_rowbits = int(self.args.bist_inversion_rowbits, 0)
             inversion_kwargs = dict(
-                rowbits   = int(self.args.bist_inversion_rowbits, 0),
-                row_shift = row_offset - self.sdram.controller.interface.address_align,
+                rowbits   = inversion_rowbits,
+                row_shift = address_mapping.row_address(inversion_rowbits,
+                    offset=self.sdram.controller.interface.address_align),
             )
 
             # Writer
@@ -0,0 +1,45 @@
+import unittest
+
+from rowhammer_tester.scripts.utils import DRAMAddressConverter
+
+
+class TestRowRange(unittest.TestCase):
+    # 128-bit DRAM port, 8 columns per port word, so 2 bytes of bus addresses per column
+    ARGS = dict(colbits=10, rowbits=14, bankbits=3, address_align=3, dram_port_width=128)
+    BASE = 0x40000000
+
+    def test_row_bank_col(self):
+        converter = DRAMAddressConverter(address_mapping='ROW_BANK_COL', **self.ARGS)
+        self.assertEqual(converter.row_span(), 2**10 * 2)
+        for bank, row in [(0, 0), (3, 100), (7, 2**14 - 2)]:
+            with self.subTest(bank=bank, row=row):
+                start, end = converter.row_range(bank=bank, row=row)
+                self.assertEqual(start, converter.row_base(bank=bank, row=row))
+                self.assertEqual(start, self.BASE + (((row << 3) | bank) << 10) * 2)
+                # The range ends where the next row of the address space starts, i.e. it
+                # includes the last 32-bit word of the row
+                next_bank, next_row = (bank + 1, row) if bank < 7 else (0, row + 1)
+                self.assertEqual(end, converter.row_base(bank=next_bank, row=next_row))
+                last_col = converter.encode_bus(bank=bank, row=row, col=2**10 - 1)
+                self.assertEqual(end - 4, last_col - last_col % 4)
+                self.assertEqual(converter.decode_bus(end - 4), (bank, row, 2**10 - 2))
+
+    def test_bank_row_col(self):
+        converter = DRAMAddressConverter(address_mapping='BANK_ROW_COL', **self.ARGS)
+        start, end = converter.row_range(bank=5, row=1234)
+        self.assertEqual(start, self.BASE + ((5 << 24) | (1234 << 10)) * 2)
+        self.assertEqual(end, converter.row_base(bank=5, row=1235))
+
+    def test_not_contiguous(self):
+        # Highest column bit above the bank bits, so a row takes two address ranges
+        mapping = {
+            'col': list(range(9)) + [12],
+            'bank': [9, 10, 11],
+            'row': list(range(13, 27)),
+        }
+        converter = DRAMAddressConverter(address_mapping=mapping, **self.ARGS)
+        converter.row_base(bank=1, row=2)
+        with self.assertRaisesRegex(AssertionError, 'not at contiguous addresses'):
+            converter.row_span()
+        with self.assertRaisesRegex(AssertionError, 'not at contiguous addresses'):
+            converter.row_range(bank=1, row=2)
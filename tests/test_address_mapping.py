@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from rowhammer_tester.scripts.address_mapping import AddressMapping
+
+
+class TestAddressMapping(unittest.TestCase):
+    GEOM = dict(colbits=10, rowbits=14, bankbits=3)
+    # Bank bits XORed with the 3 lowest row bits
+    BANK_XOR = {
+        'col': list(range(10)),
+        'bank': [[10, 13], [11, 14], [12, 15]],
+        'row': list(range(13, 27)),
+    }
+
+    def test_row_bank_col(self):
+        mapping = AddressMapping.from_name('ROW_BANK_COL', **self.GEOM)
+        self.assertTrue(mapping.identity)
+        for bank, row, col in [(0, 0, 0), (7, 2**14 - 1, 1023), (3, 1234, 567)]:
+            address = (row << 13) | (bank << 10) | col
+            self.assertEqual(mapping.encode(bank, row, col), address)
+            self.assertEqual(mapping.decode(address), (bank, row, col))
+
+    def test_bank_row_col(self):
+        mapping = AddressMapping.from_name('BANK_ROW_COL', **self.GEOM)
+        self.assertFalse(mapping.identity)
+        self.assertEqual(mapping.encode(5, 1234, 567), (5 << 24) | (1234 << 10) | 567)
+        self.assertEqual(mapping.decode((5 << 24) | (1234 << 10) | 567), (5, 1234, 567))
+
+    def test_bank_xor(self):
+        mapping = AddressMapping(bits=self.BANK_XOR, **self.GEOM)
+        address = mapping.encode(2, 0b101, 7)
+        self.assertEqual(address, (0b101 << 13) | ((2 ^ 0b101) << 10) | 7)
+        self.assertEqual(mapping.decode(address), (2, 0b101, 7))
+
+    def test_batch(self):
+        mapping = AddressMapping(bits=self.BANK_XOR, **self.GEOM)
+        rng = np.random.default_rng(0)
+        bank, row, col = (rng.integers(0, 2**n, 1000) for n in [3, 14, 10])
+        address = mapping.encode(bank, row, col)
+        scalar = [mapping.encode(*v) for v in zip(bank.tolist(), row.tolist(), col.tolist())]
+        self.assertEqual(address.tolist(), scalar)
+        for decoded, expected in zip(mapping.decode(address), [bank, row, col]):
+            np.testing.assert_array_equal(decoded, expected)
+
+    def test_not_bijective(self):
+        bits = dict(self.BANK_XOR, bank=[[10, 13], [10, 13], [12, 15]])
+        with self.assertRaises(ValueError):
+            AddressMapping(bits=bits, **self.GEOM)
+
+    def test_row_address(self):
+        mapping = AddressMapping.from_name('ROW_BANK_COL', **self.GEOM)
+        self.assertEqual(mapping.row_address(5, offset=3), 10)
+        # Row bits are not changed by bank hashing
+        mapping = AddressMapping(bits=self.BANK_XOR, **self.GEOM)
+        self.assertEqual(mapping.row_address(5, offset=3), 10)
+        bits = dict(self.BANK_XOR, bank=[10, 11, 12], row=[[13, 10]] + list(range(14, 27)))
+        mapping = AddressMapping(bits=bits, **self.GEOM)
+        self.assertEqual(mapping.row_address(2, offset=3), ((10, 7), (11, )))
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from rowhammer_tester.scripts.campaign import Campaign, CampaignError
+from rowhammer_tester.scripts.results import Checkpoint
+from rowhammer_tester.scripts.utils import progress_reporter
+
+
+class FakeWishbone:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRowHammer:
+    """Records the tests, flips bit 3 of column 16 in the row after each hammered row."""
+
+    def __init__(self, wb, *, payload_executor, **kwargs):
+        self.payload_executor = payload_executor
+        self.no_attack_time = None
+        self.runs = []
+
+    def run(self, row_pairs, pattern_generator, read_count, verify_initial, **kwargs):
+        self.runs.append((row_pairs, read_count, kwargs, self.no_attack_time))
+        victims = {max(row_tuple) + 1 for row_tuple in row_pairs}
+        # Integer row keys, which results normalize to strings
+        return {
+            row: {'bank': 0, 'row': row, 'col': {16: [3]}, 'bitflips': 1}
+            for row in sorted(victims)
+        }
+
+
+class TestCampaign(unittest.TestCase):
+    def campaign(self, **kwargs):
+        return Campaign(
+            FakeWishbone(), settings=object(), row_hammer_cls=FakeRowHammer, **kwargs)
+
+    def test_hammer(self):
+        with self.campaign() as campaign:
+            result = campaign.hammer([8, 10], read_count=1000)
+        self.assertEqual(result.rows, [11])
+        self.assertEqual(result.bitflips, 1)
+        self.assertTrue(campaign.wb.closed)
+        self.assertEqual(campaign.row_hammer.runs, [([(8, 10)], 1000, {}, None)])
+
+    def test_progress_restored(self):
+        enabled = progress_reporter.enabled
+        self.addCleanup(setattr, progress_reporter, 'enabled', enabled)
+        progress_reporter.enabled = True
+        with self.campaign(verbose=False):
+            self.assertFalse(progress_reporter.enabled)
+        self.assertTrue(progress_reporter.enabled)
+
+    def test_bist_row_count(self):
+        with self.campaign(payload_executor=False) as campaign:
+            with self.assertRaisesRegex(CampaignError, 'power of 2'):
+                campaign.hammer((8, 10, 12), read_count=1000)
+            campaign.hammer((8, 10), read_count=1000)
+        self.assertEqual(len(campaign.row_hammer.runs), 1)
+
+    def test_test_key(self):
+        campaign = self.campaign()
+        keys = [campaign._test_key([(1, 1)], 'all_1', {}) for _ in range(2)]
+        self.assertEqual([key.rsplit('#', 1)[1] for key in keys], ['1', '2'])
+        # Occurrences are counted separately for each test
+        self.assertTrue(campaign._test_key([(2, 2)], 'all_1', {}).endswith('#1'))
+        self.assertTrue(campaign._test_key([(1, 1)], 'all_0', {}).endswith('#1'))
+
+    def test_hammer_many(self):
+        campaign = self.campaign()
+        campaign.row_hammer.no_attack_time = 1e9
+        result = campaign.hammer_many([((8, 8), 1000), ((40, 40), 2000.0)])
+        self.assertEqual(result.rows, [9, 41])
+        self.assertEqual(
+            campaign.row_hammer.runs,
+            [([(8, 8), (40, 40)], 2000, {'read_counts': [1000, 2000]}, None)])
+
+    def test_retention(self):
+        campaign = self.campaign()
+        campaign.retention(0.5)
+        self.assertEqual(campaign.row_hammer.runs, [([], 0, {}, 0.5e9)])
+        self.assertIsNone(campaign.row_hammer.no_attack_time)
+
+    def test_checkpoint_resume(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'checkpoint.jsonl')
+            with self.campaign(checkpoint=Checkpoint(path)) as campaign:
+                first = [campaign.hammer((8, 8), 1000) for _ in range(2)]
+
+            with self.campaign(checkpoint=Checkpoint(path)) as campaign:
+                resumed = [campaign.hammer((8, 8), 1000) for _ in range(3)]
+                retention = campaign.retention(1)
+            # Only the third occurrence and the retention test are run again
+            self.assertEqual(len(campaign.row_hammer.runs), 2)
+            self.assertEqual(campaign.row_hammer.runs[1][3], 1e9)
+        self.assertEqual([r.errors_in_rows for r in resumed[:2]], [r.errors_in_rows for r in first])
+        # Column keys are integers again after the JSON round trip
+        self.assertEqual(resumed[0].errors_in_rows['9']['col'], {16: [3]})
+        self.assertEqual(resumed[0].duration, first[0].duration)
+        # A restored result has the same keys as the one of the test itself
+        for restored, fresh in [(resumed[0], first[0]), (resumed[0], resumed[2])]:
+            self.assertEqual(restored.errors_in_rows, fresh.errors_in_rows)
+            self.assertEqual(
+                [(type(row), [type(col) for col in errors['col']])
+                 for row, errors in restored.errors_in_rows.items()],
+                [(type(row), [type(col) for col in errors['col']])
+                 for row, errors in fresh.errors_in_rows.items()])
+        self.assertEqual(retention.rows, [])
@@ -0,0 +1,56 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from rowhammer_tester.scripts.utils import BISTError, decode_errors_per_row
+
+BASE = 0x40000000
+ROW_BYTES = 4096
+NROWS = 16
+
+
+class FakeConverter:
+    """Rows of ``ROW_BYTES`` bytes, banks of ``NROWS`` rows."""
+
+    def decode_bus_many(self, addresses):
+        row_index = (np.asarray(addresses, dtype=np.int64) - BASE) // ROW_BYTES
+        return row_index // NROWS, row_index % NROWS, np.zeros_like(row_index)
+
+    def encode_bus_many(self, *, bank, row, col):
+        return BASE + (np.asarray(bank) * NROWS + row) * ROW_BYTES + col
+
+
+class TestDecodeErrorsPerRow(unittest.TestCase):
+    # 512-bit DMA words, 64 bytes
+    SETTINGS = SimpleNamespace(phy=SimpleNamespace(dfi_databits=128, nphases=4))
+    WORDS_PER_ROW = ROW_BYTES // 64
+
+    def decode(self, errors, **kwargs):
+        return decode_errors_per_row(
+            errors, converter=FakeConverter(), settings=self.SETTINGS, base=BASE, **kwargs)
+
+    def test_wide_words(self):
+        ones = (1 << 512) - 1
+        errors = [
+            BISTError(offset=5, data=ones - 2, expected=ones),
+            BISTError(offset=2 * self.WORDS_PER_ROW + 1, data=0, expected=1 << 511),
+            BISTError(offset=7, data=ones - 1, expected=ones),
+            # Row 0 of bank 1
+            BISTError(offset=NROWS * self.WORDS_PER_ROW, data=1, expected=0),
+        ]
+        self.assertEqual(
+            self.decode(errors), {
+                0: [(5 * 16, ones - 2, ones), (7 * 16, ones - 1, ones), (0, 1, 0)],
+                2: [(16, 0, 1 << 511)],
+            })
+
+    def test_bank(self):
+        errors = [BISTError(offset=NROWS * self.WORDS_PER_ROW + 3, data=1, expected=0)]
+        self.assertEqual(self.decode(errors), {0: [(3 * 16, 1, 0)]})
+        # Word counted from the beginning of the row in bank 0
+        self.assertEqual(
+            self.decode(errors, bank=0), {0: [((NROWS * self.WORDS_PER_ROW + 3) * 16, 1, 0)]})
+
+    def test_empty(self):
+        self.assertEqual(self.decode([]), {})
@@ -0,0 +1,51 @@
+import random
+import unittest
+
+import numpy as np
+
+from rowhammer_tester.scripts.flip_stats import (
+    dq_histogram, dqs_with_flips, flips_per_beat, flips_per_burst, flips_per_chip, flips_per_dq,
+    histogram, masks_to_bits)
+
+
+class TestFlipStats(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.bit_lists = [rng.sample(range(512), rng.randint(0, 10)) for _ in range(50)]
+        self.masks = [sum(1 << bit for bit in bits) for bits in self.bit_lists]
+        self.bits = masks_to_bits(self.masks)
+
+    def test_masks_to_bits(self):
+        self.assertEqual(self.bits.shape, (50, 512))
+        for bits, row in zip(self.bit_lists, self.bits):
+            self.assertEqual(sorted(bits), np.nonzero(row)[0].tolist())
+
+    def test_counts(self):
+        for nr_chips in [4, 8, 16]:
+            dq_bits = 64 // nr_chips
+            expected = np.zeros((50, 8, nr_chips), dtype=int)
+            for word, bits in enumerate(self.bit_lists):
+                for bit in bits:
+                    expected[word, bit // 64, bit % 64 // dq_bits] += 1
+            with self.subTest(nr_chips=nr_chips):
+                np.testing.assert_array_equal(
+                    flips_per_chip(self.bits, nr_chips, per_beat=True), expected)
+                np.testing.assert_array_equal(
+                    flips_per_chip(self.bits, nr_chips), expected.sum(axis=1))
+        np.testing.assert_array_equal(flips_per_beat(self.bits), expected.sum(axis=2))
+        self.assertEqual(flips_per_burst(self.bits).tolist(), [len(b) for b in self.bit_lists])
+
+    def test_dq(self):
+        all_bits = [bit for bits in self.bit_lists for bit in bits]
+        expected = np.bincount([bit % 64 for bit in all_bits], minlength=64)
+        np.testing.assert_array_equal(flips_per_dq(self.bits), expected)
+        np.testing.assert_array_equal(dq_histogram(all_bits), expected)
+        self.assertEqual(dqs_with_flips([130, 2, 66, 5]), [2, 5])
+        # Listed in order of the first bitflip, as in vis descriptions of logs2vis
+        self.assertEqual(dqs_with_flips([69, 2, 5, 1]), [5, 2, 1])
+        self.assertEqual(dqs_with_flips([]), [])
+
+    def test_histogram(self):
+        self.assertEqual(histogram([0, 3, 1, 3, 0]), {1: 1, 3: 2})
+        self.assertEqual(histogram(flips_per_beat(masks_to_bits([]))), {})
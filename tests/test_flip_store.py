@@ -0,0 +1,152 @@
+import os
+import json
+import tempfile
+import unittest
+
+import numpy as np
+
+from rowhammer_tester.scripts.flip_store import FlipStore, FlipStoreBuilder, import_file
+from rowhammer_tester.scripts.results import ResultWriter
+
+
+def errors(row, bank=0, **cols):
+    return {'bank': bank, 'row': row, 'col': {k[1:]: v for k, v in cols.items()}, 'bitflips': 1}
+
+
+class TestFlipStore(unittest.TestCase):
+    SUMMARY = {
+        '1000': {
+            'read_count': 1000,
+            'pair_8_8': {
+                'hammer_row_1': 8,
+                'hammer_row_2': 8,
+                'errors_in_rows': {
+                    '9': errors(9, c16=[70]),
+                    '10': errors(10, bank=1, c0=[3, 200]),
+                },
+            },
+            'pair_20_20_bank_3': {
+                'hammer_row_1': 20,
+                'hammer_row_2': 20,
+                'errors_in_rows': {
+                    '21': {'row': 21, 'col': {'5': [1]}}
+                },
+            },
+        },
+    }
+    RETENTION = {
+        'metadata': {'num_repeats': 2},
+        'raw_data': {
+            'time_0.5': {
+                'attack_time': 0.5,
+                'repeat_results': [1, 2],
+                'repeat_details': [
+                    {'7_bank2': {'col': {'3': {'bitflip_positions': [4], 'total_bitflips': 1}}}},
+                    {'7_bank2': {'bank': 2, 'col': {'3': {'bitflip_positions': [4, 5]}}}},
+                ],
+            },
+        },
+    }
+
+    def build(self, tmpdir):
+        builder = FlipStoreBuilder()
+        for name, doc in [('summary.json', self.SUMMARY), ('retention.json', self.RETENTION)]:
+            path = os.path.join(tmpdir, name)
+            with open(path, 'w') as f:
+                json.dump(doc, f)
+            import_file(builder, path)
+        path = os.path.join(tmpdir, 'results.jsonl')
+        with ResultWriter(path) as writer:
+            writer.write(1000, 'pair_8_8', self.SUMMARY['1000']['pair_8_8'])
+        import_file(builder, path)
+        return builder.build()
+
+    def check(self, store):
+        self.assertEqual(
+            store.campaigns.tolist(), ['summary.json', 'retention.json', 'results.jsonl'])
+        self.assertEqual(
+            store.attacks['key'].tolist(),
+            ['pair_8_8', 'pair_20_20_bank_3', 'time_0.5', 'time_0.5', 'pair_8_8'])
+        self.assertEqual(store.flips_per_attack().tolist(), [3, 1, 1, 2, 3])
+        self.assertEqual(store['attack_id'].tolist(), [0, 0, 0, 1, 2, 3, 3, 4, 4, 4])
+        self.assertEqual(store['campaign_id'].tolist(), [0, 0, 0, 0, 1, 1, 1, 2, 2, 2])
+        self.assertEqual(store['bank'].tolist(), [0, 1, 1, 3, 2, 2, 2, 0, 1, 1])
+        self.assertEqual(store['row'].tolist(), [9, 10, 10, 21, 7, 7, 7, 9, 10, 10])
+        self.assertEqual(store.attacks['read_count'].tolist(), [1000, 1000, -1, -1, 1000])
+        self.assertEqual(store.attacks['repeat'].tolist(), [-1, -1, 0, 1, -1])
+
+        flips = store.attack_flips(0)
+        self.assertEqual(flips['col'].tolist(), [16, 0, 0])
+        self.assertEqual(flips['bit'].tolist(), [70, 3, 200])
+        selected = store.select(bank=1, campaign_id=[0, 1])
+        self.assertEqual(selected['bit'].tolist(), [3, 200])
+
+    def test_import(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.check(self.build(tmpdir))
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = self.build(tmpdir)
+            for name in ['store.npz', 'store']:
+                with self.subTest(name=name):
+                    path = os.path.join(tmpdir, name)
+                    store.save(path)
+                    loaded = FlipStore.load(path)
+                    self.check(loaded)
+                    self.assertTrue(np.isnan(loaded.attacks['attack_time'][0]))
+            self.assertIsInstance(FlipStore.load(path)['row'], np.memmap)
+
+    def test_empty(self):
+        store = FlipStoreBuilder().build()
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.nattacks, 0)
+        self.assertEqual(store['row'].dtype, np.uint32)
+
+    def test_hcfirst_layout(self):
+        hcfirst = {
+            '4': {'row': 4, 'status': 'success', 'hcfirst': 13800, 'hammer_row_1': 4,
+                  'hammer_row_2': 4, 'errors_in_rows': {'5': errors(5, c288=[208])}},
+            '5': {'row': 5, 'status': 'success', 'hcfirst': 12000, 'hammer_row_1': 5,
+                  'hammer_row_2': 5, 'errors_in_rows': {}},
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'hcfirst.json')
+            with open(path, 'w') as f:
+                json.dump(hcfirst, f)
+            builder = FlipStoreBuilder()
+            import_file(builder, path)
+        store = builder.build()
+        self.assertEqual(store.attacks['key'].tolist(), ['4', '5'])
+        self.assertEqual(store.attacks['hcfirst'].tolist(), [13800, 12000])
+        self.assertEqual(store.attacks['hammer_row_1'].tolist(), [4, 5])
+        self.assertEqual(store['col'].tolist(), [288])
+
+    def test_row_keys(self):
+        builder = FlipStoreBuilder()
+        campaign_id = builder.add_campaign('keys')
+        for key in ['victim', '5x', '5_bank']:
+            with self.subTest(key=key):
+                with self.assertRaisesRegex(ValueError, repr(key)):
+                    builder.add_attack(campaign_id, 'b', {key: {'col': {'0': [1]}}})
+        builder.add_attack(campaign_id, 'a', {
+            'victim_a': {'row': 3, 'bank': 1, 'col': {'0': [1]}},
+            'victim_b': {'row': 4, 'col': {'0': [2]}},
+            '5_bank6': {'col': {'0': [3]}},
+        }, default_bank=2)
+        store = builder.build()
+        self.assertEqual(store['row'].tolist(), [3, 4, 5])
+        self.assertEqual(store['bank'].tolist(), [1, 2, 6])
+        # Invalid entries were not added
+        self.assertEqual(store.attacks['key'].tolist(), ['a'])
+
+    def test_errors_in_rows(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = self.build(tmpdir)
+        errors = store.errors_in_rows(0)
+        self.assertEqual(list(errors), ['9', '10'])
+        self.assertEqual(
+            errors['10'], {'bank': 1, 'row': 10, 'col': {'0': [3, 200]}, 'bitflips': 2})
+        self.assertEqual(
+            store.errors_in_rows(3),
+            {'7': {'bank': 2, 'row': 7, 'col': {'3': [4, 5]}, 'bitflips': 2}})
@@ -0,0 +1,81 @@
+import io
+import unittest
+import contextlib
+
+from rowhammer_tester.scripts.campaign import TestResult
+from rowhammer_tester.scripts.hcfirst import ParallelHCfirst
+from rowhammer_tester.scripts.hcfirst_search import HCfirstPrior
+from rowhammer_tester.scripts.rowhammer import group_row_pairs
+
+
+class FakeCampaign:
+    """Hammering a row at least ``thresholds[row]`` times flips a bit in the next row."""
+
+    def __init__(self, thresholds):
+        self.thresholds = thresholds
+        self.calls = []
+
+    def hammer_many(self, hammers, pattern='all_1'):
+        self.calls.append(hammers)
+        errors_in_rows = {}
+        for row_tuple, count in hammers:
+            row = row_tuple[0]
+            if count >= self.thresholds[row]:
+                errors_in_rows[str(row + 1)] = {
+                    'bank': 0, 'row': row + 1, 'col': {0: [row]}, 'bitflips': 1}
+        return TestResult(errors_in_rows=errors_in_rows, duration=0)
+
+
+class TestParallelHCfirst(unittest.TestCase):
+    ARGS = dict(min_hc=1000, max_hc=30000, precision=1, distance=8, batch_size=4)
+    ROWS = range(40)
+
+    def thresholds(self):
+        thresholds = {row: 1000 + (row * 7919) % 28000 for row in self.ROWS}
+        thresholds[5] = 40000  # never flips
+        thresholds[6] = 1000
+        return thresholds
+
+    def run_engine(self, engine):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return engine.run(self.ROWS)
+
+    def check(self, engine, campaign, results):
+        thresholds = campaign.thresholds
+        self.assertEqual(sorted(results), list(self.ROWS))
+        for row, search in results.items():
+            with self.subTest(row=row):
+                if thresholds[row] > self.ARGS['max_hc']:
+                    self.assertIsNone(search.hcfirst)
+                    self.assertEqual(search.errors_in_rows, {})
+                else:
+                    self.assertEqual(search.hcfirst, thresholds[row])
+                    # Only the own victim of the row, never ones of other rows of the batch
+                    self.assertEqual(list(search.errors_in_rows), [str(row + 1)])
+                    self.assertEqual(search.errors_in_rows[str(row + 1)]['col'], {0: [row]})
+
+        self.assertEqual(engine.rounds, len(campaign.calls))
+        for hammers in campaign.calls:
+            rows = sorted(row_tuple[0] for row_tuple, _ in hammers)
+            self.assertLessEqual(len(rows), self.ARGS['batch_size'])
+            self.assertTrue(all(b - a >= self.ARGS['distance'] for a, b in zip(rows, rows[1:])))
+
+    def test_run(self):
+        campaign = FakeCampaign(self.thresholds())
+        engine = ParallelHCfirst(campaign, **self.ARGS)
+        results = self.run_engine(engine)
+        self.check(engine, campaign, results)
+        # Rows of a batch are searched in parallel, so a batch takes as many rounds as the
+        # longest search of its rows
+        batches = group_row_pairs(
+            [(row, row) for row in self.ROWS], self.ARGS['distance'],
+            max_round_size=self.ARGS['batch_size'])
+        self.assertEqual(
+            engine.rounds,
+            sum(max(results[row_tuple[0]].probes for _, row_tuple in batch) for batch in batches))
+        self.assertLess(engine.rounds, sum(s.probes for s in results.values()) / 2)
+
+    def test_prior(self):
+        campaign = FakeCampaign(self.thresholds())
+        engine = ParallelHCfirst(campaign, prior=HCfirstPrior(min_samples=2), **self.ARGS)
+        self.check(engine, campaign, self.run_engine(engine))
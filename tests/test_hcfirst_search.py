@@ -0,0 +1,51 @@
+import unittest
+
+from rowhammer_tester.scripts.hcfirst_search import (
+    RowSearch, BisectSearch, BracketSearch, HCfirstPrior)
+
+
+def run_search(search, threshold):
+    while not search.resolved:
+        count = search.next_probe()
+        search.observe(count, {'0': {}} if count >= threshold else {})
+    return search
+
+
+class TestHCfirstSearch(unittest.TestCase):
+    ARGS = dict(min_hc=1000, max_hc=30000, precision=100)
+
+    def expected(self, threshold):
+        search = RowSearch((0, 0), **self.ARGS)
+        if threshold > search.max_hc:
+            return None
+        return search.value(search.index(threshold))
+
+    def test_searches_agree(self):
+        for threshold in [500, 1000, 1001, 4321, 17000, 29950, 30000, 40000]:
+            expected = self.expected(threshold)
+            searches = [
+                RowSearch((0, 0), **self.ARGS),
+                BisectSearch((0, 0), **self.ARGS),
+                BracketSearch((0, 0), (4000, 5000), **self.ARGS),
+                BracketSearch((0, 0), (20000, 21000), **self.ARGS),
+            ]
+            for search in searches:
+                with self.subTest(threshold=threshold, search=type(search).__name__):
+                    self.assertEqual(run_search(search, threshold).hcfirst, expected)
+
+    def test_bisect_probes(self):
+        search = run_search(BisectSearch((0, 0), **self.ARGS), 1000)
+        # max_hc first, then bisection of 291 grid points
+        self.assertLessEqual(search.probes, 1 + 9)
+
+    def test_explicit_flipped(self):
+        search = RowSearch((0, 0), **self.ARGS)
+        search.observe(search.next_probe(), None, flipped=True)
+        self.assertEqual(search.hcfirst, 1000)
+
+    def test_prior(self):
+        prior = HCfirstPrior(radius=2, min_samples=2)
+        self.assertIsNone(prior.bracket(10))
+        prior.add(9, 5000)
+        prior.add(11, 5400)
+        self.assertEqual(prior.bracket(10), (4160, 6240))
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from rowhammer_tester.scripts.heatmap import HeatmapData, HeatmapPyramid, aligned_bins
+
+
+class TestHeatmap(unittest.TestCase):
+
+    def test_from_points(self):
+        data = HeatmapData.from_points([3, -1, 3, 0], [7, 7, 7, 2], weights=[1, 2, 4, 1])
+        self.assertEqual(data.rows.tolist(), [2, 7, 7])
+        self.assertEqual(data.xdata.tolist(), [0, -1, 3])
+        self.assertEqual(data.bitflips.tolist(), [1, 2, 5])
+        self.assertEqual(data.row_range, (2, 7))
+
+    def test_window(self):
+        rng = np.random.default_rng(0)
+        xdata, rows = rng.integers(0, 64, 1000), rng.integers(0, 512, 1000)
+        data = HeatmapData.from_points(xdata, rows)
+        qx, qrows, qbitflips = data.window([10, 20], [100, 300])
+        mask = (xdata >= 10) & (xdata < 20) & (rows >= 100) & (rows < 300)
+        self.assertEqual(qbitflips.sum(), mask.sum())
+        self.assertTrue(((qx >= 10) & (qx < 20) & (qrows >= 100) & (qrows < 300)).all())
+
+    def test_empty(self):
+        data = HeatmapData.from_points([], [])
+        self.assertEqual(len(data), 0)
+        self.assertEqual(data.row_range, (0, 0))
+        self.assertEqual(len(data.window([0, 10], [0, 10])[0]), 0)
+
+    def test_pyramid(self):
+        rng = np.random.default_rng(1)
+        xdata, rows = rng.integers(-4, 100, 2000), rng.integers(0, 1000, 2000)
+        pyramid = HeatmapPyramid(HeatmapData.from_points(xdata, rows))
+        views = [([0, 128], [0, 1024], 16, 64), ([-4, 104], [3, 999], 4, 4),
+                 ([-1, 2], [500, 508], 1, 2), ([8, 40], [0, 960], 8, 96)]
+        for xlim, ylim, xstep, ystep in views:
+            with self.subTest(xlim=xlim, ylim=ylim, xstep=xstep, ystep=ystep):
+                histogram = pyramid.histogram(xlim, ylim, xstep, ystep)
+                mask = (xdata >= xlim[0]) & (xdata < xlim[1]) & (rows >= ylim[0]) & (rows < ylim[1])
+                expected = np.zeros(histogram.shape, dtype=int)
+                np.add.at(
+                    expected,
+                    ((xdata[mask] - xlim[0]) // xstep, (rows[mask] - ylim[0]) // ystep), 1)
+                np.testing.assert_array_equal(histogram, expected)
+        self.assertIn((3, 5), pyramid.levels)
+
+    def test_aligned_bins(self):
+        self.assertEqual(aligned_bins(0, 64, 64), (0, 64, 1))
+        self.assertEqual(aligned_bins(100, 5000, 64), (0, 5120, 128))
+        self.assertEqual(aligned_bins(3, 8190, 64), (0, 8192, 128))
+        self.assertEqual(aligned_bins(-1, 1024, 64), (-32, 1024, 32))
+        self.assertEqual(aligned_bins(7.5, 8, 64), (7, 8, 1))
+
+    def test_aligned_view_level(self):
+        # A typical zoomed view, with limits not aligned to anything
+        rng = np.random.default_rng(2)
+        xdata, rows = rng.integers(0, 1024, 5000), rng.integers(0, 8192, 5000)
+        pyramid = HeatmapPyramid(HeatmapData.from_points(xdata, rows))
+        for view in [((37.2, 901.7), (100.4, 5000.5)), ((3, 1023), (3, 8190))]:
+            with self.subTest(view=view):
+                xstart, xstop, xstep = aligned_bins(*view[0], 64)
+                ystart, ystop, ystep = aligned_bins(*view[1], 64)
+                xlim, ylim = [xstart, xstop], [ystart, ystop]
+                self.assertEqual(
+                    pyramid.level_for(xlim, ylim, xstep, ystep),
+                    (xstep.bit_length() - 1, ystep.bit_length() - 1))
+                self.assertLessEqual((xstop - xstart) // xstep, 64)
+                self.assertLessEqual((ystop - ystart) // ystep, 64)
+                histogram = pyramid.histogram(xlim, ylim, xstep, ystep)
+                mask = (xdata >= xstart) & (xdata < xstop) & (rows >= ystart) & (rows < ystop)
+                self.assertEqual(histogram.sum(), mask.sum())
+        # Bins from the coarsest level have a few cells to sum
+        self.assertLessEqual(len(pyramid.level(4, 7)), 64 * 64)
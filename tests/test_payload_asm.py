@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from rowhammer_tester.gateware.payload_executor import Encoder, OpCode
+from rowhammer_tester.payload.asm import (
+    assemble, disassemble, AssemblerError, PayloadCache, load_payload, save_binary)
+
+
+class TestPayloadAssembler(unittest.TestCase):
+    SOURCE = """
+    # sample payload
+            NOOP  50
+    hammer: ACT   20  bank=1 row=100
+            READ  20  bank=1, col=13   ; comment
+            PRE   20  col=0x400
+            LOOP  999 hammer
+            REF   60
+    single:
+            ACT   3   address=0x123
+            LOOP  2   -1
+            STOP
+    """
+
+    def expected(self, encoder):
+        return [
+            encoder(OpCode.NOOP, timeslice=50),
+            encoder(OpCode.ACT,  timeslice=20, address=encoder.address(bank=1, row=100)),
+            encoder(OpCode.READ, timeslice=20, address=encoder.address(bank=1, col=13)),
+            encoder(OpCode.PRE,  timeslice=20, address=encoder.address(col=1 << 10)),
+            encoder(OpCode.LOOP, count=999, jump=3),
+            encoder(OpCode.REF,  timeslice=60),
+            encoder(OpCode.ACT,  timeslice=3, address=0x123),
+            encoder(OpCode.LOOP, count=2, jump=1),
+            encoder(OpCode.NOOP, timeslice=0),
+        ]
+
+    def test_assemble(self):
+        words = assemble(self.SOURCE, bankbits=3)
+        self.assertEqual(str(words.dtype), 'uint32')
+        self.assertEqual(words.tolist(), self.expected(Encoder(bankbits=3)))
+
+    def test_assemble_ranks(self):
+        words = assemble("ACT 5 rank=1 bank=2 row=7", bankbits=3, nranks=2)
+        encoder = Encoder(bankbits=3, nranks=2)
+        self.assertEqual(words.tolist(),
+            [encoder(OpCode.ACT, timeslice=5, address=encoder.address(rank=1, bank=2, row=7))])
+
+    def test_roundtrip(self):
+        for nranks in [1, 2, 4]:
+            with self.subTest(nranks=nranks):
+                words = assemble(self.SOURCE, bankbits=3, nranks=nranks)
+                text = disassemble(words, bankbits=3, nranks=nranks)
+                self.assertEqual(assemble(text, bankbits=3, nranks=nranks).tolist(), words.tolist())
+
+    def test_disassemble_labels(self):
+        text = disassemble(assemble(self.SOURCE, bankbits=3), bankbits=3)
+        lines = text.splitlines()
+        self.assertTrue(lines[1].startswith('L1:'))
+        self.assertIn('LOOP  999 L1', lines[4])
+
+    def test_disassemble_strip(self):
+        words = assemble("REF 10\nSTOP", bankbits=3).tolist() + [0] * 10
+        self.assertEqual(disassemble(words, bankbits=3).split(), ['REF', '10', 'STOP'])
+        self.assertEqual(len(disassemble(words, bankbits=3, strip=False).splitlines()), 12)
+
+    def test_errors(self):
+        sources = {
+            'FOO 10': 1,
+            'NOOP 1\nACT 0 row=1': 2,
+            'REF 64': 1,
+            'LOOP 1 missing': 1,
+            'x: NOOP 1\nx: NOOP 2': 2,
+            'ACT 5 row=1 address=2': 1,
+            'LOOP 4096 -1': 1,
+            'PRE 5 page=1': 1,
+        }
+        for source, lineno in sources.items():
+            with self.subTest(source=source):
+                with self.assertRaises(AssemblerError) as cm:
+                    assemble(source, bankbits=3)
+                self.assertEqual(cm.exception.lineno, lineno)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = PayloadCache(os.path.join(tmpdir, 'cache'))
+            words = cache.assemble(self.SOURCE, bankbits=3)
+            key = cache.key(self.SOURCE, bankbits=3)
+            self.assertTrue(os.path.isfile(cache.path(key)))
+            self.assertNotEqual(key, cache.key(self.SOURCE, bankbits=4))
+            self.assertNotEqual(key, cache.key(self.SOURCE + 'STOP', bankbits=3))
+
+            # cached binary is used instead of assembling the source again
+            save_binary(cache.path(key), [1, 2, 3])
+            self.assertEqual(cache.assemble(self.SOURCE, bankbits=3).tolist(), [1, 2, 3])
+
+            path = os.path.join(tmpdir, 'payload.bin')
+            save_binary(path, words)
+            self.assertEqual(load_payload(path, bankbits=3).tolist(), words.tolist())
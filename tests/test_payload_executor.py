@@ -645,6 +645,39 @@ class TestPayloadExecutor(unittest.TestCase):
                 dut.dfi_switch.add_csrs()
                 run_simulation(dut, [generator(dut, switch_at), *dut.get_generators()])
 
+    def test_checksum(self):
+        # Check that the payload memory checksum matches the one calculated on host
+        def generator(dut, result):
+            yield from dut.payload_executor._checksum_start.write(1)
+            yield
+            self.assertEqual((yield dut.payload_executor.ready), 0)
+            while not (yield dut.payload_executor.ready):
+                yield
+            result.append((yield from dut.payload_executor._checksum.read()))
+
+        encoder = Encoder(bankbits=3)
+        payload = [
+            encoder(OpCode.NOOP, timeslice=10),
+            encoder(OpCode.ACT,  timeslice=10, address=encoder.address(bank=1, row=100)),
+            encoder(OpCode.PRE,  timeslice=10, address=encoder.address(bank=1)),
+            encoder(OpCode.LOOP, count=3, jump=2),
+            encoder(OpCode.REF,  timeslice=15),
+            encoder(OpCode.NOOP, timeslice=0),  # STOP
+        ]
+
+        for depth in [len(payload), 32]:
+            with self.subTest(depth=depth):
+                result = []
+                dut = PayloadExecutorDUT(payload, payload_depth=depth)
+                dut.payload_executor.add_csrs()
+                run_simulation(dut, [generator(dut, result)])
+                self.assertEqual(result, [payload_checksum(payload, depth)])
+
+        # a single changed word must change the checksum
+        modified = list(payload)
+        modified[3] = encoder(OpCode.LOOP, count=4, jump=2)
+        self.assertNotEqual(payload_checksum(payload), payload_checksum(modified))
+
 # Interactive tests --------------------------------------------------------------------------------
 
 def run_payload_executor(dut: PayloadExecutorDUT, *, print_period=1):
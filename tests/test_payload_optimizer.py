@@ -0,0 +1,102 @@
+import unittest
+
+from migen import *
+
+from rowhammer_tester.gateware.payload_executor import Encoder, OpCode
+from rowhammer_tester.payload.optimizer import optimize_payload, payload_schedule
+
+from tests.test_payload_executor import PayloadExecutorDUT
+
+
+class TestPayloadOptimizer(unittest.TestCase):
+    def setUp(self):
+        self.encoder = Encoder(bankbits=3)
+
+    def act(self, timeslice, row=100):
+        return self.encoder.I(OpCode.ACT, timeslice=timeslice, address=self.encoder.address(bank=1, row=row))
+
+    def pre(self, timeslice):
+        return self.encoder.I(OpCode.PRE, timeslice=timeslice, address=self.encoder.address(bank=1))
+
+    def noop(self, timeslice):
+        return self.encoder.I(OpCode.NOOP, timeslice=timeslice)
+
+    def loop(self, count, jump):
+        return self.encoder.I(OpCode.LOOP, count=count, jump=jump)
+
+    def assert_optimized(self, payload, expected):
+        optimized, stats = optimize_payload(payload)
+        self.assertEqual(self.encoder(optimized), self.encoder(expected))
+        self.assertEqual(stats.instructions_before, len(payload))
+        self.assertEqual(stats.instructions_after, len(expected))
+        self.assertEqual(payload_schedule(optimized), payload_schedule(payload))
+
+    def test_merge_noops(self):
+        payload = [self.noop(10), self.noop(20), self.noop(5), self.act(3), self.noop(0)]
+        self.assert_optimized(payload, [self.noop(35), self.act(3), self.noop(0)])
+
+    def test_fold_noop_into_timeslice(self):
+        payload = [self.act(5), self.noop(10), self.pre(60), self.noop(10), self.noop(0)]
+        expected = [self.act(15), self.pre(60), self.noop(10), self.noop(0)]
+        self.assert_optimized(payload, expected)
+
+    def test_no_merge_across_jump_target(self):
+        payload = [self.pre(2), self.noop(10), self.act(5), self.loop(count=3, jump=2), self.noop(0)]
+        self.assert_optimized(payload, payload)
+
+    def test_loop_count_0(self):
+        payload = [self.act(5), self.pre(2), self.loop(count=0, jump=2), self.noop(0)]
+        self.assert_optimized(payload, [self.act(5), self.pre(3), self.noop(0)])
+
+    def test_fold_noop_loop(self):
+        payload = [self.act(5), self.noop(9), self.loop(count=99, jump=1), self.noop(0)]
+        self.assert_optimized(payload, [self.act(5), self.noop(1000), self.noop(0)])
+
+    def test_jumps_updated(self):
+        payload = [
+            self.noop(4), self.noop(4),
+            self.act(5), self.noop(7), self.pre(2), self.noop(3), self.loop(count=10, jump=4),
+            self.noop(0),
+        ]
+        expected = [
+            self.noop(8),
+            self.act(12), self.pre(5), self.loop(count=10, jump=2),
+            self.noop(0),
+        ]
+        self.assert_optimized(payload, expected)
+
+    def test_schedule_detects_changes(self):
+        payload = [self.act(5), self.pre(2), self.loop(count=3, jump=2), self.noop(0)]
+        self.assertNotEqual(payload_schedule(payload),
+            payload_schedule([self.act(5), self.pre(3), self.loop(count=3, jump=2), self.noop(0)]))
+        self.assertNotEqual(payload_schedule(payload),
+            payload_schedule([self.act(5, row=1), self.pre(2), self.loop(count=3, jump=2), self.noop(0)]))
+        self.assertNotEqual(payload_schedule(payload),
+            payload_schedule([self.act(5), self.pre(2), self.loop(count=4, jump=2), self.noop(0)]))
+
+    def test_simulation_equivalent(self):
+        # Compare DFI commands sent by the executor for the original and the optimized payload
+        def run(payload):
+            dut = PayloadExecutorDUT(self.encoder(payload), with_refresh=False)
+
+            def generator():
+                yield dut.payload_executor.start.eq(1)
+                yield
+                yield dut.payload_executor.start.eq(0)
+                yield
+                while not (yield dut.payload_executor.ready):
+                    yield
+
+            run_simulation(dut, [generator(), *dut.get_generators()])
+            return dut.dfi_history, dut.execution_cycles
+
+        payload = [
+            self.noop(3), self.noop(2),
+            self.act(4), self.noop(3), self.pre(2), self.noop(1), self.loop(count=2, jump=4),
+            self.noop(2), self.loop(count=3, jump=1),
+            self.act(2), self.loop(count=0, jump=1),
+            self.noop(0),
+        ]
+        optimized, stats = optimize_payload(payload)
+        self.assertLess(stats.instructions_after, stats.instructions_before)
+        self.assertEqual(run(optimized), run(payload))
@@ -0,0 +1,31 @@
+import os
+import json
+import tempfile
+import unittest
+
+from rowhammer_tester.scripts.utils import ProgressReporter, progress_sink
+
+
+class TestProgressReporter(unittest.TestCase):
+    def test_file_sink(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'events.jsonl')
+            reporter = ProgressReporter(enabled=False, sink=progress_sink(path))
+            sink = reporter.sink
+            reporter.report('Attack', 10, 100, render=None, bank=1)
+            # Rate limited, but the last update is always reported
+            reporter.report('Attack', 50, 100, render=None)
+            reporter.report('Attack', 100, 100, render=None, last=True)
+            reporter.close()
+            self.assertTrue(sink.file.closed)
+            self.assertIsNone(reporter.sink)
+            self.assertFalse(reporter.due('Attack', last=True))
+            with open(path) as f:
+                events = [json.loads(line) for line in f]
+        self.assertEqual([(e['current'], e['last']) for e in events], [(10, False), (100, True)])
+        self.assertEqual(events[0]['bank'], 1)
+
+    def test_close_without_sink(self):
+        reporter = ProgressReporter(sink=lambda event: None)
+        reporter.close()
+        self.assertIsNone(reporter.sink)
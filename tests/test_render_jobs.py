@@ -0,0 +1,95 @@
+import os
+import json
+import tempfile
+import unittest
+
+from rowhammer_tester.scripts.flip_store import FlipStore
+from rowhammer_tester.scripts.render_jobs import cached_store, input_stamp, render
+
+SUMMARY = {
+    '1000': {
+        'read_count': 1000,
+        'pair_8_8': {
+            'hammer_row_1': 8,
+            'hammer_row_2': 8,
+            'errors_in_rows': {
+                '9': {'bank': 0, 'row': 9, 'col': {'16': [70]}, 'bitflips': 1}
+            },
+        },
+    },
+}
+
+
+def write_output(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+class TestRenderJobs(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.input = os.path.join(self.tmpdir.name, 'summary.json')
+        self.write_input(SUMMARY)
+
+    def write_input(self, doc):
+        with open(self.input, 'w') as f:
+            json.dump(doc, f)
+
+    def touch_input(self):
+        # Modification times may not change between two writes of a test
+        stat = os.stat(self.input)
+        os.utime(self.input, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_input_stamp(self):
+        stamp = input_stamp([self.input], key='pair_8_8')
+        self.assertEqual(stamp, input_stamp([self.input], key='pair_8_8'))
+        self.assertNotEqual(stamp, input_stamp([self.input], key='pair_9_9'))
+        self.touch_input()
+        self.assertNotEqual(stamp, input_stamp([self.input], key='pair_8_8'))
+
+    def test_cached_store(self):
+        cache_dir = os.path.join(self.tmpdir.name, '.flips')
+        path = cached_store(self.input, cache_dir)
+        self.assertEqual(FlipStore.load(path)['col'].tolist(), [16])
+        mtime = os.stat(os.path.join(path, 'row.npy')).st_mtime_ns
+        self.assertEqual(cached_store(self.input, cache_dir), path)
+        self.assertEqual(os.stat(os.path.join(path, 'row.npy')).st_mtime_ns, mtime)
+
+        doc = json.loads(json.dumps(SUMMARY))
+        doc['1000']['pair_8_8']['errors_in_rows']['9']['col'] = {'32': [1, 2]}
+        self.write_input(doc)
+        self.touch_input()
+        self.assertEqual(FlipStore.load(cached_store(self.input, cache_dir))['col'].tolist(),
+                         [32, 32])
+        self.assertEqual(cached_store(path, cache_dir), path)
+
+    def test_render(self):
+        outputs = [os.path.join(self.tmpdir.name, f'{i}.txt') for i in range(3)]
+        jobs = [(output, input_stamp([self.input], i=i), (output, str(i)))
+                for i, output in enumerate(outputs)]
+        rendered, skipped = render(write_output, jobs, headless=False)
+        self.assertEqual((rendered, skipped), (outputs, []))
+
+        rendered, skipped = render(write_output, jobs, headless=False)
+        self.assertEqual((rendered, skipped), ([], outputs))
+
+        os.remove(outputs[1])
+        self.touch_input()
+        jobs[2] = (outputs[2], input_stamp([self.input], i=2), (outputs[2], 'new'))
+        rendered, skipped = render(write_output, jobs, headless=False)
+        self.assertEqual((rendered, skipped), (outputs[1:], outputs[:1]))
+        with open(outputs[2]) as f:
+            self.assertEqual(f.read(), 'new')
+
+        rendered, skipped = render(write_output, jobs, headless=False, force=True)
+        self.assertEqual((rendered, skipped), (outputs, []))
+
+    def test_render_processes(self):
+        outputs = [os.path.join(self.tmpdir.name, f'{i}.txt') for i in range(4)]
+        jobs = [(output, 'stamp', (output, str(i))) for i, output in enumerate(outputs)]
+        rendered, skipped = render(write_output, jobs, processes=2, headless=False)
+        self.assertEqual(sorted(rendered), outputs)
+        for i, output in enumerate(outputs):
+            with open(output) as f:
+                self.assertEqual(f.read(), str(i))
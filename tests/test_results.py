@@ -0,0 +1,98 @@
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+
+from rowhammer_tester.scripts.results import Checkpoint, ResultWriter, read_records, to_legacy
+
+
+class TestResults(unittest.TestCase):
+    ENTRIES = [
+        (1000, 'pair_10_12', {'hammer_row_1': 10, 'hammer_row_2': 12, 'errors_in_rows': {}}),
+        (1000, 'pair_11_13', {'hammer_row_1': 11, 'hammer_row_2': 13, 'errors_in_rows': {}}),
+        (2000, 'pair_10_12', {'hammer_row_1': 10, 'hammer_row_2': 12, 'errors_in_rows': None}),
+    ]
+
+    def write(self, path, **kwargs):
+        with ResultWriter(path, **kwargs) as writer:
+            for entry in self.ENTRIES:
+                writer.write(*entry)
+
+    def test_legacy_layout(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'results.jsonl')
+            self.write(path)
+            summary = to_legacy(read_records(path))
+        self.assertEqual(list(summary), ['1000', '2000'])
+        self.assertEqual(summary['1000']['read_count'], 1000)
+        self.assertEqual(summary['1000']['pair_11_13'], self.ENTRIES[1][2])
+        self.assertIsNone(summary['2000']['pair_10_12']['errors_in_rows'])
+
+    def test_gzip_sidecar(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'results.jsonl')
+            self.write(path, compress=True)
+            self.write(path, compress=True)  # sidecar written again with all the records
+            self.assertEqual(list(read_records(path + '.gz')), list(read_records(path)))
+            self.assertEqual(len(list(read_records(path))), 2 * len(self.ENTRIES))
+
+    def test_unsynced_gzip(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'results.jsonl')
+            writer = ResultWriter(path, compress=True)
+            writer.write(*self.ENTRIES[0])
+            writer.sync()
+            # Stream without the end marker, as left by a crash
+            self.assertEqual(len(list(read_records(path + '.gz'))), 1)
+            writer.close()
+
+    def test_gzip_resume_after_crash(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'results.jsonl')
+            # The writer is killed after syncing, leaving an unfinished gzip member
+            subprocess.run([
+                sys.executable, '-c', 'import os, sys\n'
+                'from rowhammer_tester.scripts.results import ResultWriter\n'
+                'writer = ResultWriter(sys.argv[1], compress=True)\n'
+                'writer.write(1000, "pair_10_12", {})\n'
+                'writer.write(1000, "pair_11_13", {})\n'
+                'writer.sync()\n'
+                'writer.gzip.write(b\'{"read_count": 1000, "ke\')\n'
+                'writer.gzip.flush()\n'
+                'os._exit(1)\n', path
+            ], check=False)
+            self.assertEqual(len(list(read_records(path + '.gz'))), 2)
+
+            with Checkpoint(path, compress=True) as checkpoint:
+                self.assertEqual(len(checkpoint.completed), 2)
+                for entry in self.ENTRIES:
+                    checkpoint.add(*entry)
+            records = list(read_records(path))
+            self.assertEqual(len(records), 2 + len(self.ENTRIES))
+            self.assertEqual(list(read_records(path + '.gz')), records)
+
+    def test_truncated_record(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'results.jsonl')
+            self.write(path)
+            with open(path, 'a') as f:
+                f.write('{"read_count": 3000, "ke')
+            self.assertEqual(len(list(read_records(path))), len(self.ENTRIES))
+
+    def test_checkpoint_resume(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'results.jsonl')
+            with Checkpoint(path) as checkpoint:
+                self.assertEqual(checkpoint.completed, {})
+                checkpoint.add(*self.ENTRIES[0])
+            with open(path, 'a') as f:
+                f.write('{"read_count": 1000, "ke')  # interrupted write
+
+            with Checkpoint(path) as checkpoint:
+                self.assertEqual(checkpoint.get(1000, 'pair_10_12'), self.ENTRIES[0][2])
+                self.assertIsNone(checkpoint.get(1000, 'pair_11_13'))
+                checkpoint.add(*self.ENTRIES[1])
+            self.assertEqual(
+                [(r['read_count'], r['key']) for r in read_records(path)],
+                [entry[:2] for entry in self.ENTRIES[:2]])
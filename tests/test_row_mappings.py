@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+
+from rowhammer_tester.scripts.playbook.row_mappings import (
+    RowMapping, RowMappingTable, XorRowMapping, load_row_mapping)
+from rowhammer_tester.scripts.playbook.row_mappings.discovery import (
+    attribute_victims, solve_row_mapping)
+
+
+class TestRowMappings(unittest.TestCase):
+    ROWBITS = 10
+
+    def test_tables_match_mappings(self):
+        rows = np.arange(2**self.ROWBITS)
+        for name, mapping in RowMapping.subclasses.items():
+            with self.subTest(mapping=name):
+                table = RowMappingTable(mapping, self.ROWBITS)
+                self.assertEqual(
+                    table.to_physical(rows).tolist(),
+                    [mapping.logical_to_physical(row) for row in rows.tolist()])
+                self.assertEqual(
+                    table.to_logical(rows).tolist(),
+                    [mapping.physical_to_logical(row) for row in rows.tolist()])
+
+    def test_xor_rules(self):
+        table = load_row_mapping({"xor": {"1": [3], "2": [3]}}, self.ROWBITS)
+        type_a = RowMappingTable(RowMapping.get_by_name("TypeARowMapping"), self.ROWBITS)
+        np.testing.assert_array_equal(table.forward, type_a.forward)
+        np.testing.assert_array_equal(table.backward, type_a.backward)
+
+    def test_xor_inverse(self):
+        # Not an involution: bit 0 depends on bit 1, which depends on bit 2
+        mapping = XorRowMapping({0: [1], 1: [2]})
+        table = RowMappingTable(mapping, self.ROWBITS)
+        rows = np.arange(2**self.ROWBITS)
+        np.testing.assert_array_equal(table.to_logical(table.to_physical(rows)), rows)
+
+    def test_not_bijective(self):
+        with self.assertRaises(ValueError):
+            XorRowMapping({0: [1], 1: [0]})
+
+        class BrokenRowMapping(RowMapping):
+
+            def logical_to_physical(self, logical):
+                return logical // 2
+
+            def physical_to_logical(self, physical):
+                return physical * 2
+
+        # Registered in the global list of mappings, which other tests iterate
+        self.addCleanup(RowMapping.subclasses.pop, "BrokenRowMapping")
+
+        with self.assertRaises(ValueError):
+            RowMappingTable(BrokenRowMapping(), self.ROWBITS)
+
+
+class TestRowMappingDiscovery(unittest.TestCase):
+
+    def neighbour_pairs(self, mapping, aggressors):
+        table = RowMappingTable(mapping, 10)
+        physical = table.to_physical(aggressors)
+        victims = np.concatenate([table.to_logical(physical - 1), table.to_logical(physical + 1)])
+        return attribute_victims(aggressors, victims, max_distance=16)
+
+    def test_solve(self):
+        aggressors = np.arange(32, 512, 32)
+        # Identity, TypeARowMapping, bits 0 and 1 swapped, chained XORs
+        for rules in [{}, {1: [3], 2: [3]}, {0: [0, 1], 1: [0, 1]}, {0: [1], 1: [2]}]:
+            with self.subTest(rules=rules):
+                pairs = np.concatenate(
+                    [self.neighbour_pairs(XorRowMapping(rules), aggressors + i) for i in range(32)])
+                found, adjacent = solve_row_mapping(pairs)
+                self.assertEqual(adjacent, 1.0)
+                table = RowMappingTable(XorRowMapping(found), 10)
+                physical = table.to_physical(pairs)
+                self.assertTrue((np.abs(physical[:, 0] - physical[:, 1]) == 1).all())
+
+    def test_attribute_victims(self):
+        pairs = attribute_victims([10, 42], [9, 10, 11, 26, 40, 43], max_distance=8)
+        self.assertEqual(pairs.tolist(), [[10, 9], [10, 11], [42, 40], [42, 43]])
@@ -0,0 +1,200 @@
+import io
+import unittest
+import contextlib
+from types import SimpleNamespace
+from itertools import combinations
+
+from rowhammer_tester.scripts.rowhammer import (
+    PATTERNS, RowHammer, group_row_pairs, attribute_errors, search_read_count)
+from rowhammer_tester.scripts.hcfirst_search import BisectSearch, RowSearch
+from rowhammer_tester.scripts.utils import DRAMAddressConverter
+
+
+def errors(row, bank=None):
+    info = {'row': row, 'col': {0: [1]}, 'bitflips': 1}
+    if bank is not None:
+        info['bank'] = bank
+    return {str(row): info}
+
+
+class TestGroupRowPairs(unittest.TestCase):
+    PAIRS = [(row, row + 2) for row in range(0, 200, 5)]
+
+    def check_rounds(self, rounds, min_distance):
+        for pairs in rounds:
+            for (_, a), (_, b) in combinations(pairs, 2):
+                distance = min(abs(x - y) for x in a for y in b)
+                self.assertGreaterEqual(distance, min_distance, (a, b))
+
+    def test_min_distance(self):
+        rounds = group_row_pairs(self.PAIRS, min_distance=16)
+        self.check_rounds(rounds, 16)
+        self.assertEqual(
+            sorted(pair for pairs in rounds for _, pair in pairs), sorted(self.PAIRS))
+        # Pairs 5 rows apart need 4 rounds to be 20 rows apart
+        self.assertEqual(len(rounds), 4)
+        self.assertEqual(rounds[0][:3], [(None, (0, 2)), (None, (20, 22)), (None, (40, 42))])
+
+    def test_max_round_size(self):
+        rounds = group_row_pairs(self.PAIRS, min_distance=16, max_round_size=3)
+        self.check_rounds(rounds, 16)
+        self.assertTrue(all(len(pairs) <= 3 for pairs in rounds))
+        self.assertEqual(sum(len(pairs) for pairs in rounds), len(self.PAIRS))
+
+    def test_single_round(self):
+        self.assertEqual(
+            group_row_pairs([(0, 0), (100, 102)], min_distance=50),
+            [[(None, (0, 0)), (None, (100, 102))]])
+        self.assertEqual(
+            group_row_pairs([(0, 0), (49, 49)], min_distance=50),
+            [[(None, (0, 0))], [(None, (49, 49))]])
+
+    def test_banks(self):
+        rounds = group_row_pairs([(0, 0), (100, 100)], min_distance=50, banks=[0, 1])
+        # Rows are kept apart regardless of the bank
+        self.assertEqual(rounds, [
+            [(0, (0, 0)), (0, (100, 100))],
+            [(1, (0, 0)), (1, (100, 100))],
+        ])
+        rounds = group_row_pairs([(0, 0)], min_distance=50, banks=[0, 1, 2])
+        self.assertEqual(rounds, [[(0, (0, 0))], [(1, (0, 0))], [(2, (0, 0))]])
+
+    def test_banks_neighbouring_rows(self):
+        pairs = [(row, row) for row in range(0, 40, 4)]
+        rounds = group_row_pairs(pairs, min_distance=16, banks=[0, 1, 2], max_round_size=5)
+        # Pairs of different banks in one round are as far apart as pairs of one bank
+        self.check_rounds(rounds, 16)
+        self.assertEqual(
+            sorted(pair for pairs in rounds for pair in pairs),
+            sorted((bank, pair) for bank in [0, 1, 2] for pair in pairs))
+
+
+class TestAttributeErrors(unittest.TestCase):
+    def test_nearest_pair(self):
+        round_pairs = [(None, (10, 12)), (None, (60, 60))]
+        summary = {**errors(9), **errors(13), **errors(30), **errors(45), **errors(61)}
+        per_pair = attribute_errors(summary, round_pairs)
+        self.assertEqual([sorted(p, key=int) for p in per_pair], [['9', '13', '30'], ['45', '61']])
+
+    def test_max_distance(self):
+        round_pairs = [(None, (10, 12)), (None, (60, 60))]
+        summary = {**errors(9), **errors(30), **errors(58)}
+        per_pair = attribute_errors(summary, round_pairs, max_distance=2)
+        self.assertEqual([list(p) for p in per_pair], [['9'], ['58']])
+
+    def test_banks(self):
+        round_pairs = [(0, (10, 10)), (1, (12, 12))]
+        summary = {**errors(11, bank=1), **errors(20, bank=0)}
+        per_pair = attribute_errors(summary, round_pairs)
+        # Victim rows are attributed to pairs in the same bank, even if further away
+        self.assertEqual([list(p) for p in per_pair], [['20'], ['11']])
+        # Without the bank of the victim any pair may be the nearest
+        per_pair = attribute_errors(errors(11), round_pairs)
+        self.assertEqual([list(p) for p in per_pair], [['11'], []])
+        self.assertEqual(attribute_errors({}, round_pairs), [{}, {}])
+
+    def test_same_row_in_banks(self):
+        round_pairs = [(0, (10, 10)), (1, (30, 30))]
+        summary = {
+            '11': {'bank': 0, 'row': 11, 'col': {0: [1]}, 'bitflips': 1},
+            '11_bank1': {'bank': 1, 'row': 11, 'col': {4: [2]}, 'bitflips': 1},
+            '31_bank1': {'bank': 1, 'row': 31, 'col': {8: [3]}, 'bitflips': 1},
+        }
+        per_pair = attribute_errors(summary, round_pairs)
+        self.assertEqual([list(p) for p in per_pair], [['11'], ['11_bank1', '31_bank1']])
+
+
+class TestDisplayErrors(unittest.TestCase):
+    def row_hammer(self, bank):
+        row_hammer = RowHammer.__new__(RowHammer)
+        row_hammer.bank = bank
+        row_hammer.verbose = False
+        row_hammer.settings = SimpleNamespace(geom=SimpleNamespace(rowbits=14))
+        row_hammer.converter = DRAMAddressConverter(
+            colbits=10, rowbits=14, bankbits=3, address_align=3, dram_port_width=128,
+            address_mapping='ROW_BANK_COL')
+        return row_hammer
+
+    def test_banks(self):
+        row_hammer = self.row_hammer(bank=0)
+        # Words are counted from the row in bank 0, the next row of the bus is in bank 1
+        words_per_row = row_hammer.converter.row_span() // 4
+        ones = 0xffffffff
+        row_errors = {
+            11: [(0, ones ^ 0b1, ones), (words_per_row + 2, ones ^ 0b110, ones)],
+            12: [(words_per_row, ones ^ 0b1000, ones)],
+        }
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = row_hammer.display_errors(row_errors, 1000, do_error_summary=True)
+        self.assertEqual(
+            summary, {
+                '11': {'bank': 0, 'row': 11, 'col': {0: [31]}, 'bitflips': 1},
+                '11_bank1': {'bank': 1, 'row': 11, 'col': {4: [29, 30]}, 'bitflips': 2},
+                '12_bank1': {'bank': 1, 'row': 12, 'col': {0: [28]}, 'bitflips': 1},
+            })
+
+
+class FakeRowHammer:
+    """Attacks with at least ``threshold`` reads flip a bit in the row after the pair."""
+
+    def __init__(self, threshold, summary=True, corrupted_at=None):
+        self.threshold = threshold
+        self.summary = summary
+        self.corrupted_at = corrupted_at
+        self.bitflip_found = False
+        self.runs = []
+
+    def run(self, row_pairs, read_count, pattern_generator, fill):
+        self.runs.append((read_count, fill))
+        if len(self.runs) == self.corrupted_at:
+            return None
+        if read_count < self.threshold:
+            return {}
+        self.bitflip_found = True
+        row = max(row_pairs[0]) + 1
+        errors_in_rows = {str(row): {'row': row, 'col': {0: [1]}, 'bitflips': 1}}
+        # Without log directory display_errors does not return the summary
+        return errors_in_rows if self.summary else None
+
+
+class TestSearchReadCount(unittest.TestCase):
+    ARGS = dict(min_hc=1000, max_hc=30000, precision=100)
+
+    def search(self, row_hammer, search_cls=BisectSearch):
+        search = search_cls((10, 10), **self.ARGS)
+        trace = search_read_count(row_hammer, (10, 10), search, PATTERNS['all_1'])
+        return search, trace
+
+    def test_fill_after_bitflips(self):
+        for search_cls in [BisectSearch, RowSearch]:
+            with self.subTest(search=search_cls.__name__):
+                row_hammer = FakeRowHammer(threshold=4321)
+                search, trace = self.search(row_hammer, search_cls)
+                self.assertEqual(search.hcfirst, 4400)
+                self.assertEqual(search.errors_in_rows['11']['bitflips'], 1)
+                self.assertEqual(
+                    trace, [{
+                        'read_count': count,
+                        'bitflips': 1 if count >= 4321 else 0
+                    } for count, _ in row_hammer.runs])
+                # Memory is filled again only after probes which flipped bits
+                fills = [fill for _, fill in row_hammer.runs]
+                flipped = [count >= 4321 for count, _ in row_hammer.runs]
+                self.assertEqual(fills, [True] + flipped[:-1])
+                self.assertIn(False, fills)
+
+    def test_without_summary(self):
+        row_hammer = FakeRowHammer(threshold=4321, summary=False)
+        search, trace = self.search(row_hammer)
+        self.assertEqual(search.hcfirst, 4400)
+        self.assertEqual(
+            [probe['bitflips'] for probe in trace],
+            [None if count >= 4321 else 0 for count, _ in row_hammer.runs])
+
+    def test_corrupted_memory(self):
+        row_hammer = FakeRowHammer(threshold=4321, corrupted_at=3)
+        with contextlib.redirect_stdout(io.StringIO()):
+            search, trace = self.search(row_hammer)
+        self.assertFalse(search.resolved)
+        self.assertEqual(len(row_hammer.runs), 3)
+        self.assertEqual(len(trace), 2)
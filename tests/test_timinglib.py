@@ -0,0 +1,72 @@
+import math
+import random
+import unittest
+
+from rowhammer_tester.payload.timinglib import Rank, Scope
+
+ACT, PRE, RD = range(3)
+NAMES = ['ACT', 'PRE', 'RD']
+
+
+def make_rank():
+    return Rank(
+        bank_groups=2,
+        banks=2,
+        opcodes=3,
+        parameters={
+            Scope.BANK: {
+                ACT: {ACT: 20, PRE: 12, RD: 5},
+                PRE: {ACT: 6, RD: math.inf},
+                RD: {PRE: 4},
+            },
+            Scope.BANK_GROUP: {ACT: {ACT: 4}, RD: {RD: 3}},
+            Scope.OTHER_BANK_GROUPS: {ACT: {ACT: 2}, RD: {RD: 2}},
+        },
+        faw=24,
+        act=ACT,
+        blocked=[RD],
+        name=lambda opcode: NAMES[opcode])
+
+
+class TestTimingLib(unittest.TestCase):
+    def test_constraints(self):
+        rank = make_rank()
+        self.assertFalse(rank.ExecuteCommand(0, RD, 0, 0))  # bank not activated
+        self.assertTrue(rank.ExecuteCommand(0, ACT, 0, 0))
+        self.assertFalse(rank.ExecuteCommand(3, ACT, 0, 1))  # same bank group
+        self.assertTrue(rank.ExecuteCommand(2, ACT, 1, 0))  # other bank group
+        self.assertFalse(rank.ExecuteCommand(4, RD, 0, 0))
+        self.assertTrue(rank.ExecuteCommand(5, RD, 0, 0))
+        self.assertTrue(rank.ExecuteCommand(12, PRE, 0, 0))
+        self.assertFalse(rank.ExecuteCommand(30, RD, 0, 0))  # precharged again
+        self.assertFalse(rank.ExecuteCommand(17, ACT, 0, 0))
+        self.assertTrue(rank.ExecuteCommand(20, ACT, 0, 0))
+
+    def test_faw(self):
+        rank = make_rank()
+        for tick, (group, bank) in zip([0, 2, 4, 6], [(0, 0), (1, 0), (0, 1), (1, 1)]):
+            self.assertTrue(rank.ExecuteCommand(tick, ACT, group, bank))
+        self.assertTrue(rank.ExecuteCommand(12, PRE, 0, 0))
+        self.assertFalse(rank.ExecuteCommand(20, ACT, 0, 0))
+        self.assertTrue(rank.ExecuteCommand(24, ACT, 0, 0))
+
+    def test_arrays_match_commands(self):
+        rng = random.Random(42)
+        for _ in range(50):
+            commands = []
+            tick = 0
+            for _ in range(40):
+                tick += rng.randint(1, 8)
+                commands.append((tick, rng.choice([ACT, PRE, RD]), rng.randrange(2), rng.randrange(2)))
+
+            expected = make_rank()
+            executed = 0
+            for command in commands:
+                if not expected.ExecuteCommand(*command):
+                    break
+                executed += 1
+
+            rank = make_rank()
+            ticks, opcodes, groups, banks = zip(*commands)
+            self.assertEqual(rank.ExecuteArrays(ticks, opcodes, groups, banks), executed)
+            self.assertEqual(rank.Snapshot(tick), expected.Snapshot(tick))
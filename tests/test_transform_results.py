@@ -0,0 +1,71 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+
+from rowhammer_tester.scripts.playbook.row_mappings import load_row_mapping
+from rowhammer_tester.scripts.transform_results import (
+    JsonItemWriter, ResultTransformer, iter_items, transform_file)
+
+
+def errors(row, bank=0, **cols):
+    return {'bank': bank, 'row': row, 'col': {k[1:]: v for k, v in cols.items()}, 'bitflips': 1}
+
+
+class TestTransformResults(unittest.TestCase):
+    SUMMARY = {
+        '1000': {
+            'read_count': 1000,
+            'pair_8_8': {
+                'hammer_row_1': 8,
+                'hammer_row_2': 8,
+                'errors_in_rows': {
+                    '9': errors(9, c16=[70]),
+                    '10': errors(10, bank=1, c0=[3, 200]),
+                },
+            },
+            'pair_20_20': {'hammer_row_1': 20, 'hammer_row_2': 20, 'errors_in_rows': {}},
+        },
+        '2000': {'read_count': 2000},
+    }
+
+    def test_streaming_round_trip(self):
+        docs = [self.SUMMARY, {}, {'a': {}}, {'n': 12345, 'x': {'y': {'z': [1, 2]}}}]
+        for doc in docs:
+            with self.subTest(doc=doc):
+                out = io.StringIO()
+                writer = JsonItemWriter(out)
+                for path, value in iter_items(io.StringIO(json.dumps(doc)), chunk_size=3):
+                    writer.write(path, value)
+                writer.close()
+                self.assertEqual(json.loads(out.getvalue()), doc)
+
+    def test_row_mapping(self):
+        transformer = ResultTransformer(row_mapping=load_row_mapping('TypeARowMapping', 8))
+        entry = transformer.transform(('1000', 'pair_8_8'), self.SUMMARY['1000']['pair_8_8'])[None]
+        self.assertEqual(entry['hammer_row_1'], 14)
+        self.assertEqual(sorted(entry['errors_in_rows']), ['12', '15'])
+        self.assertEqual(entry['errors_in_rows']['15']['row'], 15)
+
+    def test_chips(self):
+        transformer = ResultTransformer(chips=True)
+        rows = transformer.transform_errors(self.SUMMARY['1000']['pair_8_8']['errors_in_rows'])
+        self.assertEqual(rows['9']['chip'], 2)
+        self.assertEqual(rows['9']['col'], {'17': {'bitflip_positions': [6], 'total_bitflips': 1}})
+        self.assertEqual(sorted(rows), ['10_chip1', '10_chip4', '9'])
+
+    def test_split_banks(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'summary.json')
+            with open(path, 'w') as f:
+                json.dump(self.SUMMARY, f)
+            outputs = transform_file(
+                path, os.path.join(tmpdir, 'out.json'), ResultTransformer(split_banks=True))
+            self.assertEqual(
+                [os.path.basename(p) for p in outputs], ['out_bank0.json', 'out_bank1.json'])
+            with open(outputs[1]) as f:
+                bank1 = json.load(f)
+        self.assertEqual(list(bank1), ['1000', '2000'])
+        self.assertEqual(list(bank1['1000']['pair_8_8']['errors_in_rows']), ['10'])
+        self.assertNotIn('pair_20_20', bank1['1000'])